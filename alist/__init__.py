@@ -1,23 +1,134 @@
-from .error import ServerError, AListError, AuthenticationError, SecurityWarning
-from .main import AList
-from .model import AListFile, AListFolder
-from .sync import AListFileSync, AListSync
-from .utils import AListUser
+from .error import (
+    AListError,
+    AuthenticationError,
+    IntegrityError,
+    SecurityWarning,
+    ServerError,
+    TaskError,
+)
+
+# 不导入 typing，以缩短 import alist 的耗时
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from .cache import ContentCache
+    from .cluster import AListCluster
+    from .hedge import HedgePolicy
+    from .index import LocalIndex
+    from .main import AList
+    from .metrics import Metrics
+    from .middleware import RateLimit, Request, Retry
+    from .model import AListCompactFile, AListCompactFolder, AListFile, AListFolder
+    from .offline import OfflineIngest
+    from .scheduler import RequestScheduler
+    from .sync import AListFileSync, AListSync
+    from .task import TaskHandle, TaskPoller
+    from .token import AutoLogin, TokenStore
+    from .tracing import RequestTracer
+    from .utils import AListUser
+
+    AListAsync = AList
+    AListFileAsync = AListFile
+
+# 名称到所在子模块的映射，首次访问时才导入（aiohttp等依赖导入较慢）
+_LAZY = {
+    "AList": "main",
+    "AListAsync": "main",
+    "AListCluster": "cluster",
+    "AListSync": "sync",
+    "AListFile": "model",
+    "AListFileAsync": "model",
+    "AListFolder": "model",
+    "AListCompactFile": "model",
+    "AListCompactFolder": "model",
+    "AListFileSync": "sync",
+    "AListUser": "utils",
+    "AutoLogin": "token",
+    "ContentCache": "cache",
+    "HedgePolicy": "hedge",
+    "LocalIndex": "index",
+    "Metrics": "metrics",
+    "OfflineIngest": "offline",
+    "RateLimit": "middleware",
+    "Request": "middleware",
+    "RequestScheduler": "scheduler",
+    "RequestTracer": "tracing",
+    "Retry": "middleware",
+    "TaskHandle": "task",
+    "TaskPoller": "task",
+    "TokenStore": "token",
+}
+_ALIASES = {"AListAsync": "AList", "AListFileAsync": "AListFile"}
+# 可通过 alist.<name> 访问的子模块
+_SUBMODULES = frozenset(
+    {
+        "cache",
+        "cluster",
+        "hedge",
+        "index",
+        "main",
+        "metrics",
+        "middleware",
+        "model",
+        "offline",
+        "scheduler",
+        "sync",
+        "task",
+        "token",
+        "tracing",
+        "utils",
+        "watch",
+    }
+)
+
+
+def __getattr__(name: str):
+    from importlib import import_module
+
+    module = _LAZY.get(name)
+    if module is not None:
+        value = getattr(import_module(f".{module}", __name__), _ALIASES.get(name, name))
+    elif name in _SUBMODULES:
+        value = import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY) | _SUBMODULES)
 
-AListAsync = AList
-AListFileAsync = AListFile
 
 __all__ = [
     "AList",
+    "AListCluster",
     "AListSync",
     "AListFile",
     "AListFolder",
+    "AListCompactFile",
+    "AListCompactFolder",
     "AListFileSync",
     "AListUser",
+    "AutoLogin",
+    "ContentCache",
+    "HedgePolicy",
+    "LocalIndex",
+    "Metrics",
+    "OfflineIngest",
+    "RateLimit",
+    "Request",
+    "RequestScheduler",
+    "RequestTracer",
+    "Retry",
+    "TaskHandle",
+    "TaskPoller",
+    "TokenStore",
     "AListError",
     "AuthenticationError",
+    "IntegrityError",
     "SecurityWarning",
     "ServerError",
+    "TaskError",
     "AListAsync",
     "AListFileAsync",
 ]
@@ -0,0 +1,274 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Mapping, Optional
+
+try:
+    import fcntl
+
+    FICLONE = 0x40049409  # Linux ioctl: 共享数据块的写时复制克隆
+except ImportError:
+    fcntl = None  # type: ignore
+
+
+def _reflink(src: str, dst: str) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return True
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+
+
+def _clone(src: str, dst: str, hardlink: bool) -> None:
+    # 依次尝试reflink、硬链接和复制
+    if _reflink(src, dst):
+        return
+    if hardlink:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+
+
+class CacheWriter:
+    """
+    缓存写入器，写入临时文件，提交时原子地移动到缓存中
+
+    Attributes:
+        key (str): 缓存键
+    """
+
+    def __init__(self, cache: "ContentCache", key: str):
+        self.key = key
+        self._cache = cache
+        fd, self._tmp = tempfile.mkstemp(dir=cache._tmp_dir)
+        self._f = os.fdopen(fd, "wb")
+        self.size = 0
+
+    async def write(self, data: bytes) -> None:
+        """写入数据（在线程池中执行）"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._f.write, data)
+        self.size += len(data)
+
+    def commit(self) -> None:
+        """提交到缓存"""
+        self._f.close()
+        self._cache._commit(self.key, self._tmp, self.size)
+
+    def abort(self) -> None:
+        """放弃写入"""
+        self._f.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+
+class ContentCache:
+    """
+    本地文件内容缓存（内容寻址）
+
+    缓存键由AList地址、路径、大小和修改时间计算；服务器提供 `hash_info` 时
+    直接使用文件摘要，相同内容在不同路径间共享。
+    超过 `max_bytes` 时按最近最少使用淘汰，所有写入都是原子的。
+
+    Attributes:
+        root (str): 缓存目录
+        max_bytes (int): 缓存大小上限
+        hardlink (bool): 无法reflink时是否用硬链接生成目标文件
+    """
+
+    def __init__(self, root: str, max_bytes: int = 10 * 1024**3, hardlink: bool = False):
+        """
+        初始化
+
+        Args:
+            root (str): 缓存目录
+            max_bytes (int): 缓存大小上限(字节)
+            hardlink (bool): 无法reflink时是否用硬链接生成目标文件
+                （目标文件与缓存共享数据，修改或截断目标文件会损坏缓存，仅适用于只读使用的目标文件）
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hardlink = hardlink
+        self._obj_dir = os.path.join(root, "objects")
+        self._tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self._obj_dir, exist_ok=True)
+        os.makedirs(self._tmp_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        # 按访问时间恢复LRU顺序
+        found = []
+        for sub in os.scandir(self._obj_dir):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                st = entry.stat()
+                found.append((st.st_mtime, entry.name, st.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.total += size
+
+    @staticmethod
+    def key_for(endpoint: str, path: str, init: Mapping[str, Any]) -> str:
+        """
+        计算缓存键
+
+        Args:
+            endpoint (str): AList地址
+            path (str): 文件路径
+            init (Mapping): AList返回的文件信息
+
+        Returns:
+            (str): 缓存键
+        """
+        hash_info = init.get("hash_info")
+        if not isinstance(hash_info, Mapping):
+            hash_info = {}
+        for algo in ("sha256", "sha1", "md5"):
+            if hash_info.get(algo):
+                return f"{algo}-{hash_info[algo].lower()}"
+        raw = "\0".join(
+            [
+                endpoint.rstrip("/"),
+                path,
+                str(init.get("size", 0)),
+                str(init.get("modified", "")),
+            ]
+        )
+        return "sha256-" + hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        digest = key.split("-", 1)[-1]
+        return os.path.join(self._obj_dir, digest[:2], key)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        获取缓存文件路径
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            (Optional[str]): 缓存文件路径，未命中时为None
+        """
+        path = self._path(key)
+        with self._lock:
+            if key not in self._entries or not os.path.exists(path):
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def discard(self, key: str) -> None:
+        """
+        删除缓存条目（如校验失败的内容）
+
+        Args:
+            key (str): 缓存键
+        """
+        with self._lock:
+            self.total -= self._entries.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def writer(self, key: str) -> CacheWriter:
+        """创建缓存写入器"""
+        return CacheWriter(self, key)
+
+    def add_file(self, key: str, src: str) -> None:
+        """
+        将本地文件加入缓存（优先使用reflink，否则复制；
+        文件属于调用方，之后可能被修改，因此从不使用硬链接）
+
+        Args:
+            key (str): 缓存键
+            src (str): 本地文件路径
+        """
+        fd, tmp = tempfile.mkstemp(dir=self._tmp_dir)
+        os.close(fd)
+        os.remove(tmp)
+        _clone(src, tmp, hardlink=False)
+        self._commit(key, tmp, os.path.getsize(tmp))
+
+    def _commit(self, key: str, tmp: str, size: int) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp, path)
+        with self._lock:
+            self.total -= self._entries.pop(key, 0)
+            self._entries[key] = size
+            self.total += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while True:
+            with self._lock:
+                if self.total <= self.max_bytes or len(self._entries) <= 1:
+                    return
+                key, size = self._entries.popitem(last=False)
+                self.total -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def materialize(self, key: str, dst: str) -> bool:
+        """
+        将缓存内容生成到目标路径（优先reflink，其次硬链接（需启用 `hardlink`），最后复制）
+
+        Args:
+            key (str): 缓存键
+            dst (str): 目标路径
+
+        Returns:
+            (bool): 是否命中缓存
+        """
+        src = self.get(key)
+        if src is None:
+            return False
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dst)))
+        os.close(fd)
+        try:
+            # 硬链接要求目标不存在
+            os.remove(tmp)
+            _clone(src, tmp, self.hardlink)
+            os.replace(tmp, dst)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"<ContentCache {self.root} {self.total}/{self.max_bytes} bytes>"
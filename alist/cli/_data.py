@@ -1,24 +1,25 @@
 import os
 
 from platformdirs import PlatformDirs
-from rich.console import Console
 
 _dirs = PlatformDirs("alist3")
 
 
 class dirs:
-    auths = os.path.join(_dirs.user_data_dir, "users")
+    data = _dirs.user_data_dir
+    auths = os.path.join(data, "users")  # 旧版本每个用户一个文件的目录
+    credentials = os.path.join(data, "credentials.json")
 
     @staticmethod
     def init():
-        for k, v in dirs.__dict__.items():
-            if k.startswith("_"):
-                continue
-            if k == "init":
-                continue
-            if not os.path.exists(v):
-                os.makedirs(v)
+        os.makedirs(dirs.data, exist_ok=True)
 
 
-dirs.init()
-console = Console()
+def __getattr__(name):
+    # rich 导入较慢，首次输出时再创建 Console
+    if name == "console":
+        from rich.console import Console
+
+        console = globals()["console"] = Console()
+        return console
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,150 @@
+import base64
+import json
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+
+class CredentialStore:
+    """
+    CLI用户凭据存储
+
+    所有用户保存在一个按用户名索引的JSON文件中，同时缓存每个用户的登录Token；
+    每次修改都通过临时文件原子替换，文件权限为仅当前用户可读写。
+    实现了 `get` / `set` / `delete`，可作为 `AList.login` 的 `store` 参数。
+    """
+
+    def __init__(self, path: str, legacy_dir: Optional[str] = None):
+        """
+        初始化
+
+        Args:
+            path (str): 文件路径
+            legacy_dir (str): 旧版本的用户目录，文件不存在时从中导入
+        """
+        self.path = path
+        self.legacy_dir = legacy_dir
+        self._data: Optional[Dict[str, Any]] = None
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        if self._data is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except FileNotFoundError:
+                self._data = {"default": None, "users": {}}
+                if self.legacy_dir is not None and os.path.isdir(self.legacy_dir):
+                    self._migrate(self.legacy_dir)
+        return self._data
+
+    def _migrate(self, legacy_dir: str) -> None:
+        for filename in os.listdir(legacy_dir):
+            try:
+                with open(os.path.join(legacy_dir, filename), "rb") as f:
+                    data = pickle.load(f)
+                user = pickle.loads(data["user"])
+                un = base64.b64decode(user["username"]).decode()
+                pwd = base64.b64decode(user["pwd"]).decode()
+            except Exception:
+                continue
+            self.users[un] = {
+                "endpoint": data.get("endpoint"),
+                "tag": data.get("tag"),
+                "pwd": pwd,
+                "token": "",
+            }
+            if filename.endswith(".__default"):
+                self.data["default"] = un
+        if self.users:
+            self.save()
+
+    @property
+    def users(self) -> Dict[str, Dict[str, Any]]:
+        """用户名到用户信息（endpoint、tag、pwd、token）的映射"""
+        return self.data["users"]
+
+    @property
+    def default(self) -> Optional[str]:
+        """默认用户名"""
+        return self.data["default"]
+
+    def save(self) -> None:
+        """原子写入文件"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False)
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def add(
+        self,
+        un: str,
+        pwd: str,
+        endpoint: str,
+        tag: Optional[str] = None,
+        default: bool = False,
+    ) -> None:
+        """
+        添加或覆盖用户
+
+        Args:
+            un (str): 用户名
+            pwd (str): 密码(密文)
+            endpoint (str): AList地址
+            tag (str): 标签
+            default (bool): 是否设为默认用户
+        """
+        self.users[un] = {"endpoint": endpoint, "tag": tag, "pwd": pwd, "token": ""}
+        if default:
+            self.data["default"] = un
+        self.save()
+
+    def remove(self, un: str) -> Optional[bool]:
+        """
+        删除用户
+
+        Returns:
+            (Optional[bool]): 用户不存在时为None，否则为是否是默认用户
+        """
+        if self.users.pop(un, None) is None:
+            return None
+        was_default = self.default == un
+        if was_default:
+            self.data["default"] = None
+        self.save()
+        return was_default
+
+    def get(self, endpoint: str, username: str, margin: float = 60.0) -> Optional[str]:
+        """获取缓存的Token，不存在或即将过期时为None"""
+        from ..token import jwt_expiry
+
+        info = self.users.get(username)
+        if not info or info["endpoint"] != endpoint or not info.get("token"):
+            return None
+        exp = jwt_expiry(info["token"])
+        if exp is not None and exp - time.time() < margin:
+            return None
+        return info["token"]
+
+    def set(self, endpoint: str, username: str, token: str) -> None:
+        """缓存Token"""
+        info = self.users.get(username)
+        if info and info["endpoint"] == endpoint:
+            info["token"] = token
+            self.save()
+
+    def delete(self, endpoint: str, username: str) -> None:
+        """删除缓存的Token"""
+        info = self.users.get(username)
+        if info and info["endpoint"] == endpoint and info.get("token"):
+            info["token"] = ""
+            self.save()
@@ -0,0 +1,188 @@
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional
+
+import aiohttp
+
+from . import error
+from .main import AList
+from .middleware import READ_PATHS  # 只读接口，可以路由到任意副本
+
+# 视为节点不可用的异常
+FAILOVER_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+
+class Replica:
+    """
+    AList副本节点
+
+    Attributes:
+        endpoint (str): 副本地址
+        latency (float): 平滑后的延迟(秒)
+        failures (int): 连续失败次数
+        down_until (float): 熔断截止时间(monotonic)
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.latency = 0.0
+        self.failures = 0
+        self.down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        """是否可用（未处于熔断期）"""
+        return time.monotonic() >= self.down_until
+
+    def record_success(self, elapsed: float, alpha: float = 0.3) -> None:
+        """记录一次成功请求"""
+        if self.latency == 0.0:
+            self.latency = elapsed
+        else:
+            self.latency = alpha * elapsed + (1 - alpha) * self.latency
+        self.failures = 0
+        self.down_until = 0.0
+
+    def record_failure(self, max_failures: int, cooldown: float) -> None:
+        """记录一次失败请求，连续失败达到阈值后熔断"""
+        self.failures += 1
+        if self.failures >= max_failures:
+            self.down_until = time.monotonic() + cooldown
+
+    def __repr__(self) -> str:
+        return f"<Replica {self.endpoint} latency={self.latency:.3f}s failures={self.failures}>"
+
+
+class AListCluster(AList):
+    """
+    多副本AList客户端
+
+    读请求路由到最健康、延迟最低的副本，连接失败时自动切换到下一个副本；
+    写请求固定发送到主节点。
+
+    Attributes:
+        replicas (List[Replica]): 所有副本
+        primary (Replica): 主节点
+    """
+
+    replicas: List[Replica]
+    primary: Replica
+
+    def __init__(
+        self,
+        endpoints: Iterable[str],
+        primary: Optional[str] = None,
+        proxy: Optional[str] = None,
+        probe_interval: float = 30.0,
+        max_failures: int = 3,
+        cooldown: float = 30.0,
+        **kwargs,
+    ):
+        """
+        初始化
+
+        Args:
+            endpoints (Iterable[str]): 所有副本的AList地址
+            primary (str): 主节点地址，默认为第一个地址
+            proxy (str): 代理地址
+            probe_interval (float): 主动健康检查间隔(秒)
+            max_failures (int): 连续失败多少次后熔断
+            cooldown (float): 熔断时长(秒)
+            **kwargs: 传递给 `AList` 的其他参数
+        """
+        endpoints = list(endpoints)
+        if not endpoints:
+            raise ValueError("至少需要一个AList地址")
+        primary = primary or endpoints[0]
+        if primary not in endpoints:
+            endpoints.insert(0, primary)
+
+        super().__init__(primary, proxy, **kwargs)
+
+        self.replicas = [Replica(ep) for ep in endpoints]
+        self.primary = self.replicas[endpoints.index(primary)]
+        self.probe_interval = probe_interval
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self._last_probe = 0.0
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def _candidates(self, method: str, path: str) -> List[Replica]:
+        # 写请求只发往主节点
+        if path not in READ_PATHS:
+            return [self.primary]
+        healthy = [r for r in self.replicas if r.available]
+        down = [r for r in self.replicas if not r.available]
+        healthy.sort(key=lambda r: (r.failures, r.latency))
+        # 全部熔断时仍按熔断到期先后尝试
+        down.sort(key=lambda r: r.down_until)
+        return healthy + down
+
+    def _pick_endpoint(self, method: str, path: str) -> str:
+        return self._candidates(method, path)[0].endpoint
+
+    def _maybe_probe(self) -> None:
+        if self.probe_interval <= 0:
+            return
+        if time.monotonic() - self._last_probe < self.probe_interval:
+            return
+        if self._probe_task is not None and not self._probe_task.done():
+            return
+        self._last_probe = time.monotonic()
+        self._probe_task = asyncio.ensure_future(self.check_health())
+
+    async def close(self) -> None:
+        """停止后台健康检查，并关闭客户端"""
+        task, self._probe_task = self._probe_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await super().close()
+
+    async def _dispatch(
+        self, method: str, path: str, headers: Optional[Dict] = None, **kwargs
+    ) -> Dict:
+        self._maybe_probe()
+        last_exc: Optional[BaseException] = None
+        for replica in self._candidates(method, path):
+            start = time.monotonic()
+            try:
+                r = await self._request_to(
+                    replica.endpoint, method, path, headers, **kwargs
+                )
+            except FAILOVER_ERRORS as e:
+                replica.record_failure(self.max_failures, self.cooldown)
+                if self.metrics is not None:
+                    self.metrics.observe_retry(method, path)
+                last_exc = e
+                continue
+            replica.record_success(time.monotonic() - start)
+            return r
+        raise error.ServerError(f"所有AList节点均不可用: {last_exc}")
+
+    async def _probe(self, replica: Replica) -> bool:
+        # 复用本客户端的请求路径（调度器、指标），不为每次探测新建客户端
+        start = time.monotonic()
+        try:
+            r = await self._request_to(
+                replica.endpoint, "GET", "/api/public/settings"
+            )
+            ok = r.get("code") == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            ok = False
+        if ok:
+            replica.record_success(time.monotonic() - start)
+        else:
+            replica.record_failure(self.max_failures, self.cooldown)
+        return ok
+
+    async def check_health(self) -> Dict[str, bool]:
+        """
+        并发检查所有副本的可用性（/api/public/settings）
+
+        Returns:
+            (Dict[str, bool]): 每个副本是否可用
+        """
+        self._last_probe = time.monotonic()
+        results = await asyncio.gather(*(self._probe(r) for r in self.replicas))
+        return {r.endpoint: ok for r, ok in zip(self.replicas, results)}
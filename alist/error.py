@@ -22,5 +22,39 @@ class ServerError(AListError):
     pass
 
 
+class IntegrityError(AListError):
+    """
+    文件校验错误（下载内容与服务器提供的摘要不一致）
+
+    Attributes:
+        path (str): 文件路径
+        algorithm (str): 摘要算法
+        expected (str): 服务器提供的摘要
+        actual (str): 实际计算的摘要
+    """
+
+    def __init__(self, path: str, algorithm: str, expected: str, actual: str):
+        super().__init__(f"{path} 的{algorithm}校验失败: 应为{expected}, 实际为{actual}")
+        self.path = path
+        self.algorithm = algorithm
+        self.expected = expected
+        self.actual = actual
+
+
+class TaskError(AListError):
+    """
+    任务失败或被取消
+
+    Attributes:
+        task (TaskHandle): 任务句柄
+    """
+
+    def __init__(self, task):
+        super().__init__(
+            f"任务 {task.type}/{task.id} 未成功完成(state={task.state}): {task.error}"
+        )
+        self.task = task
+
+
 class SecurityWarning(Warning):
     pass
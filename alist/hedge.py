@@ -0,0 +1,120 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class HedgePolicy:
+    """
+    对冲请求策略
+
+    对幂等请求，若在 `delay`（或观测到的分位延迟）内未返回，则再发出一个相同请求，
+    取先返回的结果并取消另一个。
+
+    Attributes:
+        delay (Optional[float]): 固定对冲延迟(秒)，为None时使用观测分位延迟
+        percentile (float): 自适应延迟使用的分位数
+        stats (Dict[str, int]): 统计信息（requests/hedged/hedge_wins）
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        percentile: float = 0.95,
+        window: int = 256,
+        min_samples: int = 20,
+        initial_delay: float = 0.5,
+    ):
+        """
+        初始化
+
+        Args:
+            delay (float): 固定对冲延迟(秒)，不指定时按观测分位延迟计算
+            percentile (float): 自适应延迟使用的分位数
+            window (int): 每个接口保留的延迟样本数
+            min_samples (int): 样本数不足时使用 `initial_delay`
+            initial_delay (float): 样本不足时的对冲延迟(秒)
+        """
+        if not 0 < percentile < 1:
+            raise ValueError("percentile 必须在 0 和 1 之间")
+        self.delay = delay
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0}
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, key: str, elapsed: float) -> None:
+        """记录一次请求延迟"""
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(elapsed)
+
+    def current_delay(self, key: str) -> float:
+        """获取当前对冲延迟"""
+        if self.delay is not None:
+            return self.delay
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return self.initial_delay
+        ordered = sorted(samples)
+        idx = min(len(ordered) - 1, int(len(ordered) * self.percentile))
+        return ordered[idx]
+
+    @property
+    def hedge_rate(self) -> float:
+        """发出对冲请求的比例"""
+        if not self.stats["requests"]:
+            return 0.0
+        return self.stats["hedged"] / self.stats["requests"]
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        以对冲方式执行请求
+
+        Args:
+            key (str): 延迟统计的分组键（一般为接口路径）
+            factory (Callable): 每次调用返回一个新的请求协程
+
+        Returns:
+            先成功返回的结果
+        """
+        self.stats["requests"] += 1
+        start = time.monotonic()
+        primary = asyncio.ensure_future(factory())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.current_delay(key))
+            if done:
+                result = primary.result()
+                self.observe(key, time.monotonic() - start)
+                return result
+
+            self.stats["hedged"] += 1
+            backup = asyncio.ensure_future(factory())
+            tasks.add(backup)
+            first_exc: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    exc = task.exception()
+                    if exc is not None:
+                        first_exc = first_exc or exc
+                        continue
+                    if task is backup:
+                        self.stats["hedge_wins"] += 1
+                    self.observe(key, time.monotonic() - start)
+                    return task.result()
+            raise first_exc  # type: ignore
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def __repr__(self) -> str:
+        return f"<HedgePolicy delay={self.delay} stats={self.stats}>"
@@ -0,0 +1,283 @@
+import posixpath
+import sqlite3
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional
+
+from . import error, utils
+
+if TYPE_CHECKING:
+    from .main import AList
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    modified TEXT
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE,
+    parent TEXT,
+    name TEXT,
+    size INTEGER,
+    modified REAL,
+    is_dir INTEGER,
+    type INTEGER
+);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries(parent);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    name, path, content='entries', content_rowid='id', tokenize='{tokenize}'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, name, path) VALUES (new.id, new.name, new.path);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, name, path)
+    VALUES ('delete', old.id, old.name, old.path);
+END;
+"""
+
+
+def _has_trigram() -> bool:
+    try:
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(a, tokenize='trigram')")
+        conn.close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+class LocalIndex:
+    """
+    远程目录树的本地全文索引（SQLite FTS5）
+
+    索引保存文件名、路径、大小、修改时间和类型，搜索完全在本地完成。
+    刷新时只重新列出修改时间发生变化的目录。
+
+    Attributes:
+        path (str): 数据库路径
+        root (str): 索引的根目录
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        初始化
+
+        Args:
+            path (str): SQLite数据库路径，默认使用内存数据库
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self.trigram = _has_trigram()
+        try:
+            self._conn.executescript(
+                _SCHEMA.format(tokenize="trigram" if self.trigram else "unicode61")
+            )
+        except sqlite3.OperationalError as e:
+            raise error.AListError(f"当前SQLite不支持FTS5: {e}")
+
+    @property
+    def root(self) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key='root'").fetchone()
+        return row[0] if row else None
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        """关闭数据库"""
+        self._conn.close()
+
+    def _remove_subtree(self, path: str) -> None:
+        prefix = path.rstrip("/") + "/"
+        n = len(prefix)
+        self._conn.execute(
+            "DELETE FROM entries WHERE substr(path, 1, ?) = ?", (n, prefix)
+        )
+        self._conn.execute("DELETE FROM dirs WHERE substr(path, 1, ?) = ?", (n, prefix))
+        self._conn.execute("DELETE FROM dirs WHERE path = ?", (path,))
+
+    def _replace_children(self, parent: str, content: List[Mapping[str, Any]]) -> None:
+        old_dirs = {
+            row[0]
+            for row in self._conn.execute(
+                "SELECT path FROM entries WHERE parent = ? AND is_dir = 1", (parent,)
+            )
+        }
+        self._conn.execute("DELETE FROM entries WHERE parent = ?", (parent,))
+        rows = []
+        new_dirs = set()
+        for item in content:
+            path = posixpath.join(parent, item["name"])
+            if item["is_dir"]:
+                new_dirs.add(path)
+            rows.append(
+                (
+                    path,
+                    parent,
+                    item["name"],
+                    item.get("size", 0),
+                    utils.parse_time(item.get("modified", "")),
+                    int(bool(item["is_dir"])),
+                    item.get("type", 0),
+                )
+            )
+        self._conn.executemany(
+            "INSERT INTO entries(path, parent, name, size, modified, is_dir, type) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        for path in old_dirs - new_dirs:
+            self._remove_subtree(path)
+
+    async def update(
+        self,
+        client: "AList",
+        root: Optional[str] = None,
+        concurrency: int = 8,
+        password: str = "",
+        full: bool = False,
+    ) -> int:
+        """
+        构建或增量刷新索引
+
+        Args:
+            client (AList): AList客户端
+            root (str): 索引的根目录，默认为上次使用的根目录或 `/`
+            concurrency (int): 并发列目录数
+            password (str): 目录密码
+            full (bool): 是否重新列出所有目录
+
+        Returns:
+            (int): 本次列出的目录数
+        """
+        root = root or self.root or "/"
+        if root != self.root:
+            full = True
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM dirs")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('root', ?)", (root,)
+            )
+
+        known: Dict[str, str] = dict(self._conn.execute("SELECT path, modified FROM dirs"))
+        # AList不会向上传递目录的修改时间，含子目录的目录必须重新列出，
+        # 才能得到子目录最新的修改时间
+        has_subdirs = {
+            row[0]
+            for row in self._conn.execute(
+                "SELECT DISTINCT parent FROM entries WHERE is_dir = 1"
+            )
+        }
+        seen: Dict[str, str] = {}
+
+        def descend(path: str, item: Mapping[str, Any]) -> bool:
+            modified = item.get("modified", "")
+            seen[path] = modified
+            return (
+                full
+                or known.get(path) != modified
+                or not modified
+                or path in has_subdirs
+            )
+
+        listed = 0
+        try:
+            async for path, data in client._walk(root, concurrency, password, descend=descend):
+                self._replace_children(path, data["content"] or [])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO dirs(path, modified) VALUES (?, ?)",
+                    (path, seen.get(path, "")),
+                )
+                listed += 1
+        finally:
+            self._conn.commit()
+        return listed
+
+    def search(
+        self,
+        query: str = "",
+        filter: Optional[utils.EntryFilter] = None,
+        limit: Optional[int] = 100,
+    ) -> List[utils.ToClass]:
+        """
+        在本地索引中搜索
+
+        Args:
+            query (str): 关键词，多个关键词以空格分隔，需全部匹配文件名或路径
+            filter (EntryFilter): 过滤条件
+            limit (int): 最多返回的结果数
+
+        Returns:
+            (List[ToClass]): 搜索结果
+        """
+        where: List[str] = []
+        params: List[Any] = []
+        terms = query.split()
+        fts_terms = []
+        for term in terms:
+            if self.trigram and len(term) < 3:
+                # trigram分词无法匹配少于3个字符的关键词
+                where.append("instr(lower(e.path), lower(?)) > 0")
+                params.append(term)
+            else:
+                fts_terms.append('"' + term.replace('"', '""') + '"')
+        if fts_terms:
+            where.append(
+                "e.id IN (SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?)"
+            )
+            params.append(" ".join(fts_terms))
+
+        if filter is not None:
+            if filter.min_size is not None:
+                where.append("e.size >= ?")
+                params.append(filter.min_size)
+            if filter.max_size is not None:
+                where.append("e.size <= ?")
+                params.append(filter.max_size)
+            if filter.is_dir is not None:
+                where.append("e.is_dir = ?")
+                params.append(int(filter.is_dir))
+            if filter.types is not None:
+                where.append(f"e.type IN ({','.join('?' * len(filter.types))})")
+                params.extend(filter.types)
+            if filter.modified_after is not None:
+                where.append("e.modified >= ?")
+                params.append(filter.modified_after)
+            if filter.modified_before is not None:
+                where.append("e.modified <= ?")
+                params.append(filter.modified_before)
+            if filter.glob is not None:
+                column = "e.path" if "/" in filter.glob else "e.name"
+                where.append(f"{column} GLOB ?")
+                params.append(filter.glob)
+
+        sql = "SELECT e.path, e.name, e.size, e.modified, e.is_dir, e.type FROM entries e"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY e.path"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        return [
+            utils.ToClass(
+                {
+                    "path": path,
+                    "name": name,
+                    "size": size,
+                    "modified": modified,
+                    "is_dir": bool(is_dir),
+                    "type": type_,
+                }
+            )
+            for path, name, size, modified, is_dir, type_ in self._conn.execute(
+                sql, params
+            )
+        ]
+
+    def __repr__(self) -> str:
+        return f"<LocalIndex {self.path} entries={len(self)}>"
@@ -1,12 +1,47 @@
+import asyncio
+import fnmatch
+import functools
+import hashlib
 import os
+import posixpath
 import sys
-from platform import platform
-from typing import AsyncGenerator, BinaryIO, Dict, Optional, Union
-from urllib.parse import quote, urljoin
-
+import time
+from contextlib import AsyncExitStack, asynccontextmanager, nullcontext
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from urllib.parse import quote, urljoin, urlsplit
+
+import aiofiles
 import aiohttp
 
 from . import error, model, utils
+from .cache import ContentCache
+from .hedge import HedgePolicy
+from .index import LocalIndex
+from .metrics import Metrics, body_size
+from .middleware import Handler, Middleware, Request, compose
+from .scheduler import RequestScheduler, classify, request_class
+from .task import TaskHandle, TaskPoller
+from .token import TokenStore
+from .tracing import RequestTracer
+
+if TYPE_CHECKING:
+    from .watch import WatchEvent
 
 try:
     import ujson as json
@@ -19,6 +54,44 @@ Paths = Union[File, Folder]
 ALFS = Union[model.AListFile, model.AListFolder]
 
 
+@functools.lru_cache(maxsize=None)
+def _user_agent() -> str:
+    # platform() 需要读取系统信息，每个进程只构建一次UA
+    from platform import platform
+
+    ver = ".".join(
+        [
+            str(sys.version_info.major),
+            str(sys.version_info.minor),
+            str(sys.version_info.micro),
+        ]
+    )
+    pf = platform().split("-")
+    return f"AListSDK/1.4.1 (Python{ver};{pf[3]}) {pf[0]}/{pf[1]}"
+
+
+async def _iter_file(
+    path: str, chunker: utils.AdaptiveChunker, stats: utils.TransferStats
+) -> AsyncGenerator[bytes, None]:
+    # 按自适应块大小读取本地文件，两次产出之间的时间即为发送耗时
+    async with aiofiles.open(path, "rb") as f:
+        last = time.monotonic()
+        while True:
+            chunk = await f.read(chunker.size)
+            if not chunk:
+                break
+            stats.read_chunk_size = stats.write_chunk_size = chunker.size
+            yield chunk
+            now = time.monotonic()
+            chunker.update(len(chunk), now - last)
+            stats.bytes += len(chunk)
+            last = now
+
+
+def _has_magic(segment: str) -> bool:
+    return any(c in segment for c in "*?[")
+
+
 class AList:
     """
     AList的SDK，此为主类。
@@ -33,13 +106,38 @@ class AList:
     headers: Dict[str, Optional[str]]
     token: str
     proxy_url: Optional[str]
-
-    def __init__(self, endpoint: str, proxy: Optional[str] = None):
+    hedge: Optional[HedgePolicy]
+    scheduler: Optional[RequestScheduler]
+    local_index: Optional[LocalIndex]
+    cache: Optional[ContentCache]
+    metrics: Optional[Metrics]
+    tracer: Optional[RequestTracer]
+    task_poller: TaskPoller
+
+    def __init__(
+        self,
+        endpoint: str,
+        proxy: Optional[str] = None,
+        hedge: Optional[HedgePolicy] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        cache: Optional[ContentCache] = None,
+        metrics: Optional[Metrics] = None,
+        tracer: Optional[RequestTracer] = None,
+        local_hasher: Optional[utils.LocalHasher] = None,
+    ):
         """
         初始化
 
         Args:
             endpoint (str): AList地址
+            proxy (str): 代理地址
+            hedge (HedgePolicy): 幂等请求的对冲策略，为None时不启用
+            scheduler (RequestScheduler): 请求调度器，为None时不限制并发
+            cache (ContentCache): 文件内容缓存，为None时不缓存
+            metrics (Metrics): 请求与传输指标，为None时不统计
+            tracer (RequestTracer): 请求追踪，为None时不追踪
+            local_hasher (LocalHasher): 本地文件摘要计算器，为None时在首次使用时创建
+                （由客户端创建的会在 `close` 时关闭）
         """
         if endpoint.startswith("http://") or endpoint.startswith("https://"):
             pass
@@ -49,38 +147,239 @@ class AList:
         self.endpoint = endpoint  # alist地址
         self.proxy_url = proxy
         self.token = ""  # JWT Token
-
-        # 构建UA
-        ver = ".".join(
-            [
-                str(sys.version_info.major),
-                str(sys.version_info.minor),
-                str(sys.version_info.micro),
-            ]
-        )
-        pf = platform().split("-")
+        self.hedge = hedge
+        self.scheduler = scheduler
+        self.local_index = None
+        self.cache = cache
+        self.metrics = metrics
+        self.tracer = tracer
+        self.middlewares: List[Middleware] = []
+        self._chain: Optional[Handler] = None
+        self._local_hasher = local_hasher
+        self._owns_hasher = False
+        self.task_poller = TaskPoller(self)
+        if metrics is not None:
+            if cache is not None:
+                metrics.add_collector(
+                    "cache",
+                    lambda: {"hits": cache.hits, "misses": cache.misses, "bytes": cache.total},
+                    types={"hits": "counter", "misses": "counter"},
+                )
+            if hedge is not None:
+                metrics.add_collector(
+                    "hedge",
+                    lambda: hedge.stats,
+                    types=dict.fromkeys(hedge.stats, "counter"),
+                )
+        if tracer is not None:
+            tracer.instrument(self)
 
         self.headers = {
-            "User-Agent": f"AListSDK/1.4.1 (Python{ver};{pf[3]}) {pf[0]}/{pf[1]}",
+            "User-Agent": _user_agent(),
             "Content-Type": "application/json",
             "Authorization": "",
         }
 
+    @property
+    def local_hasher(self) -> utils.LocalHasher:
+        """本地文件摘要计算器"""
+        if self._local_hasher is None:
+            self._local_hasher = utils.LocalHasher()
+            self._owns_hasher = True
+        return self._local_hasher
+
+    async def close(self) -> None:
+        """停止任务轮询，关闭客户端创建的摘要计算进程池"""
+        await self.task_poller.close()
+        if self._owns_hasher and self._local_hasher is not None:
+            self._local_hasher.close()
+            self._local_hasher = None
+            self._owns_hasher = False
+
+    async def __aenter__(self) -> "AList":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
     def _isBadRequest(self, r: Dict, msg: str) -> None:
         # 是否为不好的请求
         if r["code"] != 200:
             raise error.ServerError(f"{msg}: {r['message']}")
 
+    def use(self, *middlewares: Middleware) -> None:
+        """
+        注册请求中间件
+
+        中间件是 `async def middleware(request, next)` 形式的可调用对象，
+        调用 `await next(request)` 将请求交给下一层并返回响应的JSON。
+        先注册的中间件在外层：最先看到请求，最后看到响应。
+        对冲请求的每一路都会各自经过中间件；集群的节点选择和故障转移、调度器的并发控制
+        在所有中间件之内进行。未注册中间件时请求不经过任何额外调用。
+        流式请求（如流式列目录和文件下载）不经过中间件。
+
+        Args:
+            *middlewares (Middleware): 中间件
+        """
+        self.middlewares.extend(middlewares)
+        self._chain = compose(self.middlewares, self._dispatch_request)
+
+    def _dispatch_request(self, request: Request) -> Any:
+        return self._dispatch(request.method, request.path, request.headers, **request.kwargs)
+
     async def _request(
         self, method: str, path: str, headers: Optional[Dict] = None, **kwargs
     ) -> Dict:
-        url = urljoin(self.endpoint, path)
+        if self._chain is None:
+            return await self._dispatch(method, path, headers, **kwargs)
+        request = Request(self, method, path, headers or self.headers, kwargs)
+        return await self._chain(request)
+
+    async def _dispatch(
+        self, method: str, path: str, headers: Optional[Dict] = None, **kwargs
+    ) -> Dict:
+        # 中间件之后的实际发送，集群客户端在此选择节点
+        return await self._request_to(self.endpoint, method, path, headers, **kwargs)
+
+    def _pick_endpoint(self, method: str, path: str) -> str:
+        # 流式请求使用的AList地址
+        return self.endpoint
+
+    @asynccontextmanager
+    async def _request_stream(
+        self, method: str, path: str, headers: Optional[Dict] = None, **kwargs
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        # 返回未读取的响应，由调用方流式读取响应体
+        url = urljoin(self._pick_endpoint(method, path), path)
+        if headers is None:
+            headers = self.headers
+        async with AsyncExitStack() as stack:
+            if self.scheduler is not None:
+                await stack.enter_async_context(self.scheduler.slot(classify(path)))
+            if self.tracer is None:
+                session = await stack.enter_async_context(
+                    aiohttp.ClientSession(proxy=self.proxy_url)
+                )
+                response = await stack.enter_async_context(
+                    session.request(method, url, headers=headers, **kwargs)  # type: ignore
+                )
+                yield response
+                return
+
+            tracer = self.tracer
+            span = stack.enter_context(tracer.span(f"{method} {path}"))
+            timing = tracer.start(method, url)
+            session = await stack.enter_async_context(
+                aiohttp.ClientSession(
+                    proxy=self.proxy_url, trace_configs=[tracer.trace_config]
+                )
+            )
+            status: Any = None
+            try:
+                response = await stack.enter_async_context(
+                    session.request(method, url, headers=headers, trace_request_ctx=timing, **kwargs)  # type: ignore
+                )
+                status = response.status
+                yield response
+            except BaseException as e:
+                status = type(e).__name__
+                raise
+            finally:
+                tracer.finish(timing, status, span)
+
+    async def _request_to(
+        self,
+        endpoint: str,
+        method: str,
+        path: str,
+        headers: Optional[Dict] = None,
+        **kwargs,
+    ) -> Dict:
+        # 向指定的AList地址发送请求
+        url = urljoin(endpoint, path)
         if headers is None:
             headers = self.headers
+        if self.scheduler is None:
+            return await self._send(method, url, headers, **kwargs)
+        async with self.scheduler.slot(classify(path)):
+            return await self._send(method, url, headers, **kwargs)
+
+    async def _send(self, method: str, url: str, headers: Dict, **kwargs) -> Dict:
+        if self.metrics is not None or self.tracer is not None:
+            return await self._send_instrumented(method, url, headers, **kwargs)
         async with aiohttp.ClientSession(proxy=self.proxy_url) as session:
             async with session.request(method, url, headers=headers, **kwargs) as response:  # type: ignore
                 return await response.json()
 
+    async def _send_instrumented(
+        self, method: str, url: str, headers: Dict, **kwargs
+    ) -> Dict:
+        # 与_send相同，同时记录指标和追踪信息
+        metrics, tracer = self.metrics, self.tracer
+        path = urlsplit(url).path
+        sent = body_size(kwargs.get("data"), headers) if metrics is not None else 0
+        received = 0
+        code: Any = None
+        session_kwargs: Dict[str, Any] = {"proxy": self.proxy_url}
+        timing = None
+        start = time.perf_counter()
+        span_cm = nullcontext() if tracer is None else tracer.span(f"{method} {path}")
+        with span_cm as span:
+            if tracer is not None:
+                timing = tracer.start(method, url)
+                session_kwargs["trace_configs"] = [tracer.trace_config]
+                kwargs["trace_request_ctx"] = timing
+            try:
+                async with aiohttp.ClientSession(**session_kwargs) as session:
+                    async with session.request(method, url, headers=headers, **kwargs) as response:  # type: ignore
+                        received = len(await response.read())
+                        r = await response.json()
+                code = r.get("code") if isinstance(r, dict) else None
+                return r
+            except BaseException as e:
+                code = type(e).__name__
+                raise
+            finally:
+                if metrics is not None:
+                    metrics.observe_request(
+                        method, path, code, time.perf_counter() - start, sent, received
+                    )
+                if timing is not None:
+                    tracer.finish(timing, code, span)  # type: ignore
+
+    @staticmethod
+    def priority(cls: str):
+        """
+        为上下文中的请求指定流量类别
+
+        Args:
+            cls (str): interactive(交互) / bulk(批量) / admin(管理)
+
+        Example:
+            ```python
+            with client.priority("bulk"):
+                await client.upload("/a.bin", "a.bin")
+            ```
+        """
+        return request_class(cls)
+
+    async def _idempotent_request(
+        self, method: str, path: str, headers: Optional[Dict] = None, **kwargs
+    ) -> Dict:
+        # 幂等请求，启用对冲策略时可能发出重复请求
+        if self.hedge is None:
+            return await self._request(method, path, headers, **kwargs)
+        calls = 0
+
+        def request():
+            nonlocal calls
+            calls += 1
+            if calls > 1 and self.metrics is not None:
+                self.metrics.observe_retry(method, path)
+            return self._request(method, path, headers, **kwargs)
+
+        return await self.hedge.run(path, request)
+
     async def test(self) -> bool:
         """
         测试服务器可用性
@@ -100,17 +399,31 @@ class AList:
             return True
         return False
 
-    async def login(self, user: utils.AListUser, otp_code: str = "") -> bool:
+    async def login(
+        self,
+        user: utils.AListUser,
+        otp_code: str = "",
+        store: Optional[TokenStore] = None,
+    ) -> bool:
         """
         登录
 
         Args:
             user (AListUser): AList用户
             otp_code (str): OTP验证码
+            store (TokenStore): Token存储，其中有未过期的Token时不再请求服务器，
+                登录成功后保存新的Token
 
         Returns:
             (bool): 是否成功
         """
+        if store is not None:
+            token = store.get(self.endpoint, user.un)
+            if token:
+                self.token = token
+                self.headers["Authorization"] = token
+                return True
+
         password = user.pwd
         username = user.un
 
@@ -125,6 +438,8 @@ class AList:
         # 保存
         self.token = res["data"]["token"]
         self.headers["Authorization"] = f"{self.token}"
+        if store is not None:
+            store.set(self.endpoint, user.un, self.token)
         return True
 
     async def search_file(
@@ -145,10 +460,149 @@ class AList:
             "password": password,
             "keywords": keywords,
         }
-        r = await self._request("POST", url, data=json.dumps(utils.clear_dict(data)))
+        r = await self._idempotent_request(
+            "POST", url, data=json.dumps(utils.clear_dict(data))
+        )
         self._isBadRequest(r, "文件搜索失败")
         return utils.ToClass(r).data
 
+    async def iter_search(
+        self,
+        keywords,
+        parent: str = "/",
+        scope: int = 0,
+        per_page: int = 100,
+        limit: Optional[int] = None,
+        password: str = "",
+        prefetch: int = 1,
+        filter: Optional[utils.EntryFilter] = None,
+    ) -> AsyncGenerator[utils.ToClass, None]:
+        """
+        自动翻页的流式搜索
+
+        在处理当前页时预取后续页面，并在客户端按 `filter` 过滤结果，
+        取得 `limit` 条结果后立即停止。
+
+        Args:
+            keywords (str): 关键词
+            parent (str): 搜索的目录
+            scope (int): 0-全部 1-文件夹 2-文件
+            per_page (int): 每页数量
+            limit (int): 最多返回的结果数
+            password (str): 目录密码
+            prefetch (int): 预取的页数
+            filter (EntryFilter): 客户端过滤器
+
+        Returns:
+            (AsyncGenerator[utils.ToClass, None]): 搜索结果（含 `path` 字段）
+        """
+        if limit is not None and limit <= 0:
+            return
+
+        async def fetch(page: int) -> Dict:
+            data = {
+                "parent": parent,
+                "scope": scope,
+                "page": page,
+                "per_page": per_page,
+                "password": password,
+                "keywords": keywords,
+            }
+            r = await self._idempotent_request(
+                "POST", "/api/fs/search", data=json.dumps(data)
+            )
+            self._isBadRequest(r, "文件搜索失败")
+            return r["data"]
+
+        pending: List[asyncio.Future] = [asyncio.ensure_future(fetch(1))]
+        next_page = 2
+        count = 0
+        try:
+            while pending:
+                data = await pending.pop(0)
+                content = data["content"] or []
+                total = data.get("total", 0)
+                while len(pending) < max(1, prefetch) and (next_page - 1) * per_page < total:
+                    pending.append(asyncio.ensure_future(fetch(next_page)))
+                    next_page += 1
+
+                for item in content:
+                    path = posixpath.join(item.get("parent", parent), item["name"])
+                    if filter is not None and not filter(item, path):
+                        continue
+                    yield utils.ToClass({**item, "path": path})
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+                if not content:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def build_local_index(
+        self,
+        root: str = "/",
+        path: str = ":memory:",
+        concurrency: int = 8,
+        password: str = "",
+    ) -> LocalIndex:
+        """
+        遍历远程目录树并建立本地全文索引
+
+        Args:
+            root (str): 索引的根目录
+            path (str): SQLite数据库路径，已存在时在原有索引上增量刷新
+            concurrency (int): 并发列目录数
+            password (str): 目录密码
+
+        Returns:
+            (LocalIndex): 本地索引
+        """
+        index = LocalIndex(path)
+        await index.update(self, root, concurrency, password)
+        self.local_index = index
+        return index
+
+    async def refresh_local_index(self, concurrency: int = 8, password: str = "") -> int:
+        """
+        增量刷新本地索引
+
+        只重新列出修改时间变化的目录和包含子目录的目录：AList不会向上传递目录的
+        修改时间，深层目录的变化只能通过重新列出其父目录发现。
+
+        Args:
+            concurrency (int): 并发列目录数
+            password (str): 目录密码
+
+        Returns:
+            (int): 重新列出的目录数
+        """
+        if self.local_index is None:
+            raise error.AListError("尚未建立本地索引")
+        return await self.local_index.update(self, None, concurrency, password)
+
+    def local_search(
+        self,
+        query: str = "",
+        filter: Optional[utils.EntryFilter] = None,
+        limit: Optional[int] = 100,
+    ) -> List[utils.ToClass]:
+        """
+        在本地索引中搜索（不访问服务器）
+
+        Args:
+            query (str): 关键词
+            filter (EntryFilter): 过滤条件
+            limit (int): 最多返回的结果数
+
+        Returns:
+            (List[ToClass]): 搜索结果
+        """
+        if self.local_index is None:
+            raise error.AListError("尚未建立本地索引")
+        return self.local_index.search(query, filter, limit)
+
     async def user_info(self) -> utils.ToClass:
         """
         获取当前登录的用户的信息
@@ -156,7 +610,7 @@ class AList:
         Returns:
             (ToClass): 一个字典，包含了当前用户的信息。
         """
-        r = await self._request("GET", "/api/me")
+        r = await self._idempotent_request("GET", "/api/me")
         return utils.ToClass(r).data
 
     async def list_dir(
@@ -166,6 +620,7 @@ class AList:
         per_page: int = 50,
         refresh: bool = False,
         password: str = "",
+        stream: bool = False,
     ) -> AsyncGenerator[utils.ToClass, None]:
         """
         列出指定目录下的所有文件或文件夹。
@@ -176,6 +631,8 @@ class AList:
             per_page (int): 每页的数量
             refresh (bool): 是否强制刷新
             password (str): 目录密码
+            stream (bool): 是否流式解析响应，适用于 `per_page` 很大的情况，
+                首个条目的返回时间和内存占用不随页大小增长
 
         Returns:
             (Generator[utils.ToClass, None, None]): 指定目录下的文件
@@ -189,7 +646,24 @@ class AList:
                 "refresh": refresh,
             }
         )
-        r = await self._request("POST", "/api/fs/list", data=data)
+        if stream:
+            async with self._request_stream("POST", "/api/fs/list", data=data) as resp:
+                items = utils.JsonArrayStream(
+                    resp.content.iter_any(), ("data", "content")
+                )
+                await items.seek()
+                if "code" in items.header:
+                    self._isBadRequest(items.header, "获取失败")
+                async for item in items:
+                    yield utils.ToClass(
+                        {
+                            "path": os.path.join(str(path), item["name"]),
+                            "is_dir": item["is_dir"],
+                        }
+                    )
+            return
+
+        r = await self._idempotent_request("POST", "/api/fs/list", data=data)
         self._isBadRequest(r, "获取失败")
 
         for item in r["data"]["content"]:
@@ -212,12 +686,454 @@ class AList:
             (AListFile): AList文件对象
         """
         data = json.dumps({"path": str(path), "password": password})
-        rjson = await self._request("POST", "/api/fs/get", data=data)
+        rjson = await self._idempotent_request("POST", "/api/fs/get", data=data)
+        self._isBadRequest(rjson, "获取失败")
 
         if rjson["data"]["is_dir"]:
             return model.AListFolder(str(path), rjson["data"])
-        else:
-            return model.AListFile(str(path), rjson["data"])
+        return self._attach(model.AListFile(str(path), rjson["data"]))
+
+    def _attach(self, f: model.AListFile) -> model.AListFile:
+        # 为客户端创建的文件对象启用缓存和指标
+        if self.cache is not None:
+            f.use_cache(self.cache, self.endpoint)
+        f.metrics = self.metrics
+        f.tracer = self.tracer
+        return f
+
+    async def _get_raw(self, path: str, password: str = "") -> Optional[Dict]:
+        # 获取单个条目的原始数据，不存在时返回None，其他错误抛出异常
+        data = json.dumps({"path": path, "password": password})
+        r = await self._idempotent_request("POST", "/api/fs/get", data=data)
+        if r["code"] == 404 or (
+            r["code"] == 500 and "not found" in str(r.get("message", "")).lower()
+        ):
+            return None
+        self._isBadRequest(r, "获取失败")
+        return r["data"]
+
+    def _fetch_grouped(
+        self,
+        paths: Iterable[str],
+        fetch: Callable[[str], Awaitable[Any]],
+        found: Callable[[str, Dict, Dict], Any],
+        password: str = "",
+        concurrency: int = 8,
+        sibling_threshold: int = 4,
+    ) -> List["asyncio.Future[List[Tuple[str, Any]]]"]:
+        """
+        批量获取路径信息，同目录路径较多时改为列出父目录
+
+        Args:
+            paths (Iterable[str]): 路径列表（已去重）
+            fetch (Callable): 单独获取一个路径，返回结果
+            found (Callable): 由 (父目录, 列表条目, 列表数据) 生成结果
+            password (str): 密码
+            concurrency (int): 最大并发请求数
+            sibling_threshold (int): 同目录路径数达到该值时改为列出父目录
+
+        Returns:
+            (List[asyncio.Future]): 每个任务返回 (路径, 结果) 列表
+        """
+        groups: Dict[str, List[str]] = {}
+        for p in paths:
+            groups.setdefault(posixpath.dirname(p.rstrip("/")), []).append(p)
+        sem = asyncio.Semaphore(concurrency)
+
+        async def by_get(path: str) -> List[Tuple[str, Any]]:
+            async with sem:
+                return [(path, await fetch(path))]
+
+        async def by_list(parent: str, members: List[str]) -> List[Tuple[str, Any]]:
+            async with sem:
+                try:
+                    data = await self._list_raw(parent, password)
+                except error.ServerError:
+                    data = {"content": []}
+            items = {item["name"]: item for item in data["content"] or []}
+            result = []
+            missing = []
+            for p in members:
+                item = items.get(posixpath.basename(p.rstrip("/")))
+                if item is None:
+                    missing.append(p)
+                else:
+                    result.append((p, found(parent, item, data)))
+            # 列表中没有的条目（如隐藏文件）回退为单独获取
+            for entries in await asyncio.gather(*(by_get(p) for p in missing)):
+                result.extend(entries)
+            return result
+
+        tasks = []
+        for parent, members in groups.items():
+            if parent and len(members) >= sibling_threshold:
+                tasks.append(asyncio.ensure_future(by_list(parent, members)))
+            else:
+                tasks.extend(asyncio.ensure_future(by_get(p)) for p in members)
+        return tasks
+
+    async def _get_raw_many(
+        self,
+        paths: Iterable[str],
+        password: str = "",
+        concurrency: int = 8,
+        sibling_threshold: int = 4,
+    ) -> Dict[str, Optional[Dict]]:
+        # 批量获取原始数据
+        tasks = self._fetch_grouped(
+            dict.fromkeys(paths),
+            lambda p: self._get_raw(p, password),
+            lambda parent, item, data: item,
+            password,
+            concurrency,
+            sibling_threshold,
+        )
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return {p: item for entries in results for p, item in entries}
+
+    async def _list_raw(
+        self,
+        path: Folder,
+        password: str = "",
+        refresh: bool = False,
+        page: int = 1,
+        per_page: int = 0,
+    ) -> Dict:
+        # 获取目录的原始列表数据，per_page为0时返回全部
+        data = json.dumps(
+            {
+                "path": str(path),
+                "password": password,
+                "page": page,
+                "per_page": per_page,
+                "refresh": refresh,
+            }
+        )
+        r = await self._idempotent_request("POST", "/api/fs/list", data=data)
+        self._isBadRequest(r, "获取失败")
+        return r["data"]
+
+    async def _dirs_raw(
+        self, path: Folder, password: str = "", force_root: bool = False
+    ) -> List[Dict]:
+        # 获取目录下的子文件夹（不含文件）
+        data = json.dumps(
+            {"path": str(path), "password": password, "force_root": force_root}
+        )
+        r = await self._idempotent_request("POST", "/api/fs/dirs", data=data)
+        self._isBadRequest(r, "获取文件夹失败")
+        return [{**item, "is_dir": True} for item in r["data"] or []]
+
+    async def list_folders(
+        self, path: Folder, password: str = "", force_root: bool = False
+    ) -> AsyncGenerator[utils.ToClass, None]:
+        """
+        列出指定目录下的子文件夹（`/api/fs/dirs`，不返回文件）
+
+        Args:
+            path (str, AListFolder): 需要列出的目录
+            password (str): 目录密码
+            force_root (bool): 是否以根目录为基准
+
+        Returns:
+            (AsyncGenerator[utils.ToClass, None]): 子文件夹（含 `path`、`name`、`modified`）
+        """
+        for item in await self._dirs_raw(path, password, force_root):
+            yield utils.ToClass(
+                {**item, "path": posixpath.join(str(path), item["name"])}
+            )
+
+    async def walk_dirs(
+        self, root: Folder = "/", concurrency: int = 8, password: str = ""
+    ) -> AsyncGenerator[utils.ToClass, None]:
+        """
+        并发遍历文件夹树（只传输文件夹，不传输文件条目）
+
+        Args:
+            root (str, AListFolder): 根目录
+            concurrency (int): 最大并发请求数
+            password (str): 目录密码
+
+        Returns:
+            (AsyncGenerator[utils.ToClass, None]): 根目录下的所有文件夹（含 `path`、`name`、`modified`）
+        """
+        async for path, data in self._walk(
+            str(root), concurrency, password, dirs_only=True
+        ):
+            for item in data["content"]:
+                yield utils.ToClass({**item, "path": posixpath.join(path, item["name"])})
+
+    async def _walk(
+        self,
+        root: str = "/",
+        concurrency: int = 8,
+        password: str = "",
+        refresh: bool = False,
+        descend: Optional[Callable[[str, Mapping[str, Any]], bool]] = None,
+        dirs_only: bool = False,
+    ) -> AsyncGenerator[Tuple[str, Dict], None]:
+        # 并发遍历目录树，按完成顺序返回 (目录, 列表数据)
+        # descend(子目录路径, 条目) 返回False时不进入该子目录
+        # dirs_only为True时使用 /api/fs/dirs，只获取文件夹
+        queue: asyncio.Queue = asyncio.Queue()
+        results: asyncio.Queue = asyncio.Queue()
+        done = object()
+        queue.put_nowait(root)
+
+        async def worker():
+            while True:
+                path = await queue.get()
+                try:
+                    if dirs_only:
+                        data = {"content": await self._dirs_raw(path, password)}
+                    else:
+                        data = await self._list_raw(path, password, refresh)
+                    for item in data["content"] or []:
+                        if not item["is_dir"]:
+                            continue
+                        child = posixpath.join(path, item["name"])
+                        if descend is None or descend(child, item):
+                            queue.put_nowait(child)
+                    results.put_nowait((path, data))
+                except Exception as e:
+                    results.put_nowait(e)
+                finally:
+                    queue.task_done()
+
+        async def finish():
+            await queue.join()
+            results.put_nowait(done)
+
+        tasks = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        tasks.append(asyncio.ensure_future(finish()))
+        try:
+            while True:
+                result = await results.get()
+                if result is done:
+                    break
+                if isinstance(result, Exception):
+                    raise result
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def iglob(
+        self, pattern: str, concurrency: int = 8, password: str = ""
+    ) -> AsyncGenerator[str, None]:
+        """
+        按通配符查找路径（按完成顺序返回）
+
+        只进入仍可能匹配的目录：连续的普通路径段直接拼接，最后一段为普通路径时
+        在已列出的父目录中查找，父目录未列出时使用 `/api/fs/get` 检查是否存在，
+        需要列出的目录并发获取。
+        支持 `*`、`?`、`[...]` 以及匹配任意层目录的 `**`。
+
+        Args:
+            pattern (str): 通配符，如 `/media/**/S0?E*.mkv`
+            concurrency (int): 最大并发请求数
+            password (str): 目录密码
+
+        Returns:
+            (AsyncGenerator[str, None]): 匹配的路径
+        """
+        parts = [p for p in pattern.split("/") if p]
+        sem = asyncio.Semaphore(concurrency)
+        listings: Dict[str, asyncio.Future] = {}
+        results: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def fetch(path: str) -> List[Dict]:
+            async with sem:
+                try:
+                    return (await self._list_raw(path, password))["content"] or []
+                except error.ServerError:
+                    return []
+
+        async def listing(path: str) -> List[Dict]:
+            # 同一次查找中每个目录只列出一次
+            if path not in listings:
+                listings[path] = asyncio.ensure_future(fetch(path))
+            return await listings[path]
+
+        async def match(path: str, i: int) -> None:
+            while i < len(parts) and not _has_magic(parts[i]):
+                path = posixpath.join(path, parts[i])
+                i += 1
+            if i == len(parts):
+                parent = posixpath.dirname(path)
+                if parent in listings:
+                    # 父目录已经列出（如展开 ** 时），直接在列表中查找
+                    name = posixpath.basename(path)
+                    if not any(item["name"] == name for item in await listings[parent]):
+                        return
+                else:
+                    async with sem:
+                        try:
+                            await self.open(path, password)
+                        except error.ServerError:
+                            return
+                results.put_nowait(path)
+                return
+
+            seg = parts[i]
+            last = i == len(parts) - 1
+            subs = []
+            content = await listing(path)
+            if seg == "**":
+                if not last:
+                    subs.append(match(path, i + 1))
+                for item in content:
+                    child = posixpath.join(path, item["name"])
+                    if last:
+                        results.put_nowait(child)
+                    if item["is_dir"]:
+                        subs.append(match(child, i))
+            else:
+                for item in content:
+                    if not fnmatch.fnmatchcase(item["name"], seg):
+                        continue
+                    child = posixpath.join(path, item["name"])
+                    if last:
+                        results.put_nowait(child)
+                    elif item["is_dir"]:
+                        subs.append(match(child, i + 1))
+            await asyncio.gather(*subs)
+
+        main = asyncio.ensure_future(match("/", 0))
+        main.add_done_callback(lambda _: results.put_nowait(done))
+        seen = set()
+        try:
+            while True:
+                path = await results.get()
+                if path is done:
+                    break
+                if path not in seen:
+                    seen.add(path)
+                    yield path
+            main.result()
+        finally:
+            main.cancel()
+            for fut in listings.values():
+                fut.cancel()
+
+    async def glob(
+        self, pattern: str, concurrency: int = 8, password: str = ""
+    ) -> List[str]:
+        """
+        按通配符查找路径
+
+        Args:
+            pattern (str): 通配符，如 `/media/**/S0?E*.mkv`
+            concurrency (int): 最大并发请求数
+            password (str): 目录密码
+
+        Returns:
+            (List[str]): 匹配的路径（已排序）
+        """
+        return sorted([p async for p in self.iglob(pattern, concurrency, password)])
+
+    async def watch(
+        self,
+        root: str = "/",
+        interval: float = 10.0,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        concurrency: int = 8,
+        password: str = "",
+        refresh: bool = False,
+    ) -> AsyncGenerator["WatchEvent", None]:
+        """
+        监视目录树的变化
+
+        先遍历目录树建立快照，之后只重新列出修改时间发生变化的目录，
+        并根据各目录的变化频率自动调整其轮询间隔。
+
+        Args:
+            root (str): 监视的根目录
+            interval (float): 初始轮询间隔(秒)
+            min_interval (float): 最短轮询间隔，默认为 interval/4
+            max_interval (float): 最长轮询间隔，默认为 interval*8
+            concurrency (int): 最大并发请求数
+            password (str): 目录密码
+            refresh (bool): 重新列目录时是否强制服务器刷新缓存
+
+        Returns:
+            (AsyncGenerator[WatchEvent, None]): created / modified / deleted 事件
+        """
+        from .watch import Watcher
+
+        watcher = Watcher(
+            self,
+            root,
+            interval,
+            min_interval,
+            max_interval,
+            concurrency,
+            password,
+            refresh,
+        )
+        await watcher.snapshot()
+        async for event in watcher:
+            yield event
+
+    def _make_entry(self, parent: str, item: Mapping[str, Any], provider: str) -> ALFS:
+        # 由目录列表中的条目构建文件/文件夹对象
+        path = posixpath.join(parent, item["name"])
+        init = dict(item)
+        init.setdefault("provider", provider)
+        if item.get("is_dir"):
+            return model.AListFolder(path, init)
+        if not init.get("raw_url"):
+            url = urljoin(self.endpoint, "/d" + quote(path))
+            if item.get("sign"):
+                url += f"?sign={item['sign']}"
+            init["raw_url"] = url
+        return self._attach(model.AListFile(path, init))
+
+    async def stat_many(
+        self,
+        paths: Iterable[Paths],
+        concurrency: int = 8,
+        password: str = "",
+        sibling_threshold: int = 4,
+        compact: bool = False,
+    ) -> AsyncGenerator[Union[ALFS, model.AListCompactFile, model.AListCompactFolder], None]:
+        """
+        批量获取文件/文件夹信息
+
+        路径会先去重；同一目录下请求的路径数不少于 `sibling_threshold` 时，
+        通过一次列出父目录获取，其余路径并发调用 `/api/fs/get`，结果按完成顺序返回。
+
+        Args:
+            paths (Iterable[str, AListFile, AListFolder]): 路径列表
+            concurrency (int): 最大并发请求数
+            password (str): 密码
+            sibling_threshold (int): 同目录路径数达到该值时改为列出父目录
+            compact (bool): 是否返回节省内存的 `AListCompactFile`/`AListCompactFolder`
+
+        Returns:
+            (AsyncGenerator[AListFile | AListFolder, None]): 文件/文件夹对象
+        """
+        tasks = self._fetch_grouped(
+            dict.fromkeys(str(p).rstrip("/") or "/" for p in paths),
+            lambda p: self.open(p, password),
+            lambda parent, item, data: self._make_entry(parent, item, data["provider"]),
+            password,
+            concurrency,
+            sibling_threshold,
+        )
+        try:
+            for fut in asyncio.as_completed(tasks):
+                for _, entry in await fut:
+                    yield entry.to_compact() if compact else entry
+        finally:
+            for task in tasks:
+                task.cancel()
 
     async def mkdir(self, path: Folder) -> bool:
         """
@@ -237,38 +1153,165 @@ class AList:
         return True
 
     async def upload(
-        self, path: Union[str, model.AListFile], local: Union[str, bytes, BinaryIO]
-    ) -> bool:
+        self,
+        path: Union[str, model.AListFile],
+        local: Union[str, bytes, BinaryIO],
+        stats: Optional[utils.TransferStats] = None,
+        chunk_size: int = 1024 * 1024,
+        min_chunk_size: int = 64 * 1024,
+        max_chunk_size: int = 8 * 1024 * 1024,
+        skip_existing: Optional[str] = None,
+        password: str = "",
+        as_task: bool = False,
+    ) -> Union[bool, TaskHandle]:
         """
         上传文件
 
+        本地路径会被流式上传，读取块大小根据实测吞吐量自动调整。
+        指定 `skip_existing` 时先获取远程文件信息，内容相同则跳过上传：
+
+        - `size`: 远程文件大小相同即跳过
+        - `hash`: 大小相同且与服务器提供的 `hash_info` 一致才跳过，服务器未提供摘要时照常上传
+
         Args:
             path (str, AListFile): 上传的路径
             local (str, bytes, BinaryIO): 本地路径或字节数据或文件指针
+            stats (TransferStats): 用于记录传输统计的对象
+            chunk_size (int): 初始块大小
+            min_chunk_size (int): 最小块大小
+            max_chunk_size (int): 最大块大小
+            skip_existing (str): size / hash，为None时总是上传
+            password (str): 检查远程文件时使用的目录密码
+            as_task (bool): 是否由服务器作为后台任务上传到存储
 
         Returns:
             (bool): 是否成功
-        """
+            (TaskHandle): `as_task` 为True且未跳过时返回上传任务句柄
+        """
+        if stats is None:
+            stats = utils.TransferStats()
+        if hasattr(local, "read"):
+            local = local.read()  # type: ignore
+        if skip_existing is not None:
+            remote = {str(path): await self._get_raw(str(path), password)}
+            if await self._identical(skip_existing, {str(path): local}, remote):
+                return True
         if isinstance(local, bytes):
-            files = local
-        elif isinstance(local, BinaryIO):
-            files = local.read()
+            files: Any = local
+            size = len(local)
+            stats.bytes = size
         else:
-            with open(local, "rb") as f:
-                files = f.read()
+            size = os.path.getsize(local)
+            chunker = utils.AdaptiveChunker(chunk_size, min_chunk_size, max_chunk_size)
+            files = _iter_file(local, chunker, stats)
 
         FilePath = quote(str(path))
 
         headers = self.headers.copy()
         headers["File-Path"] = FilePath
-        headers["Content-Length"] = str(len(files))
+        headers["Content-Length"] = str(size)
         del headers["Content-Type"]
+        if as_task:
+            headers["As-Task"] = "true"
 
+        start = time.monotonic()
         r = await self._request("PUT", "/api/fs/put", data=files, headers=headers)
+        stats.seconds = time.monotonic() - start
         self._isBadRequest(r, "上传失败")
+        if self.metrics is not None:
+            self.metrics.observe_transfer("upload", stats.bytes, stats.seconds)
 
+        if as_task:
+            tasks = self._task_handles("upload", r["data"])
+            if tasks:
+                return tasks[0]
         return True
 
+    async def _identical(
+        self,
+        mode: str,
+        local: Mapping[str, Union[str, bytes]],
+        remote: Mapping[str, Optional[Mapping[str, Any]]],
+    ) -> Set[str]:
+        # 返回本地内容与远程文件相同的远程路径
+        if mode not in ("size", "hash"):
+            raise ValueError(f"未知的skip_existing: {mode}")
+        same: Set[str] = set()
+        pending: Dict[str, List[Tuple[str, str, str]]] = {}
+        for path, src in local.items():
+            item = remote.get(path)
+            if item is None or item.get("is_dir"):
+                continue
+            size = len(src) if isinstance(src, bytes) else os.path.getsize(src)
+            if item.get("size") != size:
+                continue
+            if mode == "size":
+                same.add(path)
+                continue
+            hash_info = item.get("hash_info")
+            if not isinstance(hash_info, Mapping):
+                continue
+            # 优先使用计算最快的算法
+            for algo in utils.StreamHasher.ALGORITHMS:
+                if hash_info.get(algo):
+                    expected = str(hash_info[algo]).lower()
+                    if isinstance(src, bytes):
+                        if hashlib.new(algo, src).hexdigest() == expected:
+                            same.add(path)
+                    else:
+                        pending.setdefault(algo, []).append((path, src, expected))
+                    break
+
+        # 同一算法的本地文件一起计算
+        for algo, items in pending.items():
+            digests = await self.local_hasher.digest_many(
+                [src for _, src, _ in items], algo
+            )
+            same.update(p for p, src, expected in items if digests[src] == expected)
+        return same
+
+    async def upload_many(
+        self,
+        files: Union[Mapping[str, str], Iterable[Tuple[str, str]]],
+        skip_existing: Optional[str] = None,
+        concurrency: int = 4,
+        password: str = "",
+        sibling_threshold: int = 4,
+    ) -> Dict[str, bool]:
+        """
+        批量上传本地文件
+
+        指定 `skip_existing` 时，远程文件信息通过批量列出父目录获取，
+        本地摘要由 `local_hasher` 在进程池中并行计算并缓存，
+        重复上传未变化的数据几乎不产生传输。
+
+        Args:
+            files (Mapping[str, str], Iterable[Tuple[str, str]]): 远程路径到本地路径的映射
+            skip_existing (str): size / hash，含义同 `upload`
+            concurrency (int): 最大并发上传数
+            password (str): 检查远程文件时使用的目录密码
+            sibling_threshold (int): 同目录路径数达到该值时改为列出父目录
+
+        Returns:
+            (Dict[str, bool]): 每个远程路径是否实际上传（False表示已跳过）
+        """
+        pairs = dict(files.items() if isinstance(files, Mapping) else files)
+        skip: Set[str] = set()
+        if skip_existing is not None:
+            remote = await self._get_raw_many(
+                pairs, password, sibling_threshold=sibling_threshold
+            )
+            skip = await self._identical(skip_existing, pairs, remote)
+
+        sem = asyncio.Semaphore(concurrency)
+
+        async def upload(path: str) -> None:
+            async with sem:
+                await self.upload(path, pairs[path])
+
+        await asyncio.gather(*(upload(p) for p in pairs if p not in skip))
+        return {p: p not in skip for p in pairs}
+
     async def rename(self, src: Paths, dst: str) -> bool:
         """
         重命名
@@ -353,16 +1396,20 @@ class AList:
         self._isBadRequest(r, "删除失败")
         return True
 
-    async def copy(self, src: File, dstDir: Folder) -> bool:
+    async def copy(
+        self, src: File, dstDir: Folder, return_tasks: bool = False
+    ) -> Union[bool, List[TaskHandle]]:
         """
         复制文件
 
         Args:
             src (str, AListFile): 源文件
             dstDir (str): 要复制到的路径
+            return_tasks (bool): 是否返回任务句柄
 
         Returns:
             (bool): 是否成功
+            (List[TaskHandle]): `return_tasks` 为True时返回服务器创建的任务（同存储内复制等立即完成时为空）
         """
         data = json.dumps(
             {
@@ -373,18 +1420,24 @@ class AList:
         )
         r = await self._request("POST", "/api/fs/copy", data=data)
         self._isBadRequest(r, "复制失败")
+        if return_tasks:
+            return self._task_handles("copy", r["data"])
         return True
 
-    async def move(self, src: File, dstDir: Folder) -> bool:
+    async def move(
+        self, src: File, dstDir: Folder, return_tasks: bool = False
+    ) -> Union[bool, List[TaskHandle]]:
         """
         移动文件
 
         Args:
             src (str, AListFile): 源文件
             dstDir (str): 要移动到的路径
+            return_tasks (bool): 是否返回任务句柄
 
         Returns:
             (bool): 是否成功
+            (List[TaskHandle]): `return_tasks` 为True时返回服务器创建的任务（同存储内移动等立即完成时为空）
         """
         data = json.dumps(
             {
@@ -395,11 +1448,20 @@ class AList:
         )
         r = await self._request("POST", "/api/fs/move", data=data)
         self._isBadRequest(r, "移动失败")
+        if return_tasks:
+            return self._task_handles("move", r["data"])
         return True
 
-    async def recursive_move(self, src: Folder, dstDir: Folder) -> bool:
+    async def recursive_move(
+        self, src: Folder, dstDir: Folder, return_tasks: bool = False
+    ) -> Union[bool, List[TaskHandle]]:
         """
         递归移动文件夹
+
+        Args:
+            src (str, AListFolder): 源文件夹
+            dstDir (str): 要移动到的路径
+            return_tasks (bool): 是否返回任务句柄（服务器未创建任务时为空）
         """
         url = "/api/fs/recursive_move"
         data = {
@@ -408,6 +1470,8 @@ class AList:
         }
         r = await self._request("POST", url, data=json.dumps(data))
         self._isBadRequest(r, "递归移动失败")
+        if return_tasks:
+            return self._task_handles("move", r["data"])
         return True
 
     async def site_config(self) -> utils.ToClass:
@@ -919,9 +1983,21 @@ class AList:
         path: str,
         tool: str = "SimpleHttp",
         delete_policy: str = "delete_on_upload_succeed",
+        return_tasks: bool = False,
     ):
         """
         添加离线下载
+
+        Args:
+            urls (list[str]): 下载地址
+            path (str): 保存路径
+            tool (str): 下载工具
+            delete_policy (str): 临时文件删除策略
+            return_tasks (bool): 是否返回任务句柄
+
+        Returns:
+            (ToClass): 服务器返回的数据
+            (List[TaskHandle]): `return_tasks` 为True时返回离线下载任务
         """
         url = "/api/fs/add_offline_download"
         data = {
@@ -936,8 +2012,90 @@ class AList:
             data=json.dumps(data),
         )
         self._isBadRequest(r, "添加离线下载失败")
+        if return_tasks:
+            return self._task_handles("offline_download", r["data"])
         return utils.ToClass(r).data
 
+    def _task_handles(self, type: str, data: Any) -> List[TaskHandle]:
+        # 从响应中提取任务，旧版本服务器不返回任务
+        if not isinstance(data, Mapping):
+            return []
+        tasks = data.get("tasks") or ([data["task"]] if data.get("task") else [])
+        return [self.task_poller.handle(type, info) for info in tasks]
+
+    async def _task_list(self, type: str, done: bool = False) -> List[Dict]:
+        url = f"/api/admin/task/{type}/{'done' if done else 'undone'}"
+        r = await self._request("GET", url)
+        self._isBadRequest(r, "获取任务列表失败")
+        return r["data"] or []
+
+    async def _task_info(self, type: str, tid: str) -> Dict:
+        url = f"/api/admin/task/{type}/info"
+        r = await self._request("POST", url, params={"tid": tid})
+        self._isBadRequest(r, "获取任务信息失败")
+        return r["data"]
+
+    async def list_tasks(self, type: str, done: bool = False) -> List[TaskHandle]:
+        """
+        列出任务
+
+        Args:
+            type (str): 任务类型，如 copy / move / upload / offline_download
+            done (bool): 为True时列出已结束的任务，否则列出未完成的任务
+
+        Returns:
+            (List[TaskHandle]): 任务句柄
+        """
+        return [
+            self.task_poller.handle(type, info)
+            for info in await self._task_list(type, done)
+        ]
+
+    async def get_task(self, type: str, tid: str) -> TaskHandle:
+        """
+        获取任务
+
+        Args:
+            type (str): 任务类型
+            tid (str): 任务ID
+
+        Returns:
+            (TaskHandle): 任务句柄
+        """
+        return self.task_poller.handle(type, await self._task_info(type, tid))
+
+    async def cancel_task(self, type: str, tid: str) -> bool:
+        """
+        取消任务
+
+        Args:
+            type (str): 任务类型
+            tid (str): 任务ID
+
+        Returns:
+            (bool): 是否成功
+        """
+        url = f"/api/admin/task/{type}/cancel"
+        r = await self._request("POST", url, params={"tid": tid})
+        self._isBadRequest(r, "取消任务失败")
+        return True
+
+    async def retry_task(self, type: str, tid: str) -> bool:
+        """
+        重试任务
+
+        Args:
+            type (str): 任务类型
+            tid (str): 任务ID
+
+        Returns:
+            (bool): 是否成功
+        """
+        url = f"/api/admin/task/{type}/retry"
+        r = await self._request("POST", url, params={"tid": tid})
+        self._isBadRequest(r, "重试任务失败")
+        return True
+
     def to_sync(self):
         """
         转换为同步对象"
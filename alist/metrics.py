@@ -0,0 +1,274 @@
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+# 默认延迟直方图分桶(秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _RequestStats:
+    __slots__ = (
+        "count",
+        "codes",
+        "buckets",
+        "latency_sum",
+        "request_bytes",
+        "response_bytes",
+        "retries",
+    )
+
+    def __init__(self, n_buckets: int):
+        self.count = 0
+        self.codes: Dict[str, int] = {}
+        self.buckets = [0] * (n_buckets + 1)
+        self.latency_sum = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class Metrics:
+    """
+    请求与传输指标
+
+    按接口路径统计请求数、返回码（`code` 字段，异常时为异常类名）、延迟直方图、
+    请求/响应字节数和重试次数（对冲请求和集群故障转移），并统计上传下载的吞吐量。
+    缓存命中等外部计数通过 `add_collector` 在读取时采集，不影响请求路径。
+    客户端未设置 `metrics` 时不做任何统计。
+
+    Attributes:
+        buckets (Tuple[float, ...]): 延迟直方图分桶上界(秒)
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        初始化
+
+        Args:
+            buckets (Sequence[float]): 延迟直方图分桶上界(秒)
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._requests: Dict[Tuple[str, str], _RequestStats] = {}
+        self._transfers: Dict[str, List[float]] = {}
+        self._collectors: Dict[str, Callable[[], Mapping[str, Union[int, float]]]] = {}
+        self._collector_types: Dict[str, Mapping[str, str]] = {}
+
+    def _stats(self, method: str, path: str) -> _RequestStats:
+        stats = self._requests.get((method, path))
+        if stats is None:
+            stats = self._requests[(method, path)] = _RequestStats(len(self.buckets))
+        return stats
+
+    def observe_request(
+        self,
+        method: str,
+        path: str,
+        code: Any,
+        elapsed: float,
+        request_bytes: int = 0,
+        response_bytes: int = 0,
+    ) -> None:
+        """
+        记录一次请求
+
+        Args:
+            method (str): 请求方法
+            path (str): 接口路径
+            code (Any): 返回的 `code`，请求异常时为异常类名
+            elapsed (float): 耗时(秒)
+            request_bytes (int): 请求体字节数
+            response_bytes (int): 响应体字节数
+        """
+        stats = self._stats(method, path)
+        stats.count += 1
+        key = str(code)
+        stats.codes[key] = stats.codes.get(key, 0) + 1
+        stats.buckets[bisect_left(self.buckets, elapsed)] += 1
+        stats.latency_sum += elapsed
+        stats.request_bytes += request_bytes
+        stats.response_bytes += response_bytes
+
+    def observe_retry(self, method: str, path: str) -> None:
+        """记录一次重试（对冲请求或故障转移）"""
+        self._stats(method, path).retries += 1
+
+    def observe_transfer(self, direction: str, nbytes: int, seconds: float) -> None:
+        """
+        记录一次文件传输
+
+        Args:
+            direction (str): upload / download
+            nbytes (int): 字节数
+            seconds (float): 耗时(秒)
+        """
+        total = self._transfers.setdefault(direction, [0, 0, 0.0])
+        total[0] += 1
+        total[1] += nbytes
+        total[2] += seconds
+
+    def add_collector(
+        self,
+        name: str,
+        collect: Callable[[], Mapping[str, Union[int, float]]],
+        types: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        """
+        注册在读取指标时调用的采集函数
+
+        Args:
+            name (str): 名称，如 `cache`
+            collect (Callable): 返回 {指标名: 数值} 的函数
+            types (Mapping[str, str]): 各指标的Prometheus类型（`counter` 或 `gauge`），
+                未指定的指标视为 `gauge`；`counter` 导出时名称加 `_total` 后缀
+
+        Raises:
+            ValueError: 类型不是 `counter` 或 `gauge`
+        """
+        types = dict(types or {})
+        for key, type in types.items():
+            if type not in ("counter", "gauge"):
+                raise ValueError(f"不支持的指标类型 {key}: {type}")
+        self._collectors[name] = collect
+        self._collector_types[name] = types
+
+    def reset(self) -> None:
+        """清空请求和传输统计"""
+        self._requests.clear()
+        self._transfers.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取当前指标
+
+        Returns:
+            (Dict[str, Any]): 包含 requests / transfers 以及各采集函数结果的字典
+        """
+        requests = {}
+        for (method, path), s in self._requests.items():
+            cumulative = 0
+            buckets: Dict[str, int] = {}
+            for bound, n in zip(self.buckets, s.buckets):
+                cumulative += n
+                buckets[str(bound)] = cumulative
+            buckets["+Inf"] = s.count
+            requests[f"{method} {path}"] = {
+                "count": s.count,
+                "codes": dict(s.codes),
+                "latency": {"sum": s.latency_sum, "buckets": buckets},
+                "request_bytes": s.request_bytes,
+                "response_bytes": s.response_bytes,
+                "retries": s.retries,
+            }
+        transfers = {
+            direction: {
+                "count": int(count),
+                "bytes": int(nbytes),
+                "seconds": seconds,
+                "throughput": nbytes / seconds if seconds else 0.0,
+            }
+            for direction, (count, nbytes, seconds) in self._transfers.items()
+        }
+        result: Dict[str, Any] = {"requests": requests, "transfers": transfers}
+        for name, collect in self._collectors.items():
+            result[name] = dict(collect())
+        return result
+
+    def prometheus(self, prefix: str = "alist") -> str:
+        """
+        以Prometheus文本格式导出指标
+
+        Args:
+            prefix (str): 指标名前缀
+
+        Returns:
+            (str): Prometheus text exposition
+        """
+        lines: List[str] = []
+
+        def family(name: str, type: str, help: str) -> str:
+            full = f"{prefix}_{name}"
+            lines.append(f"# HELP {full} {help}")
+            lines.append(f"# TYPE {full} {type}")
+            return full
+
+        items = sorted(self._requests.items())
+        name = family("requests_total", "counter", "Requests by API path and code.")
+        for (method, path), s in items:
+            for code, n in sorted(s.codes.items()):
+                lines.append(f"{name}{_labels(method=method, path=path, code=code)} {n}")
+
+        name = family(
+            "request_duration_seconds", "histogram", "Request latency by API path."
+        )
+        for (method, path), s in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, s.buckets):
+                cumulative += n
+                labels = _labels(method=method, path=path, le=str(bound))
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            labels = _labels(method=method, path=path, le="+Inf")
+            lines.append(f"{name}_bucket{labels} {s.count}")
+            labels = _labels(method=method, path=path)
+            lines.append(f"{name}_sum{labels} {s.latency_sum}")
+            lines.append(f"{name}_count{labels} {s.count}")
+
+        for metric, attr, help in (
+            ("request_bytes_total", "request_bytes", "Request body bytes."),
+            ("response_bytes_total", "response_bytes", "Response body bytes."),
+            ("retries_total", "retries", "Hedged or failed-over retries."),
+        ):
+            name = family(metric, "counter", help)
+            for (method, path), s in items:
+                labels = _labels(method=method, path=path)
+                lines.append(f"{name}{labels} {getattr(s, attr)}")
+
+        transfers = sorted(self._transfers.items())
+        for metric, index, help in (
+            ("transfers_total", 0, "File transfers."),
+            ("transfer_bytes_total", 1, "File transfer bytes."),
+            ("transfer_seconds_total", 2, "Time spent in file transfers."),
+        ):
+            name = family(metric, "counter", help)
+            for direction, total in transfers:
+                lines.append(f"{name}{_labels(direction=direction)} {total[index]}")
+
+        for collector, collect in sorted(self._collectors.items()):
+            types = self._collector_types.get(collector, {})
+            for key, value in sorted(collect().items()):
+                type = types.get(key, "gauge")
+                metric = f"{collector}_{key}"
+                if type == "counter" and not metric.endswith("_total"):
+                    metric += "_total"
+                name = family(metric, type, f"{collector} {key}.")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def __repr__(self) -> str:
+        return f"<Metrics paths={len(self._requests)}>"
+
+
+def body_size(data: Any, headers: Optional[Mapping[str, Any]] = None) -> int:
+    """
+    估计请求体字节数
+
+    Args:
+        data (Any): 请求体
+        headers (Mapping): 请求头，流式请求体使用其中的 `Content-Length`
+
+    Returns:
+        (int): 字节数，无法确定时为0
+    """
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    if isinstance(data, str):
+        return len(data.encode())
+    if headers is not None and headers.get("Content-Length"):
+        return int(headers["Content-Length"])
+    return 0
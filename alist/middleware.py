@@ -0,0 +1,165 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Collection, Dict, Optional
+
+import aiohttp
+
+if TYPE_CHECKING:
+    from .main import AList
+
+# 只读（幂等）接口
+READ_PATHS = frozenset(
+    {
+        "/api/fs/list",
+        "/api/fs/get",
+        "/api/fs/search",
+        "/api/fs/dirs",
+        "/api/me",
+        "/api/public/settings",
+    }
+)
+
+
+class Request:
+    """
+    经过中间件的请求
+
+    中间件可以修改属性后再交给下一层；`headers` 默认是客户端共享的请求头，
+    修改前需要先复制。
+
+    Attributes:
+        client (AList): 发出请求的客户端
+        method (str): 请求方法
+        path (str): 接口路径
+        headers (Dict): 请求头
+        kwargs (Dict): 传给aiohttp的其他参数（data、params等）
+    """
+
+    __slots__ = ("client", "method", "path", "headers", "kwargs")
+
+    def __init__(
+        self,
+        client: "AList",
+        method: str,
+        path: str,
+        headers: Dict,
+        kwargs: Dict[str, Any],
+    ):
+        self.client = client
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.kwargs = kwargs
+
+    def __repr__(self) -> str:
+        return f"<Request {self.method} {self.path}>"
+
+
+Handler = Callable[[Request], Awaitable[Dict]]
+Middleware = Callable[[Request, Handler], Awaitable[Dict]]
+
+
+def compose(middlewares: Collection[Middleware], handler: Handler) -> Handler:
+    """
+    将中间件组合为一个处理函数，先注册的中间件在最外层
+
+    Args:
+        middlewares (Collection[Middleware]): 中间件
+        handler (Handler): 最内层的处理函数
+
+    Returns:
+        (Handler): 组合后的处理函数
+    """
+    for mw in reversed(list(middlewares)):
+        handler = _bind(mw, handler)
+    return handler
+
+
+def _bind(mw: Middleware, next: Handler) -> Handler:
+    def handler(request: Request) -> Awaitable[Dict]:
+        return mw(request, next)
+
+    return handler
+
+
+class Retry:
+    """
+    连接错误或超时时重试只读请求的中间件
+
+    Attributes:
+        attempts (int): 最多尝试次数
+        backoff (float): 首次重试前的等待时间(秒)，之后每次翻倍
+        paths (Collection[str]): 允许重试的接口路径
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        backoff: float = 0.5,
+        paths: Collection[str] = READ_PATHS,
+        errors: tuple = (aiohttp.ClientConnectionError, asyncio.TimeoutError),
+    ):
+        """
+        初始化
+
+        Args:
+            attempts (int): 最多尝试次数
+            backoff (float): 首次重试前的等待时间(秒)
+            paths (Collection[str]): 允许重试的接口路径，默认为只读接口
+            errors (tuple): 需要重试的异常类型
+        """
+        self.attempts = attempts
+        self.backoff = backoff
+        self.paths = paths
+        self.errors = errors
+
+    async def __call__(self, request: Request, next: Handler) -> Dict:
+        if request.path not in self.paths:
+            return await next(request)
+        delay = self.backoff
+        for _ in range(self.attempts - 1):
+            try:
+                return await next(request)
+            except self.errors:
+                metrics = request.client.metrics
+                if metrics is not None:
+                    metrics.observe_retry(request.method, request.path)
+            await asyncio.sleep(delay)
+            delay *= 2
+        return await next(request)
+
+
+class RateLimit:
+    """
+    令牌桶限速中间件
+
+    Attributes:
+        rate (float): 每秒允许的请求数
+        burst (int): 允许的突发请求数
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        初始化
+
+        Args:
+            rate (float): 每秒允许的请求数
+            burst (int): 允许的突发请求数，默认为 max(1, rate)
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, request: Request, next: Handler) -> Dict:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+        return await next(request)
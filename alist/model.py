@@ -1,9 +1,36 @@
-from typing import Any, AsyncGenerator, Mapping, Optional, Union
+import asyncio
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import aiofiles
 import aiohttp
 from aiofiles import tempfile
 
+from . import error
+from .cache import CacheWriter, ContentCache
+from .metrics import Metrics
+from .tracing import RequestTracer
+from .utils import (
+    AdaptiveChunker,
+    PreallocatedFile,
+    StreamHasher,
+    TransferStats,
+    parse_time,
+)
+
 
 class AListFile:
     """
@@ -19,6 +46,10 @@ class AListFile:
         url (str): 文件下载URL
         sign (str): 签名
         raw (dict): 原始返回信息
+        transfer_stats (TransferStats): 最近一次下载的传输统计
+        digests (Dict[str, str]): 最近一次下载时计算并校验的摘要
+        metrics (Optional[Metrics]): 记录下载吞吐量的指标对象
+        tracer (Optional[RequestTracer]): 追踪下载请求的对象
     """
 
     def __init__(self, path: str, init: Mapping[str, Any]):
@@ -33,6 +64,15 @@ class AListFile:
         self.sign = str(init.get("sign", ""))
         self.raw = init
 
+        self.transfer_stats = TransferStats()
+        self.digests: Dict[str, str] = {}
+        self.metrics: Optional[Metrics] = None
+        self.tracer: Optional[RequestTracer] = None
+
+        # 内容缓存
+        self._cache: Optional[ContentCache] = None
+        self._cache_key = ""
+
         # 文件操作相关
         self._file = None
         self._closed = False
@@ -130,50 +170,406 @@ class AListFile:
         """获取当前文件大小（动态计算）"""
         return self._size
 
-    async def download(self, chunk_size: int = 1024 * 1024) -> None:
-        """流式下载文件到临时文件"""
-        self._check_open()
+    def use_cache(self, cache: Optional[ContentCache], endpoint: str) -> None:
+        """
+        为文件启用内容缓存
+
+        Args:
+            cache (ContentCache): 内容缓存，为None时禁用
+            endpoint (str): 文件所在的AList地址
+        """
+        self._cache = cache
+        self._cache_key = (
+            cache.key_for(endpoint, self.path, self.raw) if cache is not None else ""
+        )
+
+    async def _load_cached(self, chunk_size: int, hasher: StreamHasher) -> bool:
+        # 从缓存复制内容到临时文件，缓存内容校验失败时删除该条目并返回False
+        if self._cache is None:
+            return False
+        cached = self._cache.get(self._cache_key)
+        if cached is None:
+            return False
+        stats = self.transfer_stats = TransferStats()
+        start = time.monotonic()
+        await self.seek(0)
+        await self.truncate(0)  # type: ignore
+        async with aiofiles.open(cached, "rb") as f:
+            while True:
+                chunk = await f.read(chunk_size)
+                if not chunk:
+                    break
+                await hasher.update(chunk)
+                await self._file.write(chunk)  # type: ignore
+                stats.bytes += len(chunk)
+        try:
+            self.digests = await hasher.verify(self.path)
+        except error.IntegrityError:
+            self._cache.discard(self._cache_key)
+            await self.seek(0)
+            await self.truncate(0)  # type: ignore
+            return False
+        stats.seconds = time.monotonic() - start
+        stats.read_chunk_size = stats.write_chunk_size = chunk_size
+        await self.seek(0)
+        self._size = await self._get_actual_size()
+        return True
+
+    async def download(
+        self,
+        chunk_size: int = 1024 * 1024,
+        min_chunk_size: int = 64 * 1024,
+        max_chunk_size: int = 8 * 1024 * 1024,
+        verify: bool = True,
+    ) -> None:
+        """
+        流式下载文件到临时文件
+
+        读取和写入的块大小根据实测吞吐量在 `min_chunk_size` 和 `max_chunk_size`
+        之间自动调整，最终使用的大小记录在 `transfer_stats` 中。
+        服务器提供 `hash_info` 时边下载边计算摘要，结果保存在 `digests` 中。
+
+        Args:
+            chunk_size (int): 初始块大小
+            min_chunk_size (int): 最小块大小
+            max_chunk_size (int): 最大块大小
+            verify (bool): 是否校验摘要
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.url) as response:
+        Raises:
+            IntegrityError: 下载内容与服务器提供的摘要不一致
+        """
+        self._check_open()
+        self.digests = {}
+        hash_info = self.raw.get("hash_info") if verify else None
+        if await self._load_cached(max_chunk_size, StreamHasher(hash_info)):
+            return
+        hasher = StreamHasher(hash_info)
+        reader = AdaptiveChunker(chunk_size, min_chunk_size, max_chunk_size)
+        writer = AdaptiveChunker(chunk_size, min_chunk_size, max_chunk_size)
+        stats = self.transfer_stats = TransferStats()
+        start = time.monotonic()
+        expected = self._size
+        # 未校验的内容不写入缓存
+        cache = (
+            self._cache.writer(self._cache_key)
+            if self._cache is not None and verify
+            else None
+        )
+        try:
+            await self._download(reader, writer, stats, start, cache, hasher)
+            self.digests = await hasher.verify(self.path)
+        except BaseException:
+            if cache is not None:
+                cache.abort()
+            raise
+        if self.metrics is not None:
+            self.metrics.observe_transfer("download", stats.bytes, stats.seconds)
+        if cache is not None:
+            # 大小与元数据不符时不写入缓存
+            if expected and cache.size != expected:
+                cache.abort()
+            else:
+                cache.commit()
+
+    async def _download(
+        self,
+        reader: AdaptiveChunker,
+        writer: AdaptiveChunker,
+        stats: TransferStats,
+        start: float,
+        cache: Optional[CacheWriter],
+        hasher: StreamHasher,
+    ) -> None:
+        async with self._session() as session:
+            async with self._get(session, "download") as response:
                 response.raise_for_status()
 
                 # 清空已有内容
                 await self.seek(0)
                 await self.truncate(0)  # type: ignore
 
-                # 流式写入
-                async for chunk in response.content.iter_chunked(chunk_size):
-                    await self._file.write(chunk)  # type: ignore
+                # 流式写入，攒够一个写入块再写
+                buf = bytearray()
+                while True:
+                    t = time.monotonic()
+                    chunk = await response.content.read(reader.size)
+                    if not chunk:
+                        break
+                    reader.update(len(chunk), time.monotonic() - t)
+                    stats.bytes += len(chunk)
+                    await hasher.update(chunk)
+                    if cache is not None:
+                        await cache.write(chunk)
+                    buf += chunk
+                    if len(buf) >= writer.size:
+                        await self._write_timed(buf, writer)
+                        buf = bytearray()
+                if buf:
+                    await self._write_timed(buf, writer)
+
+                stats.seconds = time.monotonic() - start
+                stats.read_chunk_size = reader.size
+                stats.write_chunk_size = writer.size
 
                 # 重置指针
                 await self.seek(0)
                 self._size = await self._get_actual_size()
 
-    async def save(self, path: str, chunk_size: int = 1024 * 1024) -> None:
-        """异步保存文件到本地"""
+    async def _write_timed(self, data: bytearray, chunker: AdaptiveChunker) -> None:
+        t = time.monotonic()
+        await self._file.write(bytes(data))  # type: ignore
+        chunker.update(len(data), time.monotonic() - t)
+
+    async def save(
+        self, path: str, chunk_size: int = 1024 * 1024, preallocate: bool = False
+    ) -> None:
+        """
+        异步保存文件到本地
+
+        数据来自已下载完成的本地临时文件，读写都不经过网络，因此不使用
+        `AdaptiveChunker`，始终按固定的 `chunk_size` 分块复制。
+        需要按吞吐量调整块大小的直接下载请使用 `download_to`。
+
+        Args:
+            path (str): 本地路径
+            chunk_size (int): 块大小（固定）
+            preallocate (bool): 是否按文件大小预分配磁盘空间并按偏移写入
+        """
         self._check_open()
-        await self.seek(0)  # 确保从头读取
 
-        async with aiofiles.open(path, "wb") as f:
+        # 写入当前块的同时预读下一块
+        if preallocate:
+            async with await PreallocatedFile.open(path, self._size) as f:
+                offset = 0
+                async for chunk in self.iter_chunks(
+                    chunk_size, max_chunk_size=chunk_size
+                ):
+                    offset += await f.write_at(offset, chunk)
+                f.truncate(offset)
+        else:
+            async with aiofiles.open(path, "wb") as f:
+                async for chunk in self.iter_chunks(
+                    chunk_size, max_chunk_size=chunk_size
+                ):
+                    await f.write(chunk)
+
+        await self.seek(0)  # 重置指针
+
+    async def download_to(
+        self,
+        path: str,
+        segments: int = 1,
+        chunk_size: int = 1024 * 1024,
+        min_chunk_size: int = 64 * 1024,
+        max_chunk_size: int = 8 * 1024 * 1024,
+        preallocate: bool = True,
+        verify: bool = True,
+    ) -> None:
+        """
+        直接下载到本地文件（不经过临时文件）
+
+        目标文件按 `size` 预分配，数据按偏移写入；`segments` 大于1且服务器支持
+        Range请求时，各分段并发下载并直接写入各自的位置，无需合并。
+        单连接下载时边下载边计算摘要，分段下载完成后或从缓存生成后再计算整个文件的摘要；
+        缓存内容校验失败时删除该缓存并从服务器重新下载。
+        `verify` 为False时下载的内容不写入缓存。
+
+        Args:
+            path (str): 本地路径
+            segments (int): 并发分段数
+            chunk_size (int): 初始块大小
+            min_chunk_size (int): 最小块大小
+            max_chunk_size (int): 最大块大小
+            preallocate (bool): 是否预分配磁盘空间
+            verify (bool): 是否校验摘要
+
+        Raises:
+            IntegrityError: 下载内容与服务器提供的摘要不一致（目标文件会保留）
+        """
+        self.digests = {}
+        hash_info = self.raw.get("hash_info") if verify else None
+        loop = asyncio.get_running_loop()
+        # 复制/reflink大文件较慢，在线程池中执行
+        if self._cache is not None and await loop.run_in_executor(
+            None, self._cache.materialize, self._cache_key, path
+        ):
+            hasher = StreamHasher(hash_info)
+            await hasher.update_file(path, chunk_size)
+            try:
+                self.digests = await hasher.verify(self.path)
+                return
+            except error.IntegrityError:
+                # 缓存内容已损坏，删除后从服务器重新下载
+                self._cache.discard(self._cache_key)
+        hasher = StreamHasher(hash_info)
+        size = self._size
+        stats = self.transfer_stats = TransferStats()
+        start = time.monotonic()
+
+        def chunker() -> AdaptiveChunker:
+            return AdaptiveChunker(chunk_size, min_chunk_size, max_chunk_size)
+
+        async with await PreallocatedFile.open(path, size if preallocate else 0) as out:
+            async with self._session() as session:
+                done = False
+                if segments > 1 and size > segments * min_chunk_size:
+                    step = -(-size // segments)
+                    ranges = [(i, min(i + step, size) - 1) for i in range(0, size, step)]
+                    tasks = [
+                        asyncio.ensure_future(
+                            self._download_range(session, out, r, chunker(), stats)
+                        )
+                        for r in ranges
+                    ]
+                    try:
+                        results = await asyncio.gather(*tasks)
+                    except BaseException:
+                        # 一个分段失败时停止其余分段，关闭文件前确保它们都已结束
+                        for t in tasks:
+                            t.cancel()
+                        await asyncio.gather(*tasks, return_exceptions=True)
+                        raise
+                    done = all(results)
+                    if not done:
+                        # 服务器不支持Range请求，改为单连接下载
+                        stats.bytes = 0
+                if not done:
+                    await self._download_range(
+                        session, out, None, chunker(), stats, hasher
+                    )
+                    out.truncate(stats.bytes)
+
+        if done:
+            await hasher.update_file(path, chunk_size)
+        stats.seconds = time.monotonic() - start
+        if self.metrics is not None:
+            self.metrics.observe_transfer("download", stats.bytes, stats.seconds)
+        self.digests = await hasher.verify(self.path)
+        if self._cache is not None and verify:
+            await loop.run_in_executor(None, self._cache.add_file, self._cache_key, path)
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self.tracer is None:
+            return aiohttp.ClientSession()
+        return aiohttp.ClientSession(trace_configs=[self.tracer.trace_config])
+
+    @asynccontextmanager
+    async def _get(
+        self,
+        session: aiohttp.ClientSession,
+        name: str,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        # 发起下载请求，启用追踪时记录各阶段耗时并创建子span
+        if self.tracer is None:
+            async with session.get(self.url, headers=headers) as response:
+                yield response
+            return
+        tracer = self.tracer
+        timing = tracer.start("GET", self.url)
+        status: Any = None
+        with tracer.span(name) as span:
+            try:
+                async with session.get(
+                    self.url, headers=headers, trace_request_ctx=timing
+                ) as response:
+                    status = response.status
+                    yield response
+            except BaseException as e:
+                status = type(e).__name__
+                raise
+            finally:
+                tracer.finish(timing, status, span)
+
+    async def _download_range(
+        self,
+        session: aiohttp.ClientSession,
+        out: PreallocatedFile,
+        byte_range: Optional[Tuple[int, int]],
+        chunker: AdaptiveChunker,
+        stats: TransferStats,
+        hasher: Optional[StreamHasher] = None,
+    ) -> bool:
+        # 下载一个分段并写入对应偏移，服务器不支持Range时返回False
+        headers = {}
+        offset = 0
+        if byte_range is not None:
+            offset = byte_range[0]
+            headers["Range"] = f"bytes={byte_range[0]}-{byte_range[1]}"
+        name = f"segment {headers['Range']}" if headers else "download"
+        async with self._get(session, name, headers) as response:
+            response.raise_for_status()
+            if byte_range is not None and response.status != 206:
+                return False
             while True:
-                chunk = await self.read(chunk_size)
+                t = time.monotonic()
+                chunk = await response.content.read(chunker.size)
                 if not chunk:
                     break
-                await f.write(chunk)
+                chunker.update(len(chunk), time.monotonic() - t)
+                if hasher is not None:
+                    await hasher.update(chunk)
+                offset += await out.write_at(offset, chunk)
+                stats.bytes += len(chunk)
+        stats.read_chunk_size = stats.write_chunk_size = chunker.size
+        return True
+
+    async def iter_chunks(
+        self,
+        chunk_size: int = 8192,
+        readahead: int = 2,
+        max_chunk_size: int = 1024 * 1024,
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        异步迭代文件内容
 
-        await self.seek(0)  # 重置指针
+        后台任务在调用方处理当前块时预读后续数据块，块大小从 `chunk_size`
+        开始逐次翻倍，直到 `max_chunk_size`。
+        `readahead` 为0时不启动后台任务，始终按 `chunk_size` 读取。
 
-    async def iter_chunks(self, chunk_size: int = 8192) -> AsyncGenerator[bytes, None]:
-        """异步迭代文件内容"""
+        Args:
+            chunk_size (int): 初始块大小
+            readahead (int): 预读队列深度，为0时不预读且块大小固定
+            max_chunk_size (int): 最大块大小
+        """
         self._check_open()
         await self.seek(0)
+        max_chunk_size = max(chunk_size, max_chunk_size)
 
-        while True:
-            chunk = await self.read(chunk_size)
-            if not chunk:
-                break
-            yield chunk
+        if readahead <= 0:
+            # 与不预读的实现完全一致：固定块大小，不递增
+            while True:
+                chunk = await self.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            return
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=readahead)
+
+        async def producer():
+            size = chunk_size
+            try:
+                while True:
+                    chunk = await self.read(size)
+                    await queue.put(chunk)
+                    if not chunk:
+                        return
+                    size = min(max_chunk_size, size * 2)
+            except Exception as e:
+                await queue.put(e)
+
+        task = asyncio.ensure_future(producer())
+        try:
+            while True:
+                chunk = await queue.get()
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            task.cancel()
 
     def _check_open(self) -> None:
         if self.closed:
@@ -189,6 +585,15 @@ class AListFile:
         await self.seek(current_pos)  # 恢复原位置
         return size
 
+    def to_compact(self, keep_raw: bool = False) -> "AListCompactFile":
+        """
+        转换为节省内存的紧凑对象
+
+        Args:
+            keep_raw (bool): 是否保留原始返回信息
+        """
+        return AListCompactFile(self.path, self.raw, keep_raw)
+
     def to_sync(self):
         """转换为同步文件对象"""
         from alist.sync import AListFileSync
@@ -225,10 +630,10 @@ class AListFolder:
             init (dict):初始化字典
         """
         self.path = path
-        self.provider = init["provider"]
-        self.size = init["size"]
-        self.modified = init["modified"]
-        self.created = init["created"]
+        self.provider = init.get("provider", 0)
+        self.size = init.get("size", 0)
+        self.modified = init.get("modified", "")
+        self.created = init.get("created", "")
         self.raw = init
 
     def __str__(self):
@@ -236,3 +641,117 @@ class AListFolder:
 
     def __repr__(self):
         return self.path
+
+    def to_compact(self, keep_raw: bool = False) -> "AListCompactFolder":
+        """
+        转换为节省内存的紧凑对象
+
+        Args:
+            keep_raw (bool): 是否保留原始返回信息
+        """
+        return AListCompactFolder(self.path, self.raw, keep_raw)
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _isoformat(ts: int) -> str:
+    if not ts:
+        return ""
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+class _CompactEntry:
+    __slots__ = ("path", "name", "size", "provider", "modified", "created", "raw")
+
+    def __init__(self, path: str, init: Mapping[str, Any], keep_raw: bool = False):
+        self.path = path
+        self.name = init.get("name", "")
+        self.size = init.get("size", 0)
+        self.provider = _intern(init.get("provider", 0))
+        self.modified = int(parse_time(init.get("modified", "")))
+        self.created = int(parse_time(init.get("created", "")))
+        self.raw = init if keep_raw else None
+
+    def _init(self) -> dict:
+        # 重建初始化字典（未保留原始信息时时间精度为秒）
+        if self.raw is not None:
+            return dict(self.raw)
+        return {
+            "name": self.name,
+            "size": self.size,
+            "provider": self.provider,
+            "modified": _isoformat(self.modified),
+            "created": _isoformat(self.created),
+        }
+
+    def __str__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.path}>"
+
+
+class AListCompactFile(_CompactEntry):
+    """
+    节省内存的AList文件元数据
+
+    使用 `__slots__`，存储类型字符串会被驻留，时间解析为整数时间戳，默认不保留原始返回信息。
+    在64位CPython上每个对象本身占用 96 字节（不含字符串内容），
+    而 `AListFile` 连同实例字典约为 350 字节，且另外持有时间字符串和原始字典。
+
+    Attributes:
+        path (str): 文件路径
+        name (str): 文件名
+        size (int): 文件大小
+        provider (str): 存储类型
+        modified (int): 修改时间(Unix时间戳，秒)
+        created (int): 创建时间(Unix时间戳，秒)
+        url (str): 文件下载URL
+        raw (Optional[Mapping]): 原始返回信息（仅在 keep_raw 时保留）
+    """
+
+    __slots__ = ("url",)
+
+    def __init__(self, path: str, init: Mapping[str, Any], keep_raw: bool = False):
+        """
+        初始化
+
+        Args:
+            path (str): 文件路径
+            init (dict): 初始化字典
+            keep_raw (bool): 是否保留原始返回信息
+        """
+        super().__init__(path, init, keep_raw)
+        self.url = init.get("raw_url", "")
+
+    def __len__(self) -> int:
+        return self.size
+
+    def to_file(self) -> AListFile:
+        """转换为可读取内容的 `AListFile`"""
+        init = self._init()
+        init["raw_url"] = self.url
+        return AListFile(self.path, init)
+
+
+class AListCompactFolder(_CompactEntry):
+    """
+    节省内存的AList文件夹元数据
+
+    Attributes:
+        path (str): 文件夹路径
+        name (str): 文件夹名
+        size (int): 大小
+        provider (str): 存储类型
+        modified (int): 修改时间(Unix时间戳，秒)
+        created (int): 创建时间(Unix时间戳，秒)
+        raw (Optional[Mapping]): 原始返回信息（仅在 keep_raw 时保留）
+    """
+
+    __slots__ = ()
+
+    def to_folder(self) -> AListFolder:
+        """转换为 `AListFolder`"""
+        return AListFolder(self.path, self._init())
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import os
+from typing import IO, TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from . import error
+from .task import OFFLINE_DOWNLOAD, PENDING, SUCCEEDED, TaskHandle
+
+if TYPE_CHECKING:
+    from .main import AList
+
+
+class OfflineIngest:
+    """
+    离线下载批量提交队列
+
+    URL按 `chunk_size` 分批提交，最多 `concurrency` 批同时提交；
+    服务器上未完成的离线下载任务数达到 `max_active` 时暂停提交，
+    每隔 `poll_interval` 秒重新检查。
+    已提交和已完成的URL记录在本地JSONL日志中，暂停或中断后再次调用 `run`
+    会跳过已提交的URL，并继续等待上次未完成的任务。
+
+    Attributes:
+        path (str): 保存路径
+        tool (str): 下载工具
+        submitted (Dict[str, str]): 已提交的URL到任务ID的映射
+        completed (Dict[str, int]): 已结束的URL到任务最终状态的映射
+    """
+
+    def __init__(
+        self,
+        client: "AList",
+        path: str,
+        tool: str = "SimpleHttp",
+        delete_policy: str = "delete_on_upload_succeed",
+        journal: Optional[str] = None,
+        chunk_size: int = 50,
+        concurrency: int = 2,
+        max_active: int = 100,
+        poll_interval: float = 5.0,
+    ):
+        """
+        初始化
+
+        Args:
+            client (AList): AList客户端
+            path (str): 保存路径
+            tool (str): 下载工具
+            delete_policy (str): 临时文件删除策略
+            journal (str): 日志文件路径，为None时不记录（无法续传）
+            chunk_size (int): 每批提交的URL数
+            concurrency (int): 最多同时提交的批数
+            max_active (int): 服务器上未完成任务数的上限
+            poll_interval (float): 达到上限时重新检查的间隔(秒)
+        """
+        self.client = client
+        self.path = path
+        self.tool = tool
+        self.delete_policy = delete_policy
+        self.journal = journal
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.max_active = max_active
+        self.poll_interval = poll_interval
+        self.submitted: Dict[str, str] = {}
+        self.completed: Dict[str, int] = {}
+        self._active: Optional[int] = None
+        self._lock = asyncio.Lock()
+        self._paused = False
+        self._file: Optional[IO[str]] = None
+        self._closed = False
+        if journal is not None and os.path.exists(journal):
+            self._load(journal)
+
+    def _load(self, journal: str) -> None:
+        with open(journal, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 写入中断的最后一行
+                    continue
+                if record["op"] == "submit":
+                    for url, tid in zip(record["urls"], record["tasks"]):
+                        self.submitted[url] = tid
+                elif record["op"] == "done":
+                    self.completed[record["url"]] = record["state"]
+
+    def _write(self, record: Dict) -> None:
+        if self.journal is None:
+            return
+        if self._closed:
+            raise ValueError("I/O operation on closed journal")
+        if self._file is None:
+            self._file = open(self.journal, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        """关闭日志文件（之后不再写入，直到再次调用 `run`）"""
+        self._closed = True
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def pause(self) -> None:
+        """暂停提交，正在提交的批次完成后 `run` 返回"""
+        self._paused = True
+
+    @property
+    def paused(self) -> bool:
+        """是否已暂停"""
+        return self._paused
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """已提交、已成功、已失败和等待中的URL数"""
+        succeeded = sum(1 for s in self.completed.values() if s == SUCCEEDED)
+        return {
+            "submitted": len(self.submitted),
+            "succeeded": succeeded,
+            "failed": len(self.completed) - succeeded,
+            "pending": len(self.submitted) - len(self.completed),
+        }
+
+    async def _reserve(self, n: int) -> bool:
+        # 等待服务器上的未完成任务数低于上限，返回是否获得名额
+        async with self._lock:
+            while not self._paused:
+                if self._active is None or self._active + n > self.max_active:
+                    active = await self.client._task_list(OFFLINE_DOWNLOAD, done=False)
+                    self._active = len(active)
+                if self._active + n <= self.max_active or self._active == 0:
+                    self._active += n
+                    return True
+                await asyncio.sleep(self.poll_interval)
+            return False
+
+    async def _track(self, url: str, handle: TaskHandle) -> None:
+        try:
+            await handle
+        except error.TaskError:
+            pass
+        self.completed[url] = handle.state
+        self._write({"op": "done", "url": url, "task": handle.id, "state": handle.state})
+
+    async def _submit(self, chunk: List[str], wait: bool, trackers: List) -> None:
+        if not await self._reserve(len(chunk)):
+            return
+        handles = await self.client.add_offline_download(
+            chunk, self.path, self.tool, self.delete_policy, return_tasks=True
+        )
+        # 服务器按URL顺序为每个URL创建一个任务
+        if len(handles) != len(chunk):
+            handles = []
+        ids = [h.id for h in handles] or [""] * len(chunk)
+        self._write({"op": "submit", "urls": chunk, "tasks": ids})
+        self.submitted.update(zip(chunk, ids))
+        if wait:
+            trackers.extend(
+                asyncio.ensure_future(self._track(url, h))
+                for url, h in zip(chunk, handles)
+            )
+
+    async def run(self, urls: Iterable[str], wait: bool = True) -> Dict[str, int]:
+        """
+        提交URL（已提交过的URL会被跳过）
+
+        Args:
+            urls (Iterable[str]): 下载地址
+            wait (bool): 是否等待所有任务结束（包括上次未完成的任务）
+
+        Returns:
+            (Dict[str, int]): 同 `stats`
+        """
+        self._paused = False
+        self._closed = False
+        self._active = None
+        todo = [url for url in dict.fromkeys(urls) if url not in self.submitted]
+        trackers: List[asyncio.Future] = []
+        if wait:
+            for url, tid in self.submitted.items():
+                if tid and url not in self.completed:
+                    h = self.client.task_poller.handle(
+                        OFFLINE_DOWNLOAD, {"id": tid, "state": PENDING}
+                    )
+                    trackers.append(asyncio.ensure_future(self._track(url, h)))
+
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def submit(chunk: List[str]) -> None:
+            async with sem:
+                if not self._paused:
+                    await self._submit(chunk, wait, trackers)
+
+        submits = [
+            asyncio.ensure_future(submit(todo[i : i + self.chunk_size]))
+            for i in range(0, len(todo), self.chunk_size)
+        ]
+        try:
+            await asyncio.gather(*submits)
+            if trackers and not self._paused:
+                await asyncio.gather(*trackers)
+        finally:
+            # 出错时停止其余提交，返回前确保没有后台任务继续提交或写入日志
+            for t in submits + trackers:
+                t.cancel()
+            await asyncio.gather(*submits, *trackers, return_exceptions=True)
+        return self.stats
+
+    def __repr__(self) -> str:
+        return f"<OfflineIngest {self.path} {self.stats}>"
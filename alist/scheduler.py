@@ -0,0 +1,165 @@
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+INTERACTIVE = "interactive"
+ADMIN = "admin"
+BULK = "bulk"
+
+# 数值越小优先级越高
+PRIORITIES = {INTERACTIVE: 0, ADMIN: 1, BULK: 2}
+
+# 传输类接口，默认归为批量流量
+BULK_PATHS = {"/api/fs/put", "/api/fs/form"}
+
+_request_class: ContextVar[Optional[str]] = ContextVar(
+    "alist_request_class", default=None
+)
+
+
+@contextmanager
+def request_class(cls: str) -> Iterator[None]:
+    """
+    为当前上下文中的请求指定流量类别
+
+    Args:
+        cls (str): interactive / bulk / admin
+    """
+    if cls not in PRIORITIES:
+        raise ValueError(f"未知的请求类别: {cls}")
+    token = _request_class.set(cls)
+    try:
+        yield
+    finally:
+        _request_class.reset(token)
+
+
+def classify(path: str) -> str:
+    """
+    获取请求的流量类别（优先使用上下文中指定的类别）
+
+    Args:
+        path (str): 接口路径
+
+    Returns:
+        (str): 流量类别
+    """
+    cls = _request_class.get()
+    if cls is not None:
+        return cls
+    if path.startswith("/api/admin/"):
+        return ADMIN
+    if path in BULK_PATHS:
+        return BULK
+    return INTERACTIVE
+
+
+class RequestScheduler:
+    """
+    按优先级调度请求的并发控制器
+
+    每个类别可以预留一定数量的并发槽位，预留槽位只供该类别使用，
+    剩余槽位由所有类别共享，等待中的请求按优先级先后获得槽位。
+
+    Attributes:
+        max_concurrency (int): 最大并发数
+        reserved (Dict[str, int]): 每个类别的预留槽位数
+        active (Dict[str, int]): 每个类别正在执行的请求数
+    """
+
+    def __init__(
+        self, max_concurrency: int = 16, reserved: Optional[Dict[str, int]] = None
+    ):
+        """
+        初始化
+
+        Args:
+            max_concurrency (int): 最大并发数
+            reserved (Dict[str, int]): 每个类别的预留槽位数，默认为交互类预留4个、管理类预留1个
+        """
+        if reserved is None:
+            reserved = {INTERACTIVE: min(4, max_concurrency), ADMIN: 0, BULK: 0}
+            if max_concurrency > reserved[INTERACTIVE]:
+                reserved[ADMIN] = 1
+        for cls in reserved:
+            if cls not in PRIORITIES:
+                raise ValueError(f"未知的请求类别: {cls}")
+        if sum(reserved.values()) > max_concurrency:
+            raise ValueError("预留槽位总数不能超过最大并发数")
+
+        self.max_concurrency = max_concurrency
+        self.reserved = {cls: reserved.get(cls, 0) for cls in PRIORITIES}
+        self.active = {cls: 0 for cls in PRIORITIES}
+        self._shared = max_concurrency - sum(self.reserved.values())
+        self._waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    def _shared_used(self) -> int:
+        return sum(max(0, self.active[c] - self.reserved[c]) for c in PRIORITIES)
+
+    def _can_acquire(self, cls: str) -> bool:
+        if self.active[cls] < self.reserved[cls]:
+            return True
+        return self._shared_used() < self._shared
+
+    def _dispatch(self) -> None:
+        # 按优先级唤醒所有可以获得槽位的等待者
+        pending = []
+        while self._waiters:
+            item = heapq.heappop(self._waiters)
+            _, _, cls, fut = item
+            if fut.done():
+                continue
+            if self._can_acquire(cls):
+                self.active[cls] += 1
+                fut.set_result(None)
+            else:
+                pending.append(item)
+        for item in pending:
+            heapq.heappush(self._waiters, item)
+
+    async def acquire(self, cls: str) -> None:
+        """获取一个槽位"""
+        if not self._waiters and self._can_acquire(cls):
+            self.active[cls] += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITIES[cls], next(self._seq), cls, fut))
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # 已经分配到槽位但调用方被取消
+                self.release(cls)
+            raise
+
+    def release(self, cls: str) -> None:
+        """释放一个槽位"""
+        self.active[cls] -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, cls: str) -> AsyncIterator[None]:
+        """
+        在上下文中占用一个槽位
+
+        Args:
+            cls (str): 流量类别
+        """
+        await self.acquire(cls)
+        try:
+            yield
+        finally:
+            self.release(cls)
+
+    @property
+    def waiting(self) -> int:
+        """等待中的请求数"""
+        return sum(1 for *_, fut in self._waiters if not fut.done())
+
+    def __repr__(self) -> str:
+        return f"<RequestScheduler active={self.active} waiting={self.waiting}>"
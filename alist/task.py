@@ -0,0 +1,308 @@
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, Generator, List, Mapping, Optional, Tuple
+
+import aiohttp
+
+from . import error
+
+if TYPE_CHECKING:
+    from .main import AList
+
+# 任务状态（与AList服务器一致）
+PENDING = 0
+RUNNING = 1
+SUCCEEDED = 2
+CANCELING = 3
+CANCELED = 4
+ERRORED = 5
+FAILING = 6
+FAILED = 7
+WAITING_RETRY = 8
+BEFORE_RETRY = 9
+
+TERMINAL_STATES = {SUCCEEDED, CANCELED, FAILED}
+
+# 任务类型
+UPLOAD = "upload"
+COPY = "copy"
+MOVE = "move"
+OFFLINE_DOWNLOAD = "offline_download"
+OFFLINE_DOWNLOAD_TRANSFER = "offline_download_transfer"
+
+
+class TaskHandle:
+    """
+    服务器任务句柄，可以直接 `await` 或传给 `asyncio.gather`
+
+    等待时由客户端共享的 `TaskPoller` 批量查询状态，成功时返回句柄本身，
+    失败或被取消时抛出 `TaskError`。
+
+    Attributes:
+        id (str): 任务ID
+        type (str): 任务类型，如 copy / move / upload / offline_download
+        name (str): 任务名称
+        state (int): 任务状态
+        status (str): 状态描述
+        progress (float): 进度(0~100)
+        error (str): 错误信息
+        raw (Mapping): 最近一次获取的原始任务信息
+    """
+
+    def __init__(self, client: "AList", type: str, info: Mapping[str, Any]):
+        self._client = client
+        self.type = type
+        self.id = str(info["id"])
+        self.name = ""
+        self.state = PENDING
+        self.status = ""
+        self.progress = 0.0
+        self.error = ""
+        self.raw: Mapping[str, Any] = {}
+        self._future: Optional[asyncio.Future] = None
+        self._update(info)
+
+    def _update(self, info: Mapping[str, Any]) -> bool:
+        # 更新任务信息，返回状态或进度是否发生变化
+        old = (self.state, self.progress)
+        self.raw = info
+        self.name = info.get("name", self.name)
+        self.state = info.get("state", self.state)
+        self.status = info.get("status", self.status)
+        self.progress = info.get("progress", self.progress) or 0.0
+        self.error = info.get("error", self.error) or ""
+        return (self.state, self.progress) != old
+
+    def _resolve(self, exc: Optional[BaseException] = None) -> None:
+        if self._future is None or self._future.done():
+            return
+        if exc is None:
+            self._future.set_result(None)
+        else:
+            self._future.set_exception(exc)
+
+    @property
+    def done(self) -> bool:
+        """是否已结束（成功、取消或失败）"""
+        return self.state in TERMINAL_STATES
+
+    @property
+    def succeeded(self) -> bool:
+        """是否已成功"""
+        return self.state == SUCCEEDED
+
+    async def wait(self, timeout: Optional[float] = None) -> "TaskHandle":
+        """
+        等待任务结束
+
+        Args:
+            timeout (float): 超时时间(秒)，为None时一直等待
+
+        Returns:
+            (TaskHandle): 任务句柄本身
+
+        Raises:
+            TaskError: 任务失败或被取消
+            asyncio.TimeoutError: 等待超时（任务仍在服务器上运行）
+        """
+        if not self.done:
+            if self._future is None or self._future.done():
+                self._future = asyncio.get_running_loop().create_future()
+            self._client.task_poller.watch(self)
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        if self.state != SUCCEEDED:
+            raise error.TaskError(self)
+        return self
+
+    def __await__(self) -> Generator[Any, None, "TaskHandle"]:
+        return self.wait().__await__()
+
+    async def refresh(self) -> "TaskHandle":
+        """从服务器重新获取任务信息"""
+        self._update(await self._client._task_info(self.type, self.id))
+        return self
+
+    async def cancel(self) -> bool:
+        """取消任务"""
+        return await self._client.cancel_task(self.type, self.id)
+
+    async def retry(self) -> bool:
+        """重试失败的任务"""
+        ok = await self._client.retry_task(self.type, self.id)
+        self.state = WAITING_RETRY
+        return ok
+
+    def __repr__(self) -> str:
+        return f"<TaskHandle {self.type}/{self.id} state={self.state} progress={self.progress}>"
+
+
+class TaskPoller:
+    """
+    共享的任务状态轮询器
+
+    所有等待中的任务由一个后台协程统一轮询：每种任务类型每轮只请求一次
+    未完成列表，有任务离开该列表时再请求一次已完成列表。
+    状态没有变化时轮询间隔按 `backoff` 倍增，直到 `max_interval`；
+    有变化或有新任务加入时恢复为 `min_interval`。
+
+    Attributes:
+        min_interval (float): 最短轮询间隔(秒)
+        max_interval (float): 最长轮询间隔(秒)
+        backoff (float): 无变化时间隔的增长倍数
+        max_errors (int): 连续多少次轮询失败后放弃并向等待者抛出异常
+    """
+
+    def __init__(
+        self,
+        client: "AList",
+        min_interval: float = 0.5,
+        max_interval: float = 10.0,
+        backoff: float = 1.5,
+        max_errors: int = 5,
+    ):
+        """
+        初始化
+
+        Args:
+            client (AList): AList客户端
+            min_interval (float): 最短轮询间隔(秒)
+            max_interval (float): 最长轮询间隔(秒)
+            backoff (float): 无变化时间隔的增长倍数
+            max_errors (int): 连续多少次轮询失败后放弃
+        """
+        self._client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_errors = max_errors
+        self.interval = min_interval
+        self._watching: Dict[Tuple[str, str], TaskHandle] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def handle(self, type: str, info: Mapping[str, Any]) -> TaskHandle:
+        """
+        获取任务句柄，轮询中的任务返回已有的对象
+
+        Args:
+            type (str): 任务类型
+            info (Mapping): 服务器返回的任务信息
+
+        Returns:
+            (TaskHandle): 任务句柄
+        """
+        h = self._watching.get((type, str(info["id"])))
+        if h is None:
+            return TaskHandle(self._client, type, info)
+        h._update(info)
+        return h
+
+    def watch(self, handle: TaskHandle) -> None:
+        """
+        开始轮询任务直到结束
+
+        Args:
+            handle (TaskHandle): 任务句柄
+        """
+        self._watching[(handle.type, handle.id)] = handle
+        self.interval = self.min_interval
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+        elif self._wake is not None:
+            self._wake.set()
+
+    @property
+    def watching(self) -> int:
+        """轮询中的任务数"""
+        return len(self._watching)
+
+    def _finish(self, key: Tuple[str, str], exc: Optional[BaseException] = None) -> None:
+        h = self._watching.pop(key)
+        h._resolve(exc)
+
+    async def _poll_type(self, type: str, handles: List[TaskHandle]) -> bool:
+        infos = {
+            str(i["id"]): i for i in await self._client._task_list(type, done=False)
+        }
+        if any(h.id not in infos for h in handles):
+            for i in await self._client._task_list(type, done=True):
+                infos.setdefault(str(i["id"]), i)
+
+        changed = False
+        for h in handles:
+            info = infos.get(h.id)
+            if info is None:
+                # 任务已从服务器上清除，无法得知结果
+                h.state = FAILED
+                h.error = h.error or "任务不存在"
+                self._finish((type, h.id))
+                changed = True
+                continue
+            changed |= h._update(info)
+            if h.done:
+                self._finish((type, h.id))
+        return changed
+
+    async def poll(self) -> bool:
+        """
+        查询一次所有轮询中任务的状态
+
+        Returns:
+            (bool): 是否有任务的状态或进度发生变化
+        """
+        by_type: Dict[str, List[TaskHandle]] = {}
+        for (type, _), h in self._watching.items():
+            by_type.setdefault(type, []).append(h)
+        results = await asyncio.gather(
+            *(self._poll_type(type, hs) for type, hs in by_type.items())
+        )
+        return any(results)
+
+    async def _run(self) -> None:
+        try:
+            await self._loop()
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            # 意外错误（如返回数据格式异常）也要结束等待中的任务，否则wait永远不会返回
+            for key in list(self._watching):
+                self._finish(key, e)
+
+    async def _loop(self) -> None:
+        errors = 0
+        while self._watching:
+            try:
+                changed = await self.poll()
+                errors = 0
+            except (error.AListError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                errors += 1
+                changed = False
+                if errors >= self.max_errors:
+                    for key in list(self._watching):
+                        self._finish(key, e)
+                    return
+            if not self._watching:
+                return
+            if changed:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+            assert self._wake is not None
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self) -> None:
+        """停止后台轮询（服务器上的任务不受影响）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def __repr__(self) -> str:
+        return f"<TaskPoller watching={self.watching} interval={self.interval}>"
@@ -0,0 +1,213 @@
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+
+import aiohttp
+
+from . import error
+from .middleware import READ_PATHS, Handler, Request
+
+if TYPE_CHECKING:
+    from .main import AList
+    from .utils import AListUser
+
+
+def jwt_expiry(token: str) -> Optional[float]:
+    """
+    解析JWT的过期时间（不校验签名）
+
+    Args:
+        token (str): JWT Token
+
+    Returns:
+        (Optional[float]): 过期时间(Unix时间戳)，无法解析时为None
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except (IndexError, ValueError, AttributeError):
+        return None
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+class TokenStore:
+    """
+    登录Token的本地存储
+
+    以 (AList地址, 用户名) 为键保存在一个JSON文件中，写入是原子的，
+    文件权限为仅当前用户可读写。
+
+    Attributes:
+        path (str): 文件路径
+    """
+
+    def __init__(self, path: str):
+        """
+        初始化
+
+        Args:
+            path (str): 文件路径
+        """
+        self.path = path
+
+    @staticmethod
+    def _key(endpoint: str, username: str) -> str:
+        return f"{endpoint.rstrip('/')}#{username}"
+
+    def _read(self) -> Dict[str, str]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, data: Dict[str, str]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def get(self, endpoint: str, username: str, margin: float = 60.0) -> Optional[str]:
+        """
+        获取Token
+
+        Args:
+            endpoint (str): AList地址
+            username (str): 用户名
+            margin (float): 距离过期不足该秒数的Token视为已过期
+
+        Returns:
+            (Optional[str]): Token，不存在或即将过期时为None
+        """
+        token = self._read().get(self._key(endpoint, username))
+        if not token:
+            return None
+        exp = jwt_expiry(token)
+        if exp is not None and exp - time.time() < margin:
+            return None
+        return token
+
+    def set(self, endpoint: str, username: str, token: str) -> None:
+        """保存Token"""
+        data = self._read()
+        data[self._key(endpoint, username)] = token
+        self._write(data)
+
+    def delete(self, endpoint: str, username: str) -> None:
+        """删除Token"""
+        data = self._read()
+        if data.pop(self._key(endpoint, username), None) is not None:
+            self._write(data)
+
+    def __repr__(self) -> str:
+        return f"<TokenStore {self.path}>"
+
+
+def _replayable(request: Request) -> bool:
+    # 流式请求体（异步生成器、文件对象）已被读取，不能再次发送
+    if request.path in READ_PATHS:
+        return True
+    data = request.kwargs.get("data")
+    return data is None or isinstance(data, (str, bytes, bytearray))
+
+
+class AutoLogin:
+    """
+    自动登录中间件
+
+    - 尚未登录时先登录（有 `store` 时优先使用其中未过期的Token）
+    - Token距离过期不足 `refresh_margin` 秒时提前重新登录
+    - 请求返回401时重新登录，请求体可以重放时重试一次
+      （只读接口或 `str` / `bytes` 请求体；流式上传等请求直接返回401结果）
+
+    并发请求同时发现Token失效时只会登录一次，其余请求等待并使用新的Token。
+    需要OTP验证码的账号无法自动登录。
+
+    Attributes:
+        user (AListUser): 登录使用的用户
+        store (Optional[TokenStore]): Token存储
+        refresh_margin (float): 提前重新登录的秒数
+        logins (int): 获取Token的次数（包括从 `store` 读取）
+    """
+
+    def __init__(
+        self,
+        user: "AListUser",
+        store: Optional[TokenStore] = None,
+        refresh_margin: float = 300.0,
+    ):
+        """
+        初始化
+
+        Args:
+            user (AListUser): 登录使用的用户
+            store (TokenStore): Token存储，为None时不保存
+            refresh_margin (float): 提前重新登录的秒数
+        """
+        self.user = user
+        self.store = store
+        self.refresh_margin = refresh_margin
+        self.logins = 0
+        self._lock = asyncio.Lock()
+        self._token = ""
+        self._exp: Optional[float] = None
+
+    def _expiry(self, token: str) -> Optional[float]:
+        if token != self._token:
+            self._token = token
+            self._exp = jwt_expiry(token)
+        return self._exp
+
+    async def _login(self, client: "AList", stale: str, use_store: bool) -> None:
+        async with self._lock:
+            if client.token != stale:
+                # 其他请求已经重新登录
+                return
+            if not use_store and self.store is not None:
+                self.store.delete(client.endpoint, self.user.un)
+            await client.login(self.user, store=self.store)
+            self.logins += 1
+
+    async def __call__(self, request: Request, next: Handler) -> Dict:
+        if request.path.startswith("/api/auth/"):
+            return await next(request)
+        client = request.client
+        token = client.token
+        if not token:
+            await self._login(client, token, use_store=True)
+        else:
+            exp = self._expiry(token)
+            if exp is not None and exp - time.time() < self.refresh_margin:
+                try:
+                    await self._login(client, token, use_store=False)
+                except (error.AListError, aiohttp.ClientError, asyncio.TimeoutError):
+                    # 提前刷新失败，Token过期前继续使用
+                    if exp <= time.time():
+                        raise
+        if request.headers.get("Authorization") != client.token:
+            request.headers = {**request.headers, "Authorization": client.token}
+
+        used = client.token
+        r = await next(request)
+        if r.get("code") != 401:
+            return r
+        await self._login(client, used, use_store=False)
+        if not _replayable(request):
+            return r
+        request.headers = {**request.headers, "Authorization": client.token}
+        return await next(request)
+
+    def __repr__(self) -> str:
+        return f"<AutoLogin {self.user.un} logins={self.logins}>"
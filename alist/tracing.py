@@ -0,0 +1,315 @@
+import functools
+import inspect
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+import aiohttp
+
+from . import error
+
+logger = logging.getLogger("alist.tracing")
+
+# 当前SDK方法内完成的请求
+_calls: ContextVar[Optional[List["RequestTiming"]]] = ContextVar(
+    "alist_traced_calls", default=None
+)
+
+
+class RequestTiming:
+    """
+    单次HTTP请求各阶段的耗时(秒)
+
+    Attributes:
+        method (str): 请求方法
+        url (str): 请求地址
+        status (Any): 返回码（`code` 字段或HTTP状态码），请求异常时为异常类名
+        dns (float): DNS解析耗时
+        connect (float): 建立连接耗时（不含DNS，包含TLS握手）
+        server (float): 发出请求到收到响应头的耗时
+        body (float): 读取响应体的耗时
+        total (float): 总耗时
+        reused (bool): 是否复用了已有连接
+    """
+
+    __slots__ = (
+        "method",
+        "url",
+        "status",
+        "dns",
+        "connect",
+        "server",
+        "body",
+        "total",
+        "reused",
+        "_start",
+        "_dns_start",
+        "_conn_start",
+        "_conn",
+        "_headers",
+    )
+
+    def __init__(self, method: str, url: str):
+        self.method = method
+        self.url = url
+        self.status: Any = None
+        self.dns = self.connect = self.server = self.body = self.total = 0.0
+        self.reused = False
+        self._start = time.perf_counter()
+        self._dns_start = self._conn_start = self._conn = 0.0
+        self._headers: Optional[float] = None
+
+    def _finish(self, status: Any) -> None:
+        now = time.perf_counter()
+        self.status = status
+        self.total = now - self._start
+        self.connect = max(0.0, self._conn - self.dns)
+        headers = self._headers if self._headers is not None else now
+        self.server = max(0.0, headers - self._start - self._conn)
+        self.body = now - headers
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "method": self.method,
+            "url": self.url,
+            "status": self.status,
+            "dns": self.dns,
+            "connect": self.connect,
+            "server": self.server,
+            "body": self.body,
+            "total": self.total,
+            "reused": self.reused,
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"{self.method} {self.url} {self.status} {self.total:.3f}s "
+            f"(dns {self.dns:.3f}s, connect {self.connect:.3f}s, "
+            f"server {self.server:.3f}s, body {self.body:.3f}s)"
+        )
+
+    def __repr__(self) -> str:
+        return f"<RequestTiming {self}>"
+
+
+def _timing(ctx: SimpleNamespace) -> Optional[RequestTiming]:
+    timing = ctx.trace_request_ctx
+    return timing if isinstance(timing, RequestTiming) else None
+
+
+async def _on_dns_start(session, ctx, params) -> None:
+    timing = _timing(ctx)
+    if timing is not None:
+        timing._dns_start = time.perf_counter()
+
+
+async def _on_dns_end(session, ctx, params) -> None:
+    timing = _timing(ctx)
+    if timing is not None:
+        timing.dns += time.perf_counter() - timing._dns_start
+
+
+async def _on_conn_start(session, ctx, params) -> None:
+    timing = _timing(ctx)
+    if timing is not None:
+        timing._conn_start = time.perf_counter()
+
+
+async def _on_conn_end(session, ctx, params) -> None:
+    timing = _timing(ctx)
+    if timing is not None:
+        timing._conn += time.perf_counter() - timing._conn_start
+
+
+async def _on_conn_reuse(session, ctx, params) -> None:
+    timing = _timing(ctx)
+    if timing is not None:
+        timing.reused = True
+
+
+async def _on_request_end(session, ctx, params) -> None:
+    timing = _timing(ctx)
+    if timing is not None:
+        timing._headers = time.perf_counter()
+
+
+class RequestTracer:
+    """
+    请求追踪
+
+    通过 `aiohttp.TraceConfig` 记录每个请求的DNS、连接、服务器处理和响应体读取耗时；
+    每个SDK方法的耗时超过 `slow_threshold` 时，将该方法内所有请求的分阶段耗时写入日志
+    （logger: `alist.tracing`）。
+    启用OpenTelemetry时，每个SDK方法产生一个span，其中的每次请求（包括对冲、
+    故障转移的重试）和分段下载产生子span。
+
+    Attributes:
+        slow_threshold (Optional[float]): 慢调用阈值(秒)，为None时不记录
+        recent (Deque[RequestTiming]): 最近完成的请求
+        trace_config (aiohttp.TraceConfig): 传给 `aiohttp.ClientSession` 的追踪配置
+    """
+
+    def __init__(
+        self,
+        slow_threshold: Optional[float] = 1.0,
+        opentelemetry: bool = False,
+        keep: int = 100,
+    ):
+        """
+        初始化
+
+        Args:
+            slow_threshold (float): 慢调用阈值(秒)，为None时不记录
+            opentelemetry (bool): 是否产生OpenTelemetry span（需要安装 `opentelemetry-api`）
+            keep (int): 保留的最近请求数
+        """
+        self.slow_threshold = slow_threshold
+        self.recent: Deque[RequestTiming] = deque(maxlen=keep)
+        self._otel: Any = None
+        if opentelemetry:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                raise error.AListError("启用OpenTelemetry需要安装opentelemetry-api")
+            self._otel = trace.get_tracer("alist")
+
+        config = aiohttp.TraceConfig()
+        config.on_dns_resolvehost_start.append(_on_dns_start)
+        config.on_dns_resolvehost_end.append(_on_dns_end)
+        config.on_connection_create_start.append(_on_conn_start)
+        config.on_connection_create_end.append(_on_conn_end)
+        config.on_connection_reuseconn.append(_on_conn_reuse)
+        config.on_request_end.append(_on_request_end)
+        self.trace_config = config
+
+    def start(self, method: str, url: str) -> RequestTiming:
+        """
+        开始记录一个请求，返回值作为 `trace_request_ctx` 传给aiohttp
+
+        Args:
+            method (str): 请求方法
+            url (str): 请求地址
+
+        Returns:
+            (RequestTiming): 请求耗时
+        """
+        return RequestTiming(method, url)
+
+    def finish(self, timing: RequestTiming, status: Any, span: Any = None) -> None:
+        """
+        结束记录一个请求（响应体读取完成后调用）
+
+        Args:
+            timing (RequestTiming): `start` 返回的对象
+            status (Any): 返回码或异常类名
+            span (Any): 请求对应的OpenTelemetry span
+        """
+        timing._finish(status)
+        self.recent.append(timing)
+        if span is not None:
+            span.set_attribute("alist.status", str(status))
+            for phase in ("dns", "connect", "server", "body"):
+                span.set_attribute(f"alist.{phase}_ms", getattr(timing, phase) * 1000)
+        calls = _calls.get()
+        if calls is not None:
+            calls.append(timing)
+        elif self.slow_threshold is not None and timing.total >= self.slow_threshold:
+            logger.warning("慢请求 %s", timing)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Any]:
+        """
+        在OpenTelemetry启用时创建子span，否则返回None
+
+        Args:
+            name (str): span名称
+            **attributes: span属性
+        """
+        if self._otel is None:
+            yield None
+            return
+        with self._otel.start_as_current_span(name, attributes=attributes) as span:
+            yield span
+
+    def _report(
+        self,
+        name: str,
+        parent: Optional[List[RequestTiming]],
+        calls: List[RequestTiming],
+        elapsed: float,
+    ) -> None:
+        if parent is not None:
+            parent.extend(calls)
+        elif self.slow_threshold is not None and elapsed >= self.slow_threshold:
+            logger.warning(
+                "慢调用 %s %.3fs%s",
+                name,
+                elapsed,
+                "".join(f"\n  {t}" for t in calls),
+            )
+
+    def _wrap(self, name: str, func: Any) -> Any:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            parent = _calls.get()
+            calls: List[RequestTiming] = []
+            token = _calls.set(calls)
+            start = time.perf_counter()
+            try:
+                with self.span(f"AList.{name}"):
+                    return await func(*args, **kwargs)
+            finally:
+                _calls.reset(token)
+                self._report(name, parent, calls, time.perf_counter() - start)
+
+        return wrapper
+
+    def _wrap_gen(self, name: str, func: Any) -> Any:
+        # 异步生成器：span覆盖整个迭代过程，耗时为从开始到迭代结束
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            parent = _calls.get()
+            calls: List[RequestTiming] = []
+            start = time.perf_counter()
+            try:
+                with self.span(f"AList.{name}"):
+                    agen = func(*args, **kwargs)
+                    try:
+                        while True:
+                            # 只在生成器内部执行时收集请求，不计入调用方在两次迭代之间的请求
+                            token = _calls.set(calls)
+                            try:
+                                item = await agen.__anext__()
+                            except StopAsyncIteration:
+                                break
+                            finally:
+                                _calls.reset(token)
+                            yield item
+                    finally:
+                        await agen.aclose()
+            finally:
+                self._report(name, parent, calls, time.perf_counter() - start)
+
+        return wrapper
+
+    def instrument(self, client: Any) -> None:
+        """
+        为客户端实例的所有公开异步方法和异步生成器添加追踪（不影响其他实例）
+
+        Args:
+            client (AList): AList客户端
+        """
+        for name, func in inspect.getmembers(type(client)):
+            if name.startswith("_"):
+                continue
+            if inspect.iscoroutinefunction(func):
+                setattr(client, name, self._wrap(name, getattr(client, name)))
+            elif inspect.isasyncgenfunction(func):
+                setattr(client, name, self._wrap_gen(name, getattr(client, name)))
+
+    def __repr__(self) -> str:
+        return f"<RequestTracer slow_threshold={self.slow_threshold}>"
@@ -1,8 +1,29 @@
+import asyncio
 import base64
+import codecs
+import fnmatch
 import hashlib
+import json
+import os
 import pickle
+import re
+import tempfile
+import threading
 import warnings
-from typing import Any, Union
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
 
 from . import error
 
@@ -192,3 +213,679 @@ class AListUser:
 
 def clear_dict(dic):
     return {k: v for k, v in dic.items() if v is not None}
+
+
+_FRACTION = re.compile(r"\.(\d+)")
+
+
+def parse_time(value: Union[str, int, float, datetime]) -> float:
+    """
+    将AList返回的时间转换为Unix时间戳
+
+    Args:
+        value (str, int, float, datetime): ISO 8601 时间字符串、时间戳或datetime
+
+    Returns:
+        (float): Unix时间戳(秒)，无法解析时为0
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        if not value:
+            return 0.0
+        # AList返回7位小数且可能以Z结尾，fromisoformat在旧版本Python中无法解析
+        text = _FRACTION.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), value, 1)
+        if text.endswith("Z"):
+            text = text[:-1] + "+00:00"
+        try:
+            dt = datetime.fromisoformat(text)
+        except ValueError:
+            return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class EntryFilter:
+    """
+    文件条目过滤器，用于在客户端过滤列表或搜索结果
+
+    Attributes:
+        min_size (Optional[int]): 最小大小
+        max_size (Optional[int]): 最大大小
+        is_dir (Optional[bool]): 只保留文件夹/文件
+        types (Optional[set]): 允许的文件类型(AList的type字段)
+        modified_after (Optional[float]): 修改时间下限(时间戳)
+        modified_before (Optional[float]): 修改时间上限(时间戳)
+        glob (Optional[str]): 文件名通配符，包含 `/` 时匹配完整路径
+    """
+
+    def __init__(
+        self,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        is_dir: Optional[bool] = None,
+        types: Optional[Iterable[int]] = None,
+        modified_after: Union[str, float, datetime, None] = None,
+        modified_before: Union[str, float, datetime, None] = None,
+        glob: Optional[str] = None,
+    ):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.is_dir = is_dir
+        self.types = set(types) if types is not None else None
+        self.modified_after = (
+            parse_time(modified_after) if modified_after is not None else None
+        )
+        self.modified_before = (
+            parse_time(modified_before) if modified_before is not None else None
+        )
+        self.glob = glob
+
+    def __call__(self, item: Mapping[str, Any], path: str = "") -> bool:
+        """
+        判断条目是否满足条件
+
+        没有对应字段的条目（如搜索结果不含修改时间）不受该条件限制。
+
+        Args:
+            item (Mapping): AList返回的条目
+            path (str): 条目的完整路径
+
+        Returns:
+            (bool): 是否保留
+        """
+        size = item.get("size")
+        if size is not None:
+            if self.min_size is not None and size < self.min_size:
+                return False
+            if self.max_size is not None and size > self.max_size:
+                return False
+        if self.is_dir is not None and bool(item.get("is_dir")) != self.is_dir:
+            return False
+        if self.types is not None and item.get("type") not in self.types:
+            return False
+        if (
+            self.modified_after is not None or self.modified_before is not None
+        ) and item.get("modified"):
+            modified = parse_time(item["modified"])
+            if self.modified_after is not None and modified < self.modified_after:
+                return False
+            if self.modified_before is not None and modified > self.modified_before:
+                return False
+        if self.glob is not None:
+            target = path if "/" in self.glob else item.get("name", "")
+            if not fnmatch.fnmatchcase(target, self.glob):
+                return False
+        return True
+
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonArrayStream:
+    """
+    从字节流中增量解析JSON数组
+
+    按 `keys` 定位嵌套对象中的数组（如 `("data", "content")`），逐个解码并返回数组元素，
+    内存占用与单个元素大小相关，而与整个响应大小无关。
+    定位过程中跳过的顶层字段（如 `code`、`message`）保存在 `header` 中。
+
+    Attributes:
+        header (Dict[str, Any]): 定位数组前已解析的顶层字段
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], keys: Sequence[str]):
+        """
+        初始化
+
+        Args:
+            chunks (AsyncIterator[bytes]): 响应体字节流
+            keys (Sequence[str]): 数组所在的键路径
+        """
+        self.header: Dict[str, Any] = {}
+        self._chunks = chunks.__aiter__()
+        self._keys = list(keys)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._found: Optional[bool] = None
+
+    async def _fill(self) -> bool:
+        if self._eof:
+            return False
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            self._buf += self._decoder.decode(b"", final=True)
+            return False
+        if self._pos > 65536:
+            # 丢弃已解析的部分
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        self._buf += self._decoder.decode(chunk)
+        return True
+
+    async def _peek(self) -> str:
+        # 跳过空白并返回下一个字符，流结束时返回空字符串
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not await self._fill():
+                return ""
+
+    async def _expect(self, chars: str) -> str:
+        c = await self._peek()
+        if not c or c not in chars:
+            raise ValueError(f"JSON格式错误: 期望 {chars!r}，得到 {c!r}")
+        self._pos += 1
+        return c
+
+    async def _value(self) -> Any:
+        await self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not await self._fill():
+                    raise
+                continue
+            # 数字等值可能被截断，需确认后面还有字符
+            if end == len(self._buf) and not self._eof:
+                await self._fill()
+                continue
+            self._pos = end
+            return value
+
+    async def seek(self) -> bool:
+        """
+        定位到目标数组
+
+        Returns:
+            (bool): 是否找到（目标为 null 时为 False）
+        """
+        if self._found is not None:
+            return self._found
+        self._found = False
+        await self._expect("{")
+        for depth, key in enumerate(self._keys):
+            while True:
+                if await self._peek() == "}":
+                    return False
+                name = await self._value()
+                await self._expect(":")
+                if name == key:
+                    break
+                value = await self._value()
+                if depth == 0:
+                    self.header[name] = value
+                if await self._expect(",}") == "}":
+                    return False
+            c = await self._peek()
+            last = depth == len(self._keys) - 1
+            if c != ("[" if last else "{"):
+                # 目标为 null 或类型不符
+                value = await self._value()
+                if depth == 0:
+                    self.header[key] = value
+                return False
+            self._pos += 1
+        self._found = True
+        return True
+
+    async def __aiter__(self) -> AsyncGenerator[Any, None]:
+        if not await self.seek():
+            return
+        if await self._peek() == "]":
+            return
+        while True:
+            yield await self._value()
+            if await self._expect(",]") == "]":
+                return
+
+
+class AdaptiveChunker:
+    """
+    根据实测吞吐量调整块大小
+
+    使每个块的传输时间接近 `target` 秒：快速链路上使用大块以减少开销，
+    慢速链路上使用小块以保证进度及时更新。
+
+    Attributes:
+        size (int): 当前块大小
+        throughput (float): 平滑后的吞吐量(字节/秒)
+    """
+
+    def __init__(
+        self,
+        initial: int = 1024 * 1024,
+        min_size: int = 64 * 1024,
+        max_size: int = 8 * 1024 * 1024,
+        target: float = 0.25,
+        alpha: float = 0.3,
+    ):
+        """
+        初始化
+
+        Args:
+            initial (int): 初始块大小
+            min_size (int): 最小块大小
+            max_size (int): 最大块大小
+            target (float): 每个块的目标传输时间(秒)
+            alpha (float): 吞吐量平滑系数
+        """
+        if min_size > max_size:
+            raise ValueError("min_size 不能大于 max_size")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target = target
+        self.alpha = alpha
+        self.size = min(max(initial, min_size), max_size)
+        self.throughput = 0.0
+
+    def update(self, nbytes: int, elapsed: float) -> int:
+        """
+        记录一次传输并返回新的块大小
+
+        Args:
+            nbytes (int): 本次传输的字节数
+            elapsed (float): 本次传输耗时(秒)
+
+        Returns:
+            (int): 新的块大小
+        """
+        if nbytes <= 0:
+            return self.size
+        rate = nbytes / max(elapsed, 1e-6)
+        if self.throughput:
+            self.throughput = self.alpha * rate + (1 - self.alpha) * self.throughput
+        else:
+            self.throughput = rate
+        # 对齐到4KiB，且每次最多变化为原来的2倍
+        want = int(self.throughput * self.target) // 4096 * 4096
+        want = min(max(want, self.size // 2, self.min_size), self.size * 2, self.max_size)
+        self.size = want
+        return self.size
+
+
+class TransferStats:
+    """
+    传输统计
+
+    Attributes:
+        bytes (int): 已传输字节数
+        seconds (float): 耗时(秒)
+        read_chunk_size (int): 最后使用的读取块大小
+        write_chunk_size (int): 最后使用的写入块大小
+    """
+
+    def __init__(self):
+        self.bytes = 0
+        self.seconds = 0.0
+        self.read_chunk_size = 0
+        self.write_chunk_size = 0
+
+    @property
+    def throughput(self) -> float:
+        """平均吞吐量(字节/秒)"""
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "bytes": self.bytes,
+            "seconds": self.seconds,
+            "throughput": self.throughput,
+            "read_chunk_size": self.read_chunk_size,
+            "write_chunk_size": self.write_chunk_size,
+        }
+
+    def __repr__(self) -> str:
+        return f"<TransferStats {self.as_dict()}>"
+
+
+class PreallocatedFile:
+    """
+    预分配空间并按偏移写入的本地文件
+
+    按已知大小预先分配磁盘空间以减少碎片，数据通过 `pwrite` 写入固定偏移，
+    多个分段可以并发写入同一文件而无需合并。
+    打开、预分配和写入都在线程池中执行，不阻塞事件循环；
+    作为异步上下文管理器使用时，关闭前会等待所有仍在执行的写入完成。
+
+    Attributes:
+        path (str): 文件路径
+        size (int): 预分配的大小
+    """
+
+    def __init__(self, path: str, size: int = 0):
+        """
+        初始化
+
+        Args:
+            path (str): 文件路径
+            size (int): 预分配的大小，为0时不预分配
+        """
+        self.path = path
+        self.size = size
+        flags = os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        self._fd = os.open(path, flags, 0o666)
+        if size > 0:
+            try:
+                if hasattr(os, "posix_fallocate"):
+                    os.posix_fallocate(self._fd, 0, size)
+                else:
+                    os.ftruncate(self._fd, size)
+            except OSError:
+                # 部分文件系统不支持fallocate
+                os.ftruncate(self._fd, size)
+        # 没有pwrite时lseek和write必须一起执行
+        self._seek_lock = threading.Lock()
+        self._pending: Set[asyncio.Future] = set()
+
+    @classmethod
+    async def open(cls, path: str, size: int = 0) -> "PreallocatedFile":
+        """
+        在线程池中打开文件并预分配空间
+
+        Args:
+            path (str): 文件路径
+            size (int): 预分配的大小，为0时不预分配
+
+        Returns:
+            (PreallocatedFile): 文件对象
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, cls, path, size)
+
+    def _write_at(self, offset: int, data: bytes) -> int:
+        view = memoryview(data)
+        written = 0
+        while written < len(view):
+            if hasattr(os, "pwrite"):
+                n = os.pwrite(self._fd, view[written:], offset + written)
+            else:
+                with self._seek_lock:
+                    os.lseek(self._fd, offset + written, os.SEEK_SET)
+                    n = os.write(self._fd, view[written:])
+            written += n
+        return written
+
+    async def write_at(self, offset: int, data: bytes) -> int:
+        """
+        在指定偏移写入数据
+
+        Args:
+            offset (int): 偏移
+            data (bytes): 数据
+
+        Returns:
+            (int): 写入的字节数
+        """
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(None, self._write_at, offset, data)
+        self._pending.add(fut)
+        fut.add_done_callback(self._pending.discard)
+        # 调用方被取消时写入仍在线程中进行，由 aclose 等待其完成
+        return await asyncio.shield(fut)
+
+    def truncate(self, size: int) -> None:
+        """截断到指定大小"""
+        os.ftruncate(self._fd, size)
+
+    def close(self) -> None:
+        """关闭文件"""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    async def aclose(self) -> None:
+        """等待进行中的写入完成后关闭文件"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        self.close()
+
+    def __enter__(self) -> "PreallocatedFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "PreallocatedFile":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+
+class StreamHasher:
+    """
+    流式计算并校验文件摘要
+
+    只计算服务器在 `hash_info` 中提供的算法（md5 / sha1 / sha256）。
+    每块数据在线程池中增量计算，与下一块的网络读取并行，不阻塞事件循环。
+
+    Attributes:
+        expected (Dict[str, str]): 服务器提供的摘要
+    """
+
+    ALGORITHMS = ("md5", "sha1", "sha256")
+
+    def __init__(self, expected: Optional[Mapping[str, Any]]):
+        """
+        初始化
+
+        Args:
+            expected (Mapping): AList返回的 `hash_info`
+        """
+        if not isinstance(expected, Mapping):
+            expected = {}
+        self.expected = {
+            algo: str(expected[algo]).lower()
+            for algo in self.ALGORITHMS
+            if expected.get(algo)
+        }
+        self._hashes = {algo: hashlib.new(algo) for algo in self.expected}
+        self._pending: Optional[asyncio.Future] = None
+
+    @property
+    def enabled(self) -> bool:
+        """是否有需要校验的摘要"""
+        return bool(self._hashes)
+
+    def _update(self, data: bytes) -> None:
+        for h in self._hashes.values():
+            h.update(data)
+
+    async def update(self, data: bytes) -> None:
+        """
+        提交一块数据（等待上一块计算完成后立即返回，不等待本块）
+
+        Args:
+            data (bytes): 数据，提交后不能再修改
+        """
+        if not self._hashes:
+            return
+        if self._pending is not None:
+            await self._pending
+        self._pending = asyncio.get_running_loop().run_in_executor(
+            None, self._update, data
+        )
+
+    async def update_file(self, path: str, chunk_size: int = 1024 * 1024) -> None:
+        """
+        计算本地文件的摘要
+
+        Args:
+            path (str): 本地路径
+            chunk_size (int): 块大小
+        """
+        if not self._hashes:
+            return
+
+        def run():
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    self._update(chunk)
+
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(None, run)
+
+    async def flush(self) -> None:
+        """等待已提交的数据计算完成"""
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            await pending
+
+    async def digests(self) -> Dict[str, str]:
+        """
+        获取计算出的摘要
+
+        Returns:
+            (Dict[str, str]): 算法到十六进制摘要的映射
+        """
+        await self.flush()
+        return {algo: h.hexdigest() for algo, h in self._hashes.items()}
+
+    async def verify(self, path: str) -> Dict[str, str]:
+        """
+        校验摘要
+
+        Args:
+            path (str): 文件路径，用于错误信息
+
+        Returns:
+            (Dict[str, str]): 计算出的摘要
+
+        Raises:
+            IntegrityError: 摘要不一致
+        """
+        digests = await self.digests()
+        for algo, actual in digests.items():
+            if actual != self.expected[algo]:
+                raise error.IntegrityError(path, algo, self.expected[algo], actual)
+        return digests
+
+
+def _hash_file(path: str, algorithm: str, chunk_size: int = 1024 * 1024) -> str:
+    # 在子进程中运行，必须是模块级函数
+    h = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class LocalHasher:
+    """
+    本地文件摘要计算器
+
+    多个文件在进程池中并行计算，单个文件在线程中计算（hashlib计算时释放GIL）。
+    结果按 (设备, inode, 大小, 修改时间) 缓存，文件未变化时不再重复读取；
+    指定 `path` 时缓存保存在JSON文件中，可跨进程复用。
+
+    Attributes:
+        max_workers (Optional[int]): 进程池大小，默认为CPU核数
+        path (Optional[str]): 缓存文件路径
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, path: Optional[str] = None):
+        """
+        初始化
+
+        Args:
+            max_workers (int): 进程池大小，默认为CPU核数
+            path (str): 缓存文件路径，为None时只缓存在内存中
+        """
+        self.max_workers = max_workers
+        self.path = path
+        self._memo: Dict[str, str] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        if path is not None and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._memo = json.load(f)
+
+    @staticmethod
+    def _key(path: str, algorithm: str) -> str:
+        st = os.stat(path)
+        return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}:{algorithm}"
+
+    async def digest_many(
+        self, paths: Iterable[str], algorithm: str = "sha256"
+    ) -> Dict[str, str]:
+        """
+        计算多个文件的摘要
+
+        Args:
+            paths (Iterable[str]): 本地路径
+            algorithm (str): 摘要算法
+
+        Returns:
+            (Dict[str, str]): 路径到十六进制摘要的映射
+        """
+        result: Dict[str, str] = {}
+        todo: Dict[str, str] = {}
+        for path in paths:
+            key = self._key(path, algorithm)
+            if key in self._memo:
+                result[path] = self._memo[key]
+            else:
+                todo[path] = key
+        if not todo:
+            return result
+
+        executor = None
+        if len(todo) > 1:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            executor = self._executor
+        loop = asyncio.get_running_loop()
+        digests = await asyncio.gather(
+            *(loop.run_in_executor(executor, _hash_file, p, algorithm) for p in todo)
+        )
+        for (path, key), digest in zip(todo.items(), digests):
+            self._memo[key] = result[path] = digest
+        return result
+
+    async def digest(self, path: str, algorithm: str = "sha256") -> str:
+        """
+        计算单个文件的摘要
+
+        Args:
+            path (str): 本地路径
+            algorithm (str): 摘要算法
+
+        Returns:
+            (str): 十六进制摘要
+        """
+        return (await self.digest_many([path], algorithm))[path]
+
+    def save(self) -> None:
+        """将缓存写入 `path`"""
+        if self.path is None:
+            return
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._memo, f)
+        os.replace(tmp, self.path)
+
+    def close(self) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __len__(self) -> int:
+        return len(self._memo)
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import posixpath
+import time
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Dict, List, Mapping, Optional, Tuple
+
+from . import error
+
+if TYPE_CHECKING:
+    from .main import AList
+
+CREATED = "created"
+MODIFIED = "modified"
+DELETED = "deleted"
+
+
+class WatchEvent:
+    """
+    目录变化事件
+
+    Attributes:
+        type (str): created / modified / deleted
+        path (str): 路径
+        is_dir (bool): 是否为文件夹
+        entry (Mapping): AList返回的条目（deleted事件为最后一次看到的条目）
+    """
+
+    __slots__ = ("type", "path", "is_dir", "entry")
+
+    def __init__(self, type: str, path: str, is_dir: bool, entry: Mapping[str, Any]):
+        self.type = type
+        self.path = path
+        self.is_dir = is_dir
+        self.entry = entry
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, WatchEvent):
+            return NotImplemented
+        return (self.type, self.path) == (other.type, other.path)
+
+    def __hash__(self) -> int:
+        return hash((self.type, self.path))
+
+    def __repr__(self) -> str:
+        return f"<WatchEvent {self.type} {self.path}>"
+
+
+class _DirState:
+    __slots__ = ("modified", "entries", "interval", "due")
+
+    def __init__(self, interval: float):
+        self.modified: Optional[str] = None
+        self.entries: Dict[str, Mapping[str, Any]] = {}
+        self.interval = interval
+        self.due = 0.0
+
+
+def _signature(item: Mapping[str, Any]) -> Tuple:
+    return (item.get("is_dir"), item.get("size"), item.get("modified"))
+
+
+class Watcher:
+    """
+    轮询远程目录树的变化
+
+    保存每个目录的修改时间和条目快照，只重新列出修改时间发生变化的目录。
+    每个目录有独立的轮询间隔：有变化时缩短，无变化时逐渐延长。
+
+    Attributes:
+        root (str): 监视的根目录
+        interval (float): 初始轮询间隔(秒)
+        min_interval (float): 最短轮询间隔(秒)
+        max_interval (float): 最长轮询间隔(秒)
+    """
+
+    def __init__(
+        self,
+        client: "AList",
+        root: str = "/",
+        interval: float = 10.0,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        concurrency: int = 8,
+        password: str = "",
+        refresh: bool = False,
+    ):
+        """
+        初始化
+
+        Args:
+            client (AList): AList客户端
+            root (str): 监视的根目录
+            interval (float): 初始轮询间隔(秒)
+            min_interval (float): 最短轮询间隔，默认为 interval/4
+            max_interval (float): 最长轮询间隔，默认为 interval*8
+            concurrency (int): 最大并发请求数
+            password (str): 目录密码
+            refresh (bool): 重新列目录时是否强制服务器刷新缓存
+        """
+        self.client = client
+        self.root = root.rstrip("/") or "/"
+        self.interval = interval
+        self.min_interval = min_interval if min_interval is not None else interval / 4
+        self.max_interval = max_interval if max_interval is not None else interval * 8
+        self.concurrency = concurrency
+        self.password = password
+        self.refresh = refresh
+        self._dirs: Dict[str, _DirState] = {}
+        self._sem = asyncio.Semaphore(concurrency)
+
+    async def snapshot(self) -> None:
+        """遍历目录树，建立初始快照（不产生事件）"""
+        self._dirs.clear()
+        modified: Dict[str, str] = {}
+
+        def descend(path: str, item: Mapping[str, Any]) -> bool:
+            modified[path] = item.get("modified", "")
+            return True
+
+        now = time.monotonic()
+        async for path, data in self.client._walk(
+            self.root, self.concurrency, self.password, descend=descend
+        ):
+            state = _DirState(self.interval)
+            state.modified = modified.get(path)
+            state.entries = {item["name"]: item for item in data["content"] or []}
+            state.due = now + self.interval
+            self._dirs[path] = state
+
+        if self._dirs.get(self.root) and self._dirs[self.root].modified is None:
+            self._dirs[self.root].modified = await self._stat(self.root)
+
+    async def _stat(self, path: str) -> Optional[str]:
+        data = {"path": path, "password": self.password}
+        async with self._sem:
+            r = await self.client._idempotent_request(
+                "POST", "/api/fs/get", data=json.dumps(data)
+            )
+        if r["code"] != 200 or not r["data"]:
+            return None
+        return r["data"].get("modified", "")
+
+    def _drop(self, path: str, events: List[WatchEvent]) -> None:
+        # 删除目录及其子树的状态，为所有已知子项产生删除事件
+        state = self._dirs.pop(path, None)
+        if state is None:
+            return
+        for name, item in state.entries.items():
+            child = posixpath.join(path, name)
+            if item.get("is_dir"):
+                self._drop(child, events)
+            events.append(WatchEvent(DELETED, child, bool(item.get("is_dir")), item))
+
+    async def _check(self, path: str, now: float) -> List[WatchEvent]:
+        state = self._dirs.get(path)
+        if state is None:
+            return []
+        events: List[WatchEvent] = []
+
+        # 目录修改时间未变化则无需重新列出
+        if state.modified:
+            modified = await self._stat(path)
+            if modified == state.modified:
+                state.interval = min(self.max_interval, state.interval * 1.5)
+                state.due = now + state.interval
+                return events
+        else:
+            modified = None
+
+        async with self._sem:
+            try:
+                data = await self.client._list_raw(path, self.password, self.refresh)
+            except error.ServerError:
+                # 目录已被删除，由父目录产生事件
+                if path == self.root:
+                    self._drop(path, events)
+                return events
+        if self._dirs.get(path) is not state:
+            # 检查期间目录已随父目录一起被删除
+            return events
+        content = {item["name"]: item for item in data["content"] or []}
+
+        for name, item in content.items():
+            child = posixpath.join(path, name)
+            old = state.entries.get(name)
+            is_dir = bool(item.get("is_dir"))
+            if old is None:
+                events.append(WatchEvent(CREATED, child, is_dir, item))
+                if is_dir:
+                    new = self._dirs[child] = _DirState(self.min_interval)
+                    new.modified = None
+            elif _signature(old) != _signature(item):
+                if is_dir:
+                    # 子目录内容发生变化，立即检查
+                    if child in self._dirs:
+                        self._dirs[child].due = 0.0
+                else:
+                    events.append(WatchEvent(MODIFIED, child, is_dir, item))
+        for name, old in state.entries.items():
+            if name not in content:
+                child = posixpath.join(path, name)
+                if old.get("is_dir"):
+                    self._drop(child, events)
+                events.append(WatchEvent(DELETED, child, bool(old.get("is_dir")), old))
+
+        state.entries = content
+        state.modified = modified if modified is not None else await self._stat(path)
+        if events:
+            state.interval = max(self.min_interval, state.interval / 2)
+        else:
+            state.interval = min(self.max_interval, state.interval * 1.5)
+        state.due = now + state.interval
+        return events
+
+    async def poll(self) -> List[WatchEvent]:
+        """
+        检查所有到期的目录
+
+        Returns:
+            (List[WatchEvent]): 本轮产生的事件
+        """
+        if not self._dirs:
+            await self.snapshot()
+            return []
+        events: List[WatchEvent] = []
+        checked = set()
+        while True:
+            # 本轮新发现或被标记的目录在同一轮中继续检查
+            now = time.monotonic()
+            due = [
+                p for p, s in self._dirs.items() if s.due <= now and p not in checked
+            ]
+            if not due:
+                break
+            checked.update(due)
+            for result in await asyncio.gather(*(self._check(p, now) for p in due)):
+                events.extend(result)
+        return events
+
+    def next_due(self) -> float:
+        """距离下一个目录到期的秒数"""
+        if not self._dirs:
+            return 0.0
+        return max(0.0, min(s.due for s in self._dirs.values()) - time.monotonic())
+
+    async def __aiter__(self) -> AsyncGenerator[WatchEvent, None]:
+        while True:
+            for event in await self.poll():
+                yield event
+            await asyncio.sleep(self.next_due())
@@ -1,5 +1,10 @@
+import hashlib
+import json
+import posixpath
+from urllib.parse import unquote
+
 import pytest
-from aioresponses import aioresponses
+from aioresponses import CallbackResult, aioresponses
 
 import alist
 
@@ -105,3 +110,231 @@ async def test_list_dir_folder():
         ):
             assert i.path == "/Alist V3.md"
             assert i.is_dir is False
+
+
+@pytest.mark.asyncio
+async def test_stat_many():
+    with aioresponses() as m:
+        m.post(
+            "http://test/api/fs/list",
+            payload={
+                "code": 200,
+                "message": "success",
+                "data": {
+                    "content": [
+                        {"name": f"{i}.txt", "is_dir": False, "size": i}
+                        for i in range(4)
+                    ]
+                    + [{"name": "sub", "is_dir": True, "size": 0}],
+                    "provider": "Local",
+                },
+            },
+        )
+        m.post(
+            "http://test/api/fs/get",
+            payload={
+                "code": 200,
+                "message": "success",
+                "data": {"name": "b.txt", "is_dir": False, "size": 9},
+            },
+        )
+        alis = alist.AList("http://test")
+        paths = ["/a/0.txt", "/a/1.txt", "/a/2.txt", "/a/sub", "/a/0.txt", "/b.txt"]
+        result = {str(i): i async for i in alis.stat_many(paths)}
+        assert set(result) == {"/a/0.txt", "/a/1.txt", "/a/2.txt", "/a/sub", "/b.txt"}
+        assert isinstance(result["/a/sub"], alist.AListFolder)
+        assert result["/a/2.txt"].size == 2
+        assert result["/a/2.txt"].url == "http://test/d/a/2.txt"
+        assert result["/b.txt"].size == 9
+
+
+@pytest.mark.asyncio
+async def test_iter_search():
+    def page(names, total):
+        return {
+            "code": 200,
+            "message": "success",
+            "data": {
+                "content": [
+                    {"parent": "/a", "name": n, "is_dir": False, "size": s, "type": 0}
+                    for n, s in names
+                ],
+                "total": total,
+            },
+        }
+
+    with aioresponses() as m:
+        m.post("http://test/api/fs/search", payload=page([("1.mkv", 10), ("2.txt", 1)], 4))
+        m.post("http://test/api/fs/search", payload=page([("3.mkv", 30), ("4.mkv", 1)], 4))
+        alis = alist.AList("http://test")
+        flt = alist.utils.EntryFilter(min_size=5, glob="*.mkv")
+        result = [i.path async for i in alis.iter_search("x", per_page=2, filter=flt)]
+        assert result == ["/a/1.mkv", "/a/3.mkv"]
+
+
+@pytest.mark.asyncio
+async def test_list_dir_stream():
+    with aioresponses() as m:
+        m.post(
+            "http://test/api/fs/list",
+            payload={
+                "code": 200,
+                "message": "success",
+                "data": {
+                    "content": [
+                        {"name": f"{i}.md", "is_dir": i == 0} for i in range(3)
+                    ],
+                    "total": 3,
+                },
+            },
+        )
+        m.post(
+            "http://test/api/fs/list",
+            payload={"code": 500, "message": "failed", "data": None},
+        )
+        alis = alist.AList("http://test")
+        items = [i async for i in alis.list_dir("/", stream=True)]
+        assert [i.path for i in items] == ["/0.md", "/1.md", "/2.md"]
+        assert items[0].is_dir is True
+        with pytest.raises(alist.ServerError):
+            async for _ in alis.list_dir("/", stream=True):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_walk_dirs():
+    tree = {
+        "/": ["media", "docs"],
+        "/media": ["tv"],
+        "/media/tv": ["Show"],
+        "/media/tv/Show": [],
+        "/docs": [],
+    }
+
+    def dirs_callback(url, **kwargs):
+        path = json.loads(kwargs["data"])["path"]
+        content = [{"name": n, "modified": "2024-01-01T00:00:00Z"} for n in tree[path]]
+        return CallbackResult(payload={"code": 200, "message": "success", "data": content})
+
+    with aioresponses() as m:
+        m.post("http://test/api/fs/dirs", callback=dirs_callback, repeat=True)
+        al = alist.AList("http://test")
+        folders = [i.path async for i in al.walk_dirs("/")]
+        assert sorted(folders) == ["/docs", "/media", "/media/tv", "/media/tv/Show"]
+        assert [i.name async for i in al.list_folders("/media")] == ["tv"]
+
+
+@pytest.mark.asyncio
+async def test_upload_skip_existing(tmp_path):
+    content = {f"{i}.txt": f"data {i}".encode() for i in range(5)}
+    for name, data in content.items():
+        (tmp_path / name).write_bytes(data)
+    # 3.txt 内容不同但大小相同，4.txt 远程不存在
+    remote = {
+        name: {
+            "name": name,
+            "is_dir": False,
+            "size": len(data),
+            "hash_info": {"md5": hashlib.md5(data).hexdigest()},
+        }
+        for name, data in content.items()
+        if name != "4.txt"
+    }
+    remote["3.txt"]["hash_info"] = {"md5": "0" * 32}
+    puts = []
+
+    def get(url, data=None, **kwargs):
+        item = remote.get(posixpath.basename(json.loads(data)["path"]))
+        if item is None:
+            return CallbackResult(payload={"code": 500, "message": "not found"})
+        return CallbackResult(payload={"code": 200, "message": "success", "data": item})
+
+    def put(url, headers=None, **kwargs):
+        puts.append(unquote(headers["File-Path"]))
+        return CallbackResult(payload={"code": 200, "message": "success", "data": None})
+
+    with aioresponses() as m:
+        m.post(
+            "http://test/api/fs/list",
+            payload={
+                "code": 200,
+                "message": "success",
+                "data": {"content": list(remote.values()), "provider": "Local"},
+            },
+            repeat=True,
+        )
+        m.post("http://test/api/fs/get", callback=get, repeat=True)
+        m.put("http://test/api/fs/put", callback=put, repeat=True)
+        alis = alist.AList("http://test")
+        files = {f"/a/{name}": str(tmp_path / name) for name in content}
+
+        result = await alis.upload_many(files, skip_existing="hash")
+        assert sorted(puts) == ["/a/3.txt", "/a/4.txt"]
+        skipped = [p for p, sent in result.items() if not sent]
+        assert skipped == ["/a/0.txt", "/a/1.txt", "/a/2.txt"]
+
+        puts.clear()
+        await alis.upload_many(files, skip_existing="size")
+        assert puts == ["/a/4.txt"]
+
+        puts.clear()
+        await alis.upload("/a/0.txt", content["0.txt"], skip_existing="hash")
+        await alis.upload("/a/0.txt", b"other", skip_existing="hash")
+        assert puts == ["/a/0.txt"]
+
+
+@pytest.mark.asyncio
+async def test_local_hasher(tmp_path):
+    paths = []
+    for i in range(3):
+        (tmp_path / f"{i}").write_bytes(bytes([i]) * 1000)
+        paths.append(str(tmp_path / f"{i}"))
+    hasher = alist.utils.LocalHasher(max_workers=2, path=str(tmp_path / "memo.json"))
+    try:
+        digests = await hasher.digest_many(paths, "sha1")
+    finally:
+        hasher.close()
+    assert digests[paths[1]] == hashlib.sha1(b"\x01" * 1000).hexdigest()
+    hasher.save()
+
+    # 重新加载后无需再次计算
+    hasher = alist.utils.LocalHasher(path=str(tmp_path / "memo.json"))
+    assert len(hasher) == 3
+    assert await hasher.digest(paths[2], "sha1") == digests[paths[2]]
+    assert hasher._executor is None
+
+
+@pytest.mark.asyncio
+async def test_client_local_hasher(tmp_path):
+    paths = []
+    for i in range(2):
+        (tmp_path / f"{i}").write_bytes(bytes([i]) * 100)
+        paths.append(str(tmp_path / f"{i}"))
+    async with alist.AList("http://test") as alis:
+        assert alis._local_hasher is None
+        await alis.local_hasher.digest_many(paths, "md5")
+        hasher = alis.local_hasher
+        assert hasher._executor is not None
+    # 客户端创建的进程池在关闭时释放
+    assert hasher._executor is None
+
+    shared = alist.utils.LocalHasher()
+    async with alist.AList("http://test", local_hasher=shared) as alis:
+        assert alis.local_hasher is shared
+        await shared.digest_many(paths, "md5")
+    # 外部传入的不由客户端关闭
+    assert shared._executor is not None
+    shared.close()
+
+
+@pytest.mark.asyncio
+async def test_upload_skip_existing_error(tmp_path):
+    with aioresponses() as m:
+        m.post(
+            "http://test/api/fs/get",
+            payload={"code": 401, "message": "token is invalidated"},
+        )
+        alis = alist.AList("http://test")
+        # 认证错误不应被当作文件不存在而重新上传
+        with pytest.raises(alist.ServerError):
+            await alis.upload("/a.txt", b"data", skip_existing="size")
@@ -0,0 +1,136 @@
+import hashlib
+import os
+
+import pytest
+from aioresponses import aioresponses
+
+import alist
+
+get_payload = {
+    "code": 200,
+    "message": "success",
+    "data": {
+        "name": "a.txt",
+        "size": 11,
+        "is_dir": False,
+        "modified": "2024-05-17T16:05:36.4651534+08:00",
+        "raw_url": "http://test/d/a.txt",
+        "provider": "Local",
+    },
+}
+
+
+@pytest.mark.asyncio
+async def test_cache_download(tmp_path):
+    cache = alist.ContentCache(str(tmp_path / "cache"))
+    al = alist.AList("http://test", cache=cache)
+    with aioresponses() as m:
+        m.post("http://test/api/fs/get", payload=get_payload, repeat=True)
+        # 文件内容只注册一次，第二次必须命中缓存
+        m.get("http://test/d/a.txt", body=b"Hello World")
+        async with await al.open("/a.txt") as f:
+            assert await f.read() == b"Hello World"
+        async with await al.open("/a.txt") as f:
+            assert await f.read() == b"Hello World"
+        f = await al.open("/a.txt")
+        await f.download_to(str(tmp_path / "out.txt"))
+    assert (tmp_path / "out.txt").read_bytes() == b"Hello World"
+    assert cache.hits == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_unverified(tmp_path):
+    cache = alist.ContentCache(str(tmp_path / "cache"))
+    al = alist.AList("http://test", cache=cache)
+    hashed = {"code": 200, "message": "success", "data": {**get_payload["data"]}}
+    hashed["data"]["hash_info"] = {"md5": hashlib.md5(b"Hello World").hexdigest()}
+    with aioresponses() as m:
+        m.post("http://test/api/fs/get", payload=hashed, repeat=True)
+        m.get("http://test/d/a.txt", body=b"Hello Wordl", repeat=True)
+        # 未校验的内容不写入缓存
+        f = await al.open("/a.txt")
+        await f.download_to(str(tmp_path / "out.txt"), verify=False)
+        assert len(cache) == 0
+
+    # 缓存中的内容被破坏时，删除该缓存并重新下载
+    key = alist.ContentCache.key_for("http://test", "/a.txt", hashed["data"])
+    writer = cache.writer(key)
+    await writer.write(b"Hello Wordl")
+    writer.commit()
+    assert key in cache
+    with aioresponses() as m:
+        m.post("http://test/api/fs/get", payload=hashed, repeat=True)
+        m.get("http://test/d/a.txt", body=b"Hello World", repeat=True)
+        f = await al.open("/a.txt")
+        await f.download_to(str(tmp_path / "out2.txt"))
+        assert (tmp_path / "out2.txt").read_bytes() == b"Hello World"
+        # 重新下载的内容写入缓存，替换了损坏的条目
+        with open(cache.get(key), "rb") as c:
+            assert c.read() == b"Hello World"
+
+        cache.discard(key)
+        writer = cache.writer(key)
+        await writer.write(b"Hello Wordl")
+        writer.commit()
+        async with await al.open("/a.txt") as f:
+            assert await f.read() == b"Hello World"
+    with open(cache.get(key), "rb") as c:
+        assert c.read() == b"Hello World"
+
+    # 重新下载的内容也不一致时抛出异常，损坏的缓存已被删除
+    cache.discard(key)
+    writer = cache.writer(key)
+    await writer.write(b"Hello Wordl")
+    writer.commit()
+    with aioresponses() as m:
+        m.post("http://test/api/fs/get", payload=hashed, repeat=True)
+        m.get("http://test/d/a.txt", body=b"Hello Wordl")
+        f = await al.open("/a.txt")
+        with pytest.raises(alist.IntegrityError):
+            await f.download_to(str(tmp_path / "out3.txt"))
+    assert key not in cache
+
+
+def test_cache_key():
+    init = {"size": 1, "modified": "x", "hash_info": {"md5": "ABC"}}
+    assert alist.ContentCache.key_for("http://a", "/1", init) == "md5-abc"
+    init = {"size": 1, "modified": "x", "hash_info": None}
+    k1 = alist.ContentCache.key_for("http://a", "/1", init)
+    k2 = alist.ContentCache.key_for("http://a", "/1", {**init, "modified": "y"})
+    assert k1 != k2
+
+
+@pytest.mark.asyncio
+async def test_cache_lru(tmp_path):
+    cache = alist.ContentCache(str(tmp_path), max_bytes=10)
+    for key in ("sha256-aa", "sha256-bb", "sha256-cc"):
+        w = cache.writer(key)
+        await w.write(b"12345")
+        w.commit()
+        if key == "sha256-bb":
+            # 访问aa后，bb成为最久未使用的条目
+            assert cache.get("sha256-aa")
+    assert "sha256-bb" not in cache
+    assert "sha256-aa" in cache and "sha256-cc" in cache
+    assert cache.total == 10
+    assert not os.listdir(tmp_path / "tmp")
+    assert len(alist.ContentCache(str(tmp_path), max_bytes=10)) == 2
+
+
+def test_cache_isolated_from_destination(tmp_path):
+    cache = alist.ContentCache(str(tmp_path / "cache"))
+    src = tmp_path / "src.txt"
+    src.write_bytes(b"original")
+    cache.add_file("k", str(src))
+    # 修改加入缓存的文件不影响缓存
+    src.write_bytes(b"edited")
+    with open(cache.get("k"), "rb") as f:
+        assert f.read() == b"original"
+
+    dst = tmp_path / "dst.txt"
+    assert cache.materialize("k", str(dst))
+    with open(dst, "r+b") as f:
+        f.truncate(0)
+    with open(cache.get("k"), "rb") as f:
+        assert f.read() == b"original"
+    assert sorted(os.listdir(tmp_path)) == ["cache", "dst.txt", "src.txt"]
@@ -0,0 +1,82 @@
+import base64
+import os
+import pickle
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("asyncclick")
+pytest.importorskip("rich")
+
+from alist.cli._store import CredentialStore  # noqa: E402
+
+# alist3 命令自身的导入耗时上限(秒)
+CLI_IMPORT_BUDGET = 0.1
+
+
+def import_times(module):
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in out.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:") :].split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_cli_lazy_imports():
+    modules = import_times("alist.cli")
+    # rich 在首次输出时才导入，访问服务器的命令才导入 aiohttp
+    assert "rich" not in modules
+    assert "aiohttp" not in modules
+
+
+@pytest.mark.skipif(
+    not os.environ.get("ALIST_BENCHMARK"), reason="设置 ALIST_BENCHMARK=1 时运行"
+)
+def test_cli_startup():
+    best = min(import_times("alist.cli")["alist.cli"] for _ in range(3))
+    assert best < CLI_IMPORT_BUDGET
+
+
+def test_credential_store(tmp_path):
+    path = str(tmp_path / "credentials.json")
+    store = CredentialStore(path)
+    store.add("a", "pwd-a", "http://a", tag="t", default=True)
+    store.add("b", "pwd-b", "http://b")
+    token = "x.eyJleHAiOiAxMDAwMDAwMDAwMDB9.y"
+    store.set("http://a", "a", token)
+    # 地址不同时不缓存
+    store.set("http://other", "b", token)
+
+    store = CredentialStore(path)
+    assert store.default == "a"
+    assert store.get("http://a", "a") == token
+    assert store.get("http://b", "b") is None
+    assert oct(os.stat(path).st_mode & 0o777) == "0o600"
+    assert store.remove("a") is True
+    assert store.remove("a") is None
+    assert store.remove("b") is False
+    assert CredentialStore(path).users == {}
+
+
+def test_credential_store_migrate(tmp_path):
+    legacy = tmp_path / "users"
+    legacy.mkdir()
+    user = pickle.dumps(
+        {"username": base64.b64encode(b"admin"), "pwd": base64.b64encode(b"hash")}
+    )
+    with open(legacy / "admin.__default", "wb") as f:
+        pickle.dump({"tag": None, "endpoint": "http://a", "user": user}, f)
+
+    store = CredentialStore(str(tmp_path / "credentials.json"), legacy_dir=str(legacy))
+    assert store.default == "admin"
+    assert store.users["admin"]["pwd"] == "hash"
+    assert os.path.exists(tmp_path / "credentials.json")
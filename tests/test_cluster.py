@@ -0,0 +1,74 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aioresponses import aioresponses
+
+import alist
+
+
+@pytest.mark.asyncio
+async def test_cluster_failover():
+    with aioresponses() as m:
+        m.post("http://a/api/fs/list", exception=aiohttp.ClientConnectionError())
+        m.post(
+            "http://b/api/fs/list",
+            payload={
+                "code": 200,
+                "message": "success",
+                "data": {"content": [{"name": "1.txt", "is_dir": False}]},
+            },
+        )
+        al = alist.AListCluster(["http://a", "http://b"], probe_interval=0)
+        items = [i async for i in al.list_dir("/")]
+        assert items[0].path == "/1.txt"
+        assert al.replicas[0].failures == 1
+        assert al.replicas[1].failures == 0
+
+
+@pytest.mark.asyncio
+async def test_cluster_write_pinned_to_primary():
+    with aioresponses() as m:
+        m.post("http://a/api/fs/mkdir", exception=aiohttp.ClientConnectionError())
+        al = alist.AListCluster(["http://a", "http://b"], probe_interval=0)
+        with pytest.raises(alist.ServerError):
+            await al.mkdir("/test")
+
+
+@pytest.mark.asyncio
+async def test_cluster_check_health():
+    with aioresponses() as m:
+        m.get(
+            "http://a/api/public/settings",
+            payload={"code": 200, "message": "success", "data": {}},
+        )
+        m.get("http://b/api/public/settings", body="error")
+        al = alist.AListCluster(["http://a", "http://b"], probe_interval=0)
+        assert await al.check_health() == {"http://a": True, "http://b": False}
+        assert al.replicas[1].failures == 1
+
+
+@pytest.mark.asyncio
+async def test_cluster_close_cancels_probe():
+    started = asyncio.Event()
+
+    async def hang(url, **kwargs):
+        started.set()
+        await asyncio.sleep(60)
+
+    with aioresponses() as m:
+        m.get("http://a/api/public/settings", callback=hang, repeat=True)
+        m.get("http://b/api/public/settings", callback=hang, repeat=True)
+        m.post(
+            "http://a/api/fs/get",
+            payload={"code": 200, "message": "success", "data": {"name": "/"}},
+        )
+        al = alist.AListCluster(["http://a", "http://b"], probe_interval=1)
+        al._last_probe = 0.0
+        await al._dispatch("POST", "/api/fs/get", json={"path": "/"})
+        task = al._probe_task
+        assert task is not None
+        await asyncio.wait_for(started.wait(), 1)
+        await asyncio.wait_for(al.close(), 1)
+        assert task.cancelled()
+        assert al._probe_task is None
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from aioresponses import CallbackResult, aioresponses
+
+import alist
+
+TREE = {
+    "/": ["media/", "docs/"],
+    "/media": ["tv/", "poster.jpg"],
+    "/media/tv": ["Show/", "S01E01.mkv"],
+    "/media/tv/Show": ["S01E02.mkv", "S02E01.mkv", "S01E03.mp4"],
+    "/docs": ["a.md"],
+}
+
+
+def mock_tree(m, listed, got):
+    def list_callback(url, **kwargs):
+        path = json.loads(kwargs["data"])["path"]
+        listed.append(path)
+        content = [
+            {"name": n.rstrip("/"), "is_dir": n.endswith("/"), "size": 0}
+            for n in TREE[path]
+        ]
+        return CallbackResult(
+            payload={"code": 200, "message": "success", "data": {"content": content}}
+        )
+
+    def get_callback(url, **kwargs):
+        path = json.loads(kwargs["data"])["path"]
+        got.append(path)
+        parent, name = path.rsplit("/", 1)
+        if name in TREE.get(parent or "/", []):
+            data = {"name": name, "is_dir": False, "size": 0}
+            return CallbackResult(payload={"code": 200, "message": "success", "data": data})
+        return CallbackResult(payload={"code": 500, "message": "object not found", "data": None})
+
+    m.post("http://test/api/fs/list", callback=list_callback, repeat=True)
+    m.post("http://test/api/fs/get", callback=get_callback, repeat=True)
+
+
+@pytest.mark.asyncio
+async def test_glob_recursive():
+    with aioresponses() as m:
+        listed, got = [], []
+        mock_tree(m, listed, got)
+        al = alist.AList("http://test")
+        assert await al.glob("/media/**/S0?E*.mkv") == [
+            "/media/tv/S01E01.mkv",
+            "/media/tv/Show/S01E02.mkv",
+            "/media/tv/Show/S02E01.mkv",
+        ]
+        # 不会列出根目录和 /docs
+        assert sorted(listed) == ["/media", "/media/tv", "/media/tv/Show"]
+
+
+@pytest.mark.asyncio
+async def test_glob_literal():
+    with aioresponses() as m:
+        listed, got = [], []
+        mock_tree(m, listed, got)
+        al = alist.AList("http://test")
+        assert await al.glob("/media/poster.jpg") == ["/media/poster.jpg"]
+        assert await al.glob("/media/missing.jpg") == []
+        assert listed == []
+        assert await al.glob("/*/tv/Show/S01E03.mp4") == ["/media/tv/Show/S01E03.mp4"]
+
+
+
+@pytest.mark.asyncio
+async def test_glob_literal_after_recursive():
+    with aioresponses() as m:
+        listed, got = [], []
+        mock_tree(m, listed, got)
+        al = alist.AList("http://test")
+        assert await al.glob("/media/**/S01E02.mkv") == ["/media/tv/Show/S01E02.mkv"]
+        # 展开 ** 时已列出的目录不再逐个 get
+        assert sorted(listed) == ["/media", "/media/tv", "/media/tv/Show"]
+        assert got == []
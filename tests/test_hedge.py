@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+import alist
+
+
+@pytest.mark.asyncio
+async def test_hedge_backup_wins():
+    calls = []
+
+    async def request():
+        calls.append(1)
+        await asyncio.sleep(1 if len(calls) == 1 else 0)
+        return len(calls)
+
+    policy = alist.HedgePolicy(delay=0.01)
+    assert await policy.run("/api/fs/get", request) == 2
+    assert policy.stats == {"requests": 1, "hedged": 1, "hedge_wins": 1}
+
+
+@pytest.mark.asyncio
+async def test_hedge_not_triggered():
+    async def request():
+        return "ok"
+
+    policy = alist.HedgePolicy(delay=1)
+    assert await policy.run("/api/fs/get", request) == "ok"
+    assert policy.stats["hedged"] == 0
+    assert policy.hedge_rate == 0
+
+
+def test_hedge_percentile_delay():
+    policy = alist.HedgePolicy(percentile=0.9, min_samples=10)
+    assert policy.current_delay("/api/fs/get") == policy.initial_delay
+    for i in range(10):
+        policy.observe("/api/fs/get", i / 10)
+    assert policy.current_delay("/api/fs/get") == 0.9
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import alist
+
+# import alist 的耗时上限(秒)
+IMPORT_BUDGET = 0.05
+
+
+def import_time(code):
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in out.stderr.splitlines():
+        fields = line[len("import time:") :].split("|")
+        if line.startswith("import time:") and fields[-1].strip() == "alist":
+            return int(fields[1]) / 1e6, out.stdout
+    raise AssertionError(out.stderr)
+
+
+def test_lazy_imports():
+    code = (
+        "import sys, alist; "
+        "print(' '.join(m for m in ('aiohttp', 'aiofiles', 'alist.main', 'alist.sync')"
+        " if m in sys.modules))"
+    )
+    # 依赖和子模块在首次使用时才导入
+    assert import_time(code)[1].strip() == ""
+
+
+@pytest.mark.skipif(
+    not os.environ.get("ALIST_BENCHMARK"), reason="设置 ALIST_BENCHMARK=1 时运行"
+)
+def test_import_time():
+    assert min(import_time("import alist")[0] for _ in range(3)) < IMPORT_BUDGET
+
+
+def test_lazy_submodules():
+    code = (
+        "import alist; "
+        "print(alist.utils.EntryFilter.__name__, alist.main.AList.__name__, "
+        "alist.model.__name__, alist.sync.__name__)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert out.stdout.split() == ["EntryFilter", "AList", "alist.model", "alist.sync"]
+
+
+def test_lazy_exports():
+    from alist.main import AList
+    from alist.model import AListFile
+
+    assert alist.AList is AList
+    assert alist.AListAsync is AList
+    assert alist.AListFileAsync is AListFile
+    assert set(alist.__all__) <= set(dir(alist))
+    for name in alist.__all__:
+        assert getattr(alist, name) is not None
+    with pytest.raises(AttributeError):
+        alist.Missing
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+from aioresponses import CallbackResult, aioresponses
+
+import alist
+
+TREE = {
+    "/": [
+        {"name": "media", "is_dir": True, "size": 0, "modified": "2024-01-01T00:00:00Z"},
+        {"name": "readme.md", "is_dir": False, "size": 10, "modified": "2024-01-01T00:00:00Z"},
+    ],
+    "/media": [
+        {"name": "Show S01E01.mkv", "is_dir": False, "size": 1000, "modified": "2024-01-02T00:00:00Z"},
+        {"name": "Show S01E02.mkv", "is_dir": False, "size": 2000, "modified": "2024-01-03T00:00:00Z"},
+    ],
+}
+
+
+def mock_tree(m, tree, listed):
+    def callback(url, **kwargs):
+        path = json.loads(kwargs["data"])["path"]
+        listed.append(path)
+        return CallbackResult(
+            payload={
+                "code": 200,
+                "message": "success",
+                "data": {"content": tree[path], "provider": "Local", "total": len(tree[path])},
+            }
+        )
+
+    m.post("http://test/api/fs/list", callback=callback, repeat=True)
+
+
+@pytest.mark.asyncio
+async def test_local_index_search():
+    with aioresponses() as m:
+        listed = []
+        mock_tree(m, TREE, listed)
+        al = alist.AList("http://test")
+        index = await al.build_local_index("/")
+        assert sorted(listed) == ["/", "/media"]
+        assert len(index) == 4
+
+    assert [i.path for i in al.local_search("S01E02")] == ["/media/Show S01E02.mkv"]
+    assert [i.path for i in al.local_search("show")] == [
+        "/media/Show S01E01.mkv",
+        "/media/Show S01E02.mkv",
+    ]
+    flt = alist.utils.EntryFilter(min_size=1500)
+    assert [i.name for i in al.local_search("mkv", flt)] == ["Show S01E02.mkv"]
+    assert [i.path for i in al.local_search("", alist.utils.EntryFilter(is_dir=True))] == ["/media"]
+
+
+@pytest.mark.asyncio
+async def test_local_index_refresh():
+    with aioresponses() as m:
+        listed = []
+        mock_tree(m, TREE, listed)
+        al = alist.AList("http://test")
+        await al.build_local_index("/")
+        listed.clear()
+        # 目录未变化时只列出根目录
+        assert await al.refresh_local_index() == 1
+        assert listed == ["/"]
+
+    tree = {
+        "/": [{**TREE["/"][0], "modified": "2024-02-01T00:00:00Z"}],
+        "/media": TREE["/media"][:1],
+    }
+    with aioresponses() as m:
+        listed = []
+        mock_tree(m, tree, listed)
+        assert await al.refresh_local_index() == 2
+    assert al.local_search("readme") == []
+    assert al.local_search("S01E02") == []
+    assert len(al.local_index) == 2
+
+
+@pytest.mark.asyncio
+async def test_local_index_refresh_nested():
+    d = {"is_dir": True, "size": 0, "modified": "2024-01-01T00:00:00Z"}
+    tree = {
+        "/": [{**d, "name": "a"}],
+        "/a": [{**d, "name": "b"}],
+        "/a/b": [{**d, "name": "c"}],
+        "/a/b/c": [],
+    }
+    with aioresponses() as m:
+        listed = []
+        mock_tree(m, tree, listed)
+        al = alist.AList("http://test")
+        await al.build_local_index("/")
+
+    # 只有 /a/b 的修改时间变化，/ 和 /a 不变
+    tree["/a"] = [{**d, "name": "b", "modified": "2024-02-01T00:00:00Z"}]
+    tree["/a/b"] = tree["/a/b"] + [
+        {"name": "new.txt", "is_dir": False, "size": 1, "modified": "2024-02-01T00:00:00Z"}
+    ]
+    with aioresponses() as m:
+        listed = []
+        mock_tree(m, tree, listed)
+        await al.refresh_local_index()
+    assert [i.path for i in al.local_search("new")] == ["/a/b/new.txt"]
+    # 未变化且没有子目录的 /a/b/c 不再列出
+    assert sorted(listed) == ["/", "/a", "/a/b"]
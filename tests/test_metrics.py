@@ -0,0 +1,76 @@
+import pytest
+from aioresponses import aioresponses
+
+import alist
+
+
+@pytest.mark.asyncio
+async def test_request_metrics(tmp_path):
+    metrics = alist.Metrics(buckets=(0.5, 10))
+    cache = alist.ContentCache(str(tmp_path))
+    al = alist.AList("http://test", metrics=metrics, cache=cache)
+    with aioresponses() as m:
+        m.post(
+            "http://test/api/fs/get",
+            payload={
+                "code": 200,
+                "message": "success",
+                "data": {
+                    "name": "a",
+                    "size": 5,
+                    "is_dir": False,
+                    "raw_url": "http://test/d/a",
+                },
+            },
+        )
+        m.post("http://test/api/fs/get", payload={"code": 500, "message": "not found"})
+        m.get("http://test/d/a", body=b"hello")
+        async with await al.open("/a") as f:
+            assert await f.read() == b"hello"
+        assert await al._get_raw("/b") is None
+
+    snap = metrics.snapshot()
+    stats = snap["requests"]["POST /api/fs/get"]
+    assert stats["count"] == 2
+    assert stats["codes"] == {"200": 1, "500": 1}
+    assert stats["latency"]["buckets"]["+Inf"] == 2
+    assert stats["request_bytes"] > 0 and stats["response_bytes"] > 0
+    assert snap["transfers"]["download"]["bytes"] == 5
+    assert snap["cache"]["misses"] == 1
+
+    text = metrics.prometheus()
+    labels = 'method="POST",path="/api/fs/get"'
+    assert f'alist_requests_total{{{labels},code="500"}} 1' in text
+    assert f'alist_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert 'alist_transfer_bytes_total{direction="download"} 5' in text
+    # 命中/未命中是只增计数，容量是当前值
+    assert "# TYPE alist_cache_hits_total counter" in text
+    assert "alist_cache_hits_total 0" in text
+    assert "alist_cache_misses_total 1" in text
+    assert "# TYPE alist_cache_bytes gauge" in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_retry():
+    metrics = alist.Metrics()
+    al = alist.AListCluster(["http://a", "http://b"], probe_interval=0, metrics=metrics)
+    with aioresponses() as m:
+        m.post("http://b/api/fs/list", payload={"code": 200, "message": "", "data": {}})
+        await al._request("POST", "/api/fs/list", data="{}")
+    stats = metrics.snapshot()["requests"]["POST /api/fs/list"]
+    assert stats["retries"] == 1
+    assert stats["codes"] == {"ClientConnectionError": 1, "200": 1}
+
+
+def test_metrics_collector_types():
+    metrics = alist.Metrics()
+    metrics.add_collector(
+        "jobs", lambda: {"done_total": 3, "running": 1}, types={"done_total": "counter"}
+    )
+    text = metrics.prometheus()
+    assert "# TYPE alist_jobs_done_total counter" in text
+    assert "alist_jobs_done_total 3" in text
+    assert "# TYPE alist_jobs_running gauge" in text
+    assert metrics.snapshot()["jobs"] == {"done_total": 3, "running": 1}
+    with pytest.raises(ValueError):
+        metrics.add_collector("bad", dict, types={"x": "histogram"})
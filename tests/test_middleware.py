@@ -0,0 +1,70 @@
+import time
+
+import aiohttp
+import pytest
+from aioresponses import CallbackResult, aioresponses
+
+import alist
+
+ok = {"code": 200, "message": "success", "data": {}}
+
+
+@pytest.mark.asyncio
+async def test_middleware_order():
+    order = []
+    seen = {}
+
+    def make(name):
+        async def mw(request, next):
+            order.append(f"{name}>")
+            request.headers = {**request.headers, "X-Mw": name}
+            r = await next(request)
+            order.append(f"<{name}")
+            return r
+
+        return mw
+
+    def callback(url, headers=None, **kwargs):
+        seen.update(headers)
+        return CallbackResult(payload=ok)
+
+    al = alist.AList("http://test")
+    assert al._chain is None
+    al.use(make("a"), make("b"))
+    with aioresponses() as m:
+        m.post("http://test/api/fs/get", callback=callback)
+        assert await al._request("POST", "/api/fs/get", data="{}") == ok
+    assert order == ["a>", "b>", "<b", "<a"]
+    assert seen["X-Mw"] == "b"
+    # 中间件复制请求头，不影响客户端的全局请求头
+    assert "X-Mw" not in al.headers
+
+
+@pytest.mark.asyncio
+async def test_retry_middleware():
+    metrics = alist.Metrics()
+    al = alist.AList("http://test", metrics=metrics)
+    al.use(alist.Retry(attempts=3, backoff=0))
+    with aioresponses() as m:
+        m.post("http://test/api/fs/list", exception=aiohttp.ClientConnectionError())
+        m.post("http://test/api/fs/list", payload=ok)
+        assert await al._request("POST", "/api/fs/list") == ok
+
+        # 非只读接口不重试
+        m.post("http://test/api/fs/remove", exception=aiohttp.ClientConnectionError())
+        m.post("http://test/api/fs/remove", payload=ok)
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await al._request("POST", "/api/fs/remove")
+    assert metrics.snapshot()["requests"]["POST /api/fs/list"]["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limit():
+    al = alist.AList("http://test")
+    al.use(alist.RateLimit(rate=50, burst=1))
+    with aioresponses() as m:
+        m.get("http://test/api/me", payload=ok, repeat=True)
+        start = time.monotonic()
+        for _ in range(4):
+            await al._request("GET", "/api/me")
+    assert time.monotonic() - start >= 0.05
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+
+import pytest
+from aioresponses import CallbackResult, aioresponses
+
+import alist
+from alist import task
+
+
+def ok(data):
+    return CallbackResult(payload={"code": 200, "message": "success", "data": data})
+
+
+class FakeServer:
+    def __init__(self, active=0):
+        self.batches = []
+        self.active = active
+        self.undone_calls = 0
+
+    def add(self, url, data=None, **kwargs):
+        urls = json.loads(data)["urls"]
+        self.batches.append(urls)
+        return ok({"tasks": [{"id": u, "state": task.PENDING} for u in urls]})
+
+    def undone(self, url, **kwargs):
+        self.undone_calls += 1
+        # 每次查询后服务器完成一个任务
+        tasks = [{"id": f"other{i}", "state": task.RUNNING} for i in range(self.active)]
+        self.active = max(0, self.active - 1)
+        return ok(tasks)
+
+    def done(self, url, **kwargs):
+        return ok(
+            [
+                {"id": u, "state": task.FAILED if u.endswith("bad") else task.SUCCEEDED}
+                for b in self.batches
+                for u in b
+            ]
+        )
+
+    def mock(self, m):
+        base = "http://test/api/admin/task/offline_download"
+        m.post("http://test/api/fs/add_offline_download", callback=self.add, repeat=True)
+        m.get(f"{base}/undone", callback=self.undone, repeat=True)
+        m.get(f"{base}/done", callback=self.done, repeat=True)
+
+
+@pytest.mark.asyncio
+async def test_offline_ingest_resume(tmp_path):
+    journal = str(tmp_path / "ingest.jsonl")
+    urls = [f"http://f/{i}" for i in range(5)] + ["http://f/bad"]
+    server = FakeServer()
+    with aioresponses() as m:
+        server.mock(m)
+        alis = alist.AList("http://test")
+        alis.task_poller.min_interval = alis.task_poller.max_interval = 0.01
+        ingest = alist.OfflineIngest(alis, "/dl", journal=journal, chunk_size=4)
+        stats = await ingest.run(urls)
+        ingest.close()
+        assert stats == {"submitted": 6, "succeeded": 5, "failed": 1, "pending": 0}
+        assert server.batches == [urls[:4], urls[4:]]
+
+        # 从日志恢复，只提交新的URL
+        ingest = alist.OfflineIngest(alis, "/dl", journal=journal, chunk_size=4)
+        assert ingest.stats["succeeded"] == 5
+        await ingest.run(urls + ["http://f/new"])
+        ingest.close()
+        assert server.batches[-1] == ["http://f/new"]
+        assert ingest.stats["submitted"] == 7
+
+
+@pytest.mark.asyncio
+async def test_offline_ingest_throttle():
+    server = FakeServer(active=3)
+    with aioresponses() as m:
+        server.mock(m)
+        alis = alist.AList("http://test")
+        ingest = alist.OfflineIngest(
+            alis, "/dl", chunk_size=2, max_active=3, poll_interval=0.01
+        )
+        await ingest.run(["http://f/1", "http://f/2"], wait=False)
+        # 活动任务数从3降到1后才提交
+        assert server.undone_calls == 3
+        assert ingest.stats["pending"] == 2
+
+        ingest.pause()
+        assert ingest.paused
+        assert not await ingest._reserve(1)
+
+
+@pytest.mark.asyncio
+async def test_offline_ingest_submit_error(tmp_path):
+    journal = str(tmp_path / "journal.jsonl")
+
+    async def add(url, data=None, **kwargs):
+        urls = json.loads(data)["urls"]
+        if urls == ["fail"]:
+            return CallbackResult(payload={"code": 500, "message": "boom", "data": None})
+        await asyncio.sleep(0.1)
+        return ok({"tasks": [{"id": u, "state": task.PENDING} for u in urls]})
+
+    with aioresponses() as m:
+        m.post("http://test/api/fs/add_offline_download", callback=add, repeat=True)
+        m.get(
+            "http://test/api/admin/task/offline_download/undone",
+            payload={"code": 200, "message": "success", "data": []},
+            repeat=True,
+        )
+        al = alist.AList("http://test")
+        ingest = alist.OfflineIngest(al, "/dl", journal=journal, chunk_size=1)
+        with pytest.raises(alist.ServerError):
+            await ingest.run(["fail", "a", "b"], wait=False)
+        ingest.close()
+        # 其余提交已被取消，关闭后不会再写入日志
+        assert [t for t in asyncio.all_tasks() if t is not asyncio.current_task()] == []
+        await asyncio.sleep(0.2)
+    assert ingest.submitted == {}
+    assert not os.path.exists(journal) or open(journal).read() == ""
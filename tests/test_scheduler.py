@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+import alist
+from alist import scheduler
+
+
+def test_classify():
+    assert scheduler.classify("/api/fs/get") == scheduler.INTERACTIVE
+    assert scheduler.classify("/api/fs/put") == scheduler.BULK
+    assert scheduler.classify("/api/admin/user/list") == scheduler.ADMIN
+    with alist.AList.priority("bulk"):
+        assert scheduler.classify("/api/fs/get") == scheduler.BULK
+
+
+def test_invalid_reservation():
+    with pytest.raises(ValueError):
+        alist.RequestScheduler(2, {"interactive": 3})
+
+
+@pytest.mark.asyncio
+async def test_interactive_reservation():
+    s = alist.RequestScheduler(2, {"interactive": 1})
+    await s.acquire(scheduler.BULK)
+    # 共享槽位已被批量流量占满
+    bulk = asyncio.ensure_future(s.acquire(scheduler.BULK))
+    await asyncio.sleep(0)
+    assert not bulk.done()
+    # 交互流量仍可使用预留槽位
+    await asyncio.wait_for(s.acquire(scheduler.INTERACTIVE), 1)
+    s.release(scheduler.BULK)
+    await asyncio.wait_for(bulk, 1)
+    assert s.active == {"interactive": 1, "admin": 0, "bulk": 1}
+
+
+@pytest.mark.asyncio
+async def test_priority_order():
+    s = alist.RequestScheduler(1, {})
+    await s.acquire(scheduler.BULK)
+    order = []
+
+    async def worker(cls):
+        async with s.slot(cls):
+            order.append(cls)
+
+    tasks = [asyncio.ensure_future(worker(scheduler.BULK))]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.ensure_future(worker(scheduler.INTERACTIVE)))
+    await asyncio.sleep(0)
+    s.release(scheduler.BULK)
+    await asyncio.gather(*tasks)
+    assert order == [scheduler.INTERACTIVE, scheduler.BULK]
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from aioresponses import CallbackResult, aioresponses
+
+import alist
+from alist import task
+
+
+def ok(data):
+    return CallbackResult(payload={"code": 200, "message": "success", "data": data})
+
+
+@pytest.mark.asyncio
+async def test_task_wait():
+    # 每轮轮询推进一次状态：运行中 -> 1号成功、2号失败
+    rounds = {"undone": 0, "done": 0}
+
+    def undone(url, **kwargs):
+        rounds["undone"] += 1
+        if rounds["undone"] < 3:
+            return ok(
+                [
+                    {"id": "1", "state": task.RUNNING, "progress": rounds["undone"] * 30},
+                    {"id": "2", "state": task.RUNNING, "progress": 10},
+                ]
+            )
+        return ok(None)
+
+    def done(url, **kwargs):
+        rounds["done"] += 1
+        return ok(
+            [
+                {"id": "1", "state": task.SUCCEEDED, "progress": 100},
+                {"id": "2", "state": task.FAILED, "progress": 10, "error": "boom"},
+            ]
+        )
+
+    with aioresponses() as m:
+        m.post(
+            "http://test/api/fs/copy",
+            payload={
+                "code": 200,
+                "message": "success",
+                "data": {
+                    "tasks": [
+                        {"id": "1", "name": "copy a", "state": task.PENDING},
+                        {"id": "2", "name": "copy b", "state": task.PENDING},
+                    ]
+                },
+            },
+        )
+        m.get("http://test/api/admin/task/copy/undone", callback=undone, repeat=True)
+        m.get("http://test/api/admin/task/copy/done", callback=done, repeat=True)
+
+        alis = alist.AList("http://test")
+        alis.task_poller.min_interval = 0.01
+        alis.task_poller.max_interval = 0.01
+        t1, t2 = await alis.copy("/a", "/b", return_tasks=True)
+        assert t1.name == "copy a"
+
+        results = await asyncio.gather(t1, t2, return_exceptions=True)
+        assert results[0] is t1 and t1.succeeded and t1.progress == 100
+        assert isinstance(results[1], alist.TaskError)
+        assert results[1].task is t2 and t2.error == "boom"
+        # 两个任务共用一次轮询
+        assert rounds == {"undone": 3, "done": 1}
+        assert alis.task_poller.watching == 0
+
+        assert await t1 is t1
+
+
+@pytest.mark.asyncio
+async def test_task_backoff():
+    with aioresponses() as m:
+        m.get(
+            "http://test/api/admin/task/offline_download/undone",
+            payload={"code": 200, "message": "success", "data": [{"id": "x", "state": 1}]},
+            repeat=True,
+        )
+        alis = alist.AList("http://test")
+        poller = alist.TaskPoller(alis, min_interval=0.01, max_interval=0.04, backoff=2)
+        alis.task_poller = poller
+        h = poller.handle("offline_download", {"id": "x", "state": 0})
+        with pytest.raises(asyncio.TimeoutError):
+            await h.wait(timeout=0.1)
+        # 状态没有变化，间隔增长到上限
+        assert poller.interval == 0.04
+        assert poller.watching == 1
+        await poller.close()
+
+
+@pytest.mark.asyncio
+async def test_task_poller_unexpected_error():
+    alis = alist.AList("http://test")
+    poller = alist.TaskPoller(alis, min_interval=0.01)
+
+    async def broken(type, done):
+        raise KeyError("id")
+
+    alis._task_list = broken
+    h = poller.handle("copy", {"id": "1", "state": task.RUNNING})
+    # 轮询异常结束时等待中的任务立即收到该异常，而不是一直等待
+    with pytest.raises(KeyError):
+        await h.wait(timeout=1)
+    assert poller.watching == 0
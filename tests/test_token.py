@@ -0,0 +1,135 @@
+import asyncio
+import base64
+import json
+import os
+import time
+
+import pytest
+from aioresponses import CallbackResult, aioresponses
+from yarl import URL
+
+import alist
+from alist.token import jwt_expiry
+
+ok = {"code": 200, "message": "success", "data": {}}
+
+
+def make_token(exp, n=0):
+    def part(obj):
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).rstrip(b"=").decode()
+
+    return f"{part({'alg': 'HS256'})}.{part({'username': 'u', 'exp': exp, 'n': n})}.sig"
+
+
+def test_jwt_expiry():
+    assert jwt_expiry(make_token(1700000000)) == 1700000000
+    assert jwt_expiry("not-a-jwt") is None
+    assert jwt_expiry("a.!!!.c") is None
+
+
+def test_token_store(tmp_path):
+    path = str(tmp_path / "tokens.json")
+    store = alist.TokenStore(path)
+    assert store.get("http://a", "u") is None
+    valid = make_token(time.time() + 3600)
+    store.set("http://a/", "u", valid)
+    store.set("http://b", "u", make_token(time.time() + 10))
+    assert store.get("http://a", "u") == valid
+    # 即将过期
+    assert store.get("http://b", "u") is None
+    assert oct(os.stat(path).st_mode & 0o777) == "0o600"
+    store.delete("http://a", "u")
+    assert alist.TokenStore(path).get("http://a", "u") is None
+
+
+@pytest.mark.asyncio
+async def test_login_with_store(tmp_path):
+    store = alist.TokenStore(str(tmp_path / "tokens.json"))
+    user = alist.AListUser("u", "p")
+    token = make_token(time.time() + 3600)
+    with aioresponses() as m:
+        m.post(
+            "http://test/api/auth/login/hash",
+            payload={"code": 200, "message": "success", "data": {"token": token}},
+        )
+        al = alist.AList("http://test")
+        assert await al.login(user, store=store)
+        # 第二个客户端直接使用保存的Token
+        al2 = alist.AList("http://test")
+        assert await al2.login(user, store=store)
+    assert al2.headers["Authorization"] == token
+    assert len(m.requests[("POST", URL("http://test/api/auth/login/hash"))]) == 1
+
+
+@pytest.mark.asyncio
+async def test_auto_login():
+    user = alist.AListUser("u", "p")
+    logins = []
+
+    def login(url, **kwargs):
+        logins.append(1)
+        token = make_token(time.time() + 3600, len(logins))
+        return CallbackResult(
+            payload={"code": 200, "message": "success", "data": {"token": token}}
+        )
+
+    def get(url, headers=None, **kwargs):
+        if headers["Authorization"] == "stale":
+            return CallbackResult(payload={"code": 401, "message": "token is expired"})
+        return CallbackResult(payload=ok)
+
+    auto = alist.AutoLogin(user)
+    al = alist.AList("http://test")
+    al.use(auto)
+    with aioresponses() as m:
+        m.post("http://test/api/auth/login/hash", callback=login, repeat=True)
+        m.post("http://test/api/fs/get", callback=get, repeat=True)
+        # 未登录时先登录
+        assert await al._request("POST", "/api/fs/get") == ok
+        assert auto.logins == 1
+
+        # 服务器返回401时只重新登录一次
+        al.token = "stale"
+        al.headers["Authorization"] = al.token
+        results = await asyncio.gather(
+            *(al._request("POST", "/api/fs/get") for _ in range(5))
+        )
+        assert results == [ok] * 5
+        assert auto.logins == 2
+
+        # 即将过期时提前重新登录
+        auto.refresh_margin = 7200
+        assert await al._request("POST", "/api/fs/get") == ok
+        assert auto.logins == 3
+    assert len(logins) == 3
+
+
+@pytest.mark.asyncio
+async def test_auto_login_no_replay_stream():
+    user = alist.AListUser("u", "p")
+    token = make_token(time.time() + 3600)
+    sent = []
+
+    def put(url, data=None, **kwargs):
+        sent.append(data)
+        return CallbackResult(payload={"code": 401, "message": "token is expired"})
+
+    async def body():
+        yield b"data"
+
+    auto = alist.AutoLogin(user)
+    al = alist.AList("http://test")
+    al.token = "stale"
+    al.headers["Authorization"] = "stale"
+    al.use(auto)
+    with aioresponses() as m:
+        m.post(
+            "http://test/api/auth/login/hash",
+            payload={"code": 200, "message": "success", "data": {"token": token}},
+        )
+        m.put("http://test/api/fs/put", callback=put, repeat=True)
+        r = await al._request("PUT", "/api/fs/put", data=body())
+    # 重新登录，但不重放已读取的流式请求体
+    assert r["code"] == 401
+    assert len(sent) == 1
+    assert al.token == token
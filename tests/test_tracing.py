@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from contextlib import contextmanager
+
+import pytest
+from aiohttp import web
+
+import alist
+
+
+class FakeSpan:
+    def __init__(self, name, parent):
+        self.name = name
+        self.parent = parent
+        self.attributes = {}
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class FakeOtel:
+    def __init__(self):
+        self.spans = []
+        self.current = None
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes=None):
+        span = FakeSpan(name, self.current)
+        self.spans.append(span)
+        parent, self.current = self.current, span
+        try:
+            yield span
+        finally:
+            self.current = parent
+
+
+@pytest.fixture
+async def server():
+    async def get(request):
+        await asyncio.sleep(0.05)
+        data = {"name": "a", "size": 5, "is_dir": False, "raw_url": ""}
+        return web.json_response({"code": 200, "message": "success", "data": data})
+
+    async def list_(request):
+        await asyncio.sleep(0.05)
+        data = {"content": [{"name": "a", "size": 5, "is_dir": False}], "total": 1}
+        return web.json_response({"code": 200, "message": "success", "data": data})
+
+    app = web.Application()
+    app.router.add_post("/api/fs/get", get)
+    app.router.add_post("/api/fs/list", list_)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    await runner.cleanup()
+
+
+async def test_tracer_phases(server, caplog):
+    tracer = alist.RequestTracer(slow_threshold=0.01)
+    tracer._otel = otel = FakeOtel()
+    al = alist.AList(server, tracer=tracer)
+    with caplog.at_level(logging.WARNING, logger="alist.tracing"):
+        f = await al.open("/a")
+    assert f.tracer is tracer
+
+    timing = tracer.recent[-1]
+    assert timing.status == 200
+    assert timing.server >= 0.04
+    assert timing.total >= timing.server + timing.connect
+    assert "慢调用 open" in caplog.text
+    assert "POST" in caplog.text
+
+    method, request = otel.spans
+    assert method.name == "AList.open"
+    assert request.name == "POST /api/fs/get" and request.parent is method
+    assert request.attributes["alist.status"] == "200"
+
+
+async def test_tracer_fast(server, caplog):
+    tracer = alist.RequestTracer(slow_threshold=10)
+    al = alist.AList(server, tracer=tracer)
+    with caplog.at_level(logging.WARNING, logger="alist.tracing"):
+        await al.open("/a")
+    assert not caplog.text
+    # 其他实例不受影响
+    assert "open" not in vars(alist.AList(server))
+
+
+async def test_tracer_async_generator(server, caplog):
+    tracer = alist.RequestTracer(slow_threshold=0.01)
+    tracer._otel = otel = FakeOtel()
+    al = alist.AList(server, tracer=tracer)
+    with caplog.at_level(logging.WARNING, logger="alist.tracing"):
+        items = [i async for i in al.list_dir("/")]
+    assert [i.path for i in items] == ["/a"]
+    assert "慢调用 list_dir" in caplog.text
+
+    method, request = otel.spans
+    assert method.name == "AList.list_dir"
+    assert request.name == "POST /api/fs/list" and request.parent is method
+    assert otel.current is None
@@ -1,5 +1,11 @@
+import asyncio
+import hashlib
+import json
+import sys
+
+import aiohttp
 import pytest
-from aioresponses import aioresponses
+from aioresponses import CallbackResult, aioresponses
 
 import alist
 
@@ -149,3 +155,174 @@ def test_AListFile_magic():
         f = alist.AListFile("/", alist_file_init)
         assert len(f) == 11
         assert str(f) == "/"
+
+
+def test_parse_time():
+    assert alist.utils.parse_time("2024-05-17T16:05:36.4651534+08:00") == pytest.approx(1715933136.465153)
+    assert alist.utils.parse_time("1970-01-01T00:00:10Z") == 10
+    assert alist.utils.parse_time("") == 0
+
+
+def test_EntryFilter():
+    flt = alist.utils.EntryFilter(
+        max_size=100, is_dir=False, modified_after="2024-01-01T00:00:00Z"
+    )
+    assert flt(alist_file_init)
+    assert not flt({**alist_file_init, "size": 101})
+    assert not flt({**alist_file_init, "modified": "2023-05-17T16:05:36+08:00"})
+    assert alist.utils.EntryFilter(glob="/a/*.md")({"name": "x.md"}, "/a/x.md")
+
+
+async def test_JsonArrayStream():
+    content = [{"name": f"文件{i}", "size": i * 1000} for i in range(20)]
+    raw = json.dumps(
+        {"code": 200, "message": "成功", "data": {"content": content, "total": 20}},
+        ensure_ascii=False,
+    ).encode()
+
+    async def chunks(n):
+        for i in range(0, len(raw), n):
+            yield raw[i : i + n]
+
+    for n in (1, 7, 4096):
+        stream = alist.utils.JsonArrayStream(chunks(n), ("data", "content"))
+        assert [i async for i in stream] == content
+        assert stream.header == {"code": 200, "message": "成功"}
+
+
+def test_AListCompactFile():
+    f = alist.AListFile("/Alist V3.md", alist_file_init).to_compact()
+    assert not hasattr(f, "__dict__")
+    # 文档中给出的单个对象内存占用
+    assert sys.getsizeof(f) <= 96
+    assert f.raw is None
+    assert f.modified == 1715933136
+    assert f.provider is sys.intern("Local")
+    assert len(f) == 11
+    assert f.to_file().url == "http://1/"
+    assert alist.AListCompactFile("/", alist_file_init, keep_raw=True).raw is alist_file_init
+
+
+async def test_AListFile_iter_chunks():
+    body = bytes(range(256)) * 100
+    with aioresponses() as m:
+        m.get("http://1/", body=body)
+        async with alist.AListFile("/", alist_file_init) as f:
+            chunks = [c async for c in f.iter_chunks(1024, max_chunk_size=8192)]
+            assert b"".join(chunks) == body
+            assert [len(c) for c in chunks[:5]] == [1024, 2048, 4096, 8192, 8192]
+            # 不预读时与原实现一致：固定块大小
+            chunks = [c async for c in f.iter_chunks(4096, readahead=0)]
+            assert b"".join(chunks) == body
+            assert [len(c) for c in chunks] == [4096] * 6 + [len(body) - 4096 * 6]
+
+
+def test_AdaptiveChunker():
+    chunker = alist.utils.AdaptiveChunker(64 * 1024, 16 * 1024, 1024 * 1024, target=0.1)
+    # 快速链路：块大小逐步增大，但不超过上限
+    for _ in range(10):
+        chunker.update(chunker.size, 0.001)
+    assert chunker.size == 1024 * 1024
+    # 慢速链路：块大小逐步减小，但不低于下限
+    for _ in range(40):
+        chunker.update(chunker.size, 10)
+    assert chunker.size == 16 * 1024
+
+
+async def test_AListFile_download_stats():
+    with aioresponses() as m:
+        m.get("http://1/", body=b"Hello World")
+        async with alist.AListFile("/", alist_file_init) as f:
+            assert f.transfer_stats.bytes == 11
+            assert f.transfer_stats.read_chunk_size >= 64 * 1024
+            assert f.transfer_stats.as_dict()["write_chunk_size"] >= 64 * 1024
+
+
+async def test_AListFile_download_to(tmp_path):
+    body = bytes(range(256)) * 4096
+    init = {**alist_file_init, "size": len(body)}
+
+    def callback(url, headers=None, **kwargs):
+        start, end = headers["Range"][len("bytes=") :].split("-")
+        return CallbackResult(status=206, body=body[int(start) : int(end) + 1])
+
+    with aioresponses() as m:
+        m.get("http://1/", callback=callback, repeat=True)
+        f = alist.AListFile("/", init)
+        await f.download_to(str(tmp_path / "a"), segments=4, min_chunk_size=4096)
+        assert (tmp_path / "a").read_bytes() == body
+        assert f.transfer_stats.bytes == len(body)
+
+    # 服务器不支持Range时回退为单连接下载
+    with aioresponses() as m:
+        m.get("http://1/", body=body, repeat=True)
+        await f.download_to(str(tmp_path / "b"), segments=4, min_chunk_size=4096)
+        assert (tmp_path / "b").read_bytes() == body
+
+
+async def test_AListFile_download_to_segment_error(tmp_path):
+    body = bytes(range(256)) * 4096
+    init = {**alist_file_init, "size": len(body)}
+
+    async def callback(url, headers=None, **kwargs):
+        start, end = headers["Range"][len("bytes=") :].split("-")
+        if start == "0":
+            return CallbackResult(status=500, reason="Internal Server Error")
+        await asyncio.sleep(0.2)
+        return CallbackResult(status=206, body=body[int(start) : int(end) + 1])
+
+    with aioresponses() as m:
+        m.get("http://1/", callback=callback, repeat=True)
+        f = alist.AListFile("/", init)
+        with pytest.raises(aiohttp.ClientResponseError):
+            await f.download_to(str(tmp_path / "a"), segments=4, min_chunk_size=4096)
+        # 其余分段已被取消并结束，不会在文件关闭后继续写入
+        assert [t for t in asyncio.all_tasks() if t is not asyncio.current_task()] == []
+
+
+async def test_preallocated_file(tmp_path):
+    async with await alist.utils.PreallocatedFile.open(str(tmp_path / "a"), 8) as f:
+        assert await f.write_at(4, b"abcd") == 4
+        assert await f.write_at(0, b"0123") == 4
+    assert (tmp_path / "a").read_bytes() == b"0123abcd"
+
+
+async def test_AListFile_save_preallocate(tmp_path):
+    with aioresponses() as m:
+        m.get("http://1/", body=b"Hello World")
+        async with alist.AListFile("/", alist_file_init) as f:
+            await f.save(str(tmp_path / "a"), preallocate=True)
+    assert (tmp_path / "a").read_bytes() == b"Hello World"
+
+
+async def test_AListFile_verify(tmp_path):
+    body = bytes(range(256)) * 4096
+    hash_info = {
+        "md5": hashlib.md5(body).hexdigest(),
+        "sha1": hashlib.sha1(body).hexdigest().upper(),
+    }
+    init = {**alist_file_init, "size": len(body), "hash_info": hash_info}
+
+    def callback(url, headers=None, **kwargs):
+        start, end = headers["Range"][len("bytes=") :].split("-")
+        return CallbackResult(status=206, body=body[int(start) : int(end) + 1])
+
+    with aioresponses() as m:
+        m.get("http://1/", body=body)
+        async with alist.AListFile("/", init) as f:
+            assert f.digests["sha1"] == hash_info["sha1"].lower()
+        m.get("http://1/", callback=callback, repeat=True)
+        f = alist.AListFile("/", init)
+        await f.download_to(str(tmp_path / "a"), segments=4, min_chunk_size=4096)
+        assert f.digests["md5"] == hash_info["md5"]
+
+    bad = {**init, "hash_info": {"sha256": "0" * 64}}
+    with aioresponses() as m:
+        m.get("http://1/", body=body, repeat=True)
+        with pytest.raises(alist.IntegrityError) as e:
+            async with alist.AListFile("/", bad):
+                pass
+        assert e.value.algorithm == "sha256"
+        f = alist.AListFile("/", bad)
+        await f.download_to(str(tmp_path / "b"), verify=False)
+        assert f.digests == {}
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from aioresponses import CallbackResult, aioresponses
+
+import alist
+from alist.watch import CREATED, DELETED, MODIFIED, Watcher, WatchEvent
+
+
+def item(name, is_dir=False, size=0, modified="2024-01-01T00:00:00Z"):
+    return {"name": name, "is_dir": is_dir, "size": size, "modified": modified}
+
+
+def mock_tree(m, tree, listed):
+    def list_callback(url, **kwargs):
+        path = json.loads(kwargs["data"])["path"]
+        listed.append(path)
+        if path not in tree:
+            return CallbackResult(payload={"code": 500, "message": "not found"})
+        return CallbackResult(
+            payload={"code": 200, "message": "success", "data": {"content": tree[path]}}
+        )
+
+    def get_callback(url, **kwargs):
+        path = json.loads(kwargs["data"])["path"]
+        if path == "/":
+            return CallbackResult(
+                payload={"code": 200, "message": "success", "data": tree["/.meta"]}
+            )
+        parent, name = path.rsplit("/", 1)
+        for i in tree.get(parent or "/", []):
+            if i["name"] == name:
+                return CallbackResult(
+                    payload={"code": 200, "message": "success", "data": i}
+                )
+        return CallbackResult(payload={"code": 500, "message": "not found"})
+
+    m.post("http://test/api/fs/list", callback=list_callback, repeat=True)
+    m.post("http://test/api/fs/get", callback=get_callback, repeat=True)
+
+
+@pytest.mark.asyncio
+async def test_watch_poll():
+    tree = {
+        "/.meta": item("", True),
+        "/": [item("a", True), item("x.txt", size=1)],
+        "/a": [item("1.txt"), item("b", True)],
+        "/a/b": [item("2.txt")],
+    }
+    with aioresponses() as m:
+        listed = []
+        mock_tree(m, tree, listed)
+        w = Watcher(alist.AList("http://test"), "/", interval=0, max_interval=0)
+        await w.snapshot()
+        listed.clear()
+
+        # 没有变化时不重新列出目录
+        assert await w.poll() == []
+        assert listed == []
+
+        later = "2024-02-01T00:00:00Z"
+        tree["/.meta"] = item("", True, modified=later)
+        tree["/"] = [item("a", True, modified=later), item("x.txt", size=2, modified=later)]
+        tree["/a"] = [item("1.txt"), item("c", True)]
+        tree["/a/c"] = [item("3.txt")]
+        del tree["/a/b"]
+        events = await w.poll()
+        assert "/a/c" in listed
+
+    assert sorted(events, key=lambda e: e.path) == [
+        WatchEvent(DELETED, "/a/b", True, {}),
+        WatchEvent(DELETED, "/a/b/2.txt", False, {}),
+        WatchEvent(CREATED, "/a/c", True, {}),
+        WatchEvent(CREATED, "/a/c/3.txt", False, {}),
+        WatchEvent(MODIFIED, "/x.txt", False, {}),
+    ]
+    # 事件可以放入集合去重
+    assert len(set(events) | {WatchEvent(MODIFIED, "/x.txt", False, {})}) == 5